@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the single-encode audio trim.
+
+Generates a synthetic Opus/WebM source (what YouTube's bestaudio usually
+is) and cuts the same range out of it three ways:
+
+- legacy: the previous pipeline, converting the whole download to MP3
+  (yt-dlp's FFmpegExtractAudio) and then decoding and re-encoding that
+  MP3 in `trim_audio`
+- mp3:    `cut_audio` seeking, cutting and encoding once
+- copy:   `cut_audio` stream-copying into an Ogg/Opus container
+
+Reports wall time and the CPU seconds of the ffmpeg children. Needs ffmpeg
+and ffprobe on PATH.
+
+Usage: python benchmarks/bench_audio_trim.py [source_seconds] [start] [end]
+"""
+import os
+import sys
+import time
+import asyncio
+import resource
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import handlers.trim_handlers as trim_handlers
+from utils.smart_trim import probe_duration, _run
+
+
+async def make_source(path, seconds):
+    returncode, _, stderr = await _run([
+        "ffmpeg", "-v", "error",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+        "-c:a", "libopus", "-b:a", "128k", "-y", path,
+    ])
+    if returncode != 0:
+        raise RuntimeError(stderr)
+
+
+async def legacy_trim(source, output_base, start, end):
+    """Full download converted to MP3, then that MP3 trimmed and encoded again."""
+    full_mp3 = f"{output_base}_full.mp3"
+    for command in (
+        ["ffmpeg", "-v", "error", "-i", source, "-vn", "-c:a", "libmp3lame", "-b:a", "192k", "-y", full_mp3],
+        ["ffmpeg", "-v", "error", "-i", full_mp3, "-ss", str(start), "-to", str(end),
+         "-vn", "-acodec", "libmp3lame", "-q:a", "2", "-y", f"{output_base}.mp3"],
+    ):
+        returncode, _, stderr = await _run(command)
+        if returncode != 0:
+            raise RuntimeError(stderr)
+    return f"{output_base}.mp3"
+
+
+async def single_encode(source, output_base, start, end):
+    trim_handlers.AUDIO_TRIM_FORMAT = "mp3"
+    path, _ = await trim_handlers.cut_audio(source, output_base, start, end, codec="opus")
+    return path
+
+
+async def stream_copy(source, output_base, start, end):
+    trim_handlers.AUDIO_TRIM_FORMAT = "copy"
+    path, _ = await trim_handlers.cut_audio(source, output_base, start, end, codec="opus")
+    return path
+
+
+def children_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def measure(name, trim, source, output_base, start, end):
+    cpu_before = children_cpu()
+    started = time.perf_counter()
+    result = await trim(source, output_base, start, end)
+    elapsed = time.perf_counter() - started
+    cpu = children_cpu() - cpu_before
+    duration = await probe_duration(result) if result else None
+    print(f"{name:<7} wall={elapsed:6.2f}s  cpu={cpu:6.2f}s  duration={duration}  file={os.path.basename(result)}")
+    return cpu
+
+
+async def main():
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    start = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    end = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.webm")
+        print(f"Generating {seconds}s Opus source...")
+        await make_source(source, seconds)
+        print(f"Cutting {start}s -> {end}s ({end - start}s)\n")
+
+        legacy = await measure("legacy", legacy_trim, source, os.path.join(tmp, "legacy"), start, end)
+        single = await measure("mp3", single_encode, source, os.path.join(tmp, "single"), start, end)
+        await measure("copy", stream_copy, source, os.path.join(tmp, "copy"), start, end)
+        print(f"\nSingle encode uses {legacy / max(single, 0.001):.1f}x less CPU than the legacy pipeline")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
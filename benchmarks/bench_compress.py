@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the size-targeted compression in `compress_video`.
+
+Generates synthetic H.264/AAC clips and compresses each to a few target
+sizes, reporting encode wall time, the resolution/preset picked from the
+ladder, and how close the output lands to the target. The previous fixed
+CRF 23 encode is run once per clip for comparison. Needs ffmpeg and
+ffprobe on PATH.
+
+Usage: python benchmarks/bench_compress.py [clip_seconds] [target_mb ...]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handlers.common_handler import compress_video, plan_compression
+from utils.smart_trim import probe_video_stream, probe_duration, _run
+
+MB = 1024 * 1024
+
+# (name, lavfi video source): an easy and a hard (noisy) clip
+CLIPS = (
+    ("testsrc2", "testsrc2=size=1920x1080:rate=30:duration={seconds}"),
+    ("noise", "testsrc2=size=1920x1080:rate=30:duration={seconds},noise=alls=40:allf=t"),
+)
+
+
+async def make_clip(path, source, seconds):
+    returncode, _, stderr = await _run([
+        "ffmpeg", "-v", "error",
+        "-f", "lavfi", "-i", source.format(seconds=seconds),
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-crf", "10",
+        "-c:a", "aac", "-shortest", "-y", path,
+    ])
+    if returncode != 0:
+        raise RuntimeError(stderr)
+
+
+async def legacy_compress(input_path, output_path):
+    """The fixed CRF 23 encode compress_video used before."""
+    returncode, _, stderr = await _run([
+        "ffmpeg", "-y", "-v", "error", "-i", input_path,
+        "-c:v", "libx264", "-crf", "23", "-preset", "medium",
+        "-c:a", "aac", "-b:a", "128k", output_path,
+    ])
+    if returncode != 0:
+        raise RuntimeError(stderr)
+
+
+async def main():
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    targets = [float(mb) for mb in sys.argv[2:]] or [20, 8, 3]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, source in CLIPS:
+            clip = os.path.join(tmp, f"{name}.mp4")
+            print(f"Generating {seconds}s 1080p30 '{name}' clip...")
+            await make_clip(clip, source, seconds)
+            stream = await probe_video_stream(clip)
+            duration = await probe_duration(clip)
+            print(f"  source {os.path.getsize(clip) / MB:.1f} MB")
+
+            started = time.perf_counter()
+            legacy = os.path.join(tmp, f"{name}_crf23.mp4")
+            await legacy_compress(clip, legacy)
+            print(f"  crf23      wall={time.perf_counter() - started:6.2f}s  size={os.path.getsize(legacy) / MB:6.2f} MB")
+
+            for target_mb in targets:
+                target = int(target_mb * MB)
+                plan = plan_compression(duration, stream["width"], stream["height"], target)
+                output = os.path.join(tmp, f"{name}_{target_mb:g}.mp4")
+                started = time.perf_counter()
+                result = await compress_video(clip, output, target_size=target)
+                elapsed = time.perf_counter() - started
+                if not result:
+                    print(f"  {target_mb:5g} MB   failed (plan {plan})")
+                    continue
+                size = os.path.getsize(result)
+                _, _, short_side, preset = plan
+                print(
+                    f"  {target_mb:5g} MB   wall={elapsed:6.2f}s  size={size / MB:6.2f} MB  "
+                    f"({size / target:6.1%} of target)  {short_side}p {preset}"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Simulation of per-chat fair-share scheduling.
+
+One heavy chat bursts 50 video downloads while light chats keep sending
+single requests. Reports the p95 queue wait of the light chats with the
+scheduler's fair share, and with every job funnelled through one shared
+queue (the old FIFO-like behaviour).
+
+Usage: python benchmarks/bench_fair_share.py
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.job_queue import PersistentJobQueue
+from utils.jobs import Job, VIDEO, AUDIO, IMAGE
+from utils.scheduler import JobScheduler
+
+NUM_WORKERS = 3
+SECONDS_PER_COST = 0.004  # Simulated processing time per unit of estimated cost
+HEAVY_CHAT = 1
+HEAVY_BURST = 50
+LIGHT_CHATS = range(100, 120)
+LIGHT_INTERVAL = 0.01
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def simulate(fair):
+    random.seed(7)
+    light_waits = []
+    real_chat = {}  # job_id -> chat that sent it
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scheduler = JobScheduler(PersistentJobQueue(os.path.join(tmp, "jobs.db")))
+
+        async def submit(kind, chat_id):
+            # Without fair share every job lands in the same per-chat heap
+            job = await scheduler.submit(Job(kind, chat_id if fair else 0, "https://example.com/video"))
+            real_chat[job.job_id] = chat_id
+
+        async def worker():
+            while True:
+                job = await scheduler.get()
+                if real_chat[job.job_id] != HEAVY_CHAT:
+                    light_waits.append(time.time() - job.enqueued_at)
+                await asyncio.sleep(job.est_cost * SECONDS_PER_COST)
+                scheduler.done(job)
+
+        workers = [asyncio.create_task(worker()) for _ in range(NUM_WORKERS)]
+
+        for _ in range(HEAVY_BURST):
+            await submit(VIDEO, HEAVY_CHAT)
+        for chat_id in LIGHT_CHATS:
+            await submit(random.choice((VIDEO, AUDIO, IMAGE)), chat_id)
+            await asyncio.sleep(LIGHT_INTERVAL)
+
+        while scheduler.qsize():
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+        for task in workers:
+            task.cancel()
+
+    return light_waits
+
+
+async def run():
+    for fair in (False, True):
+        waits = await simulate(fair)
+        label = "fair share" if fair else "shared queue"
+        print(
+            f"{label:<13} light chats: n={len(waits)} "
+            f"p50={percentile(waits, 50) * 1e3:.0f}ms p95={percentile(waits, 95) * 1e3:.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
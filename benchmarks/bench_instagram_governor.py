@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Simulated throughput benchmark for the Instagram rate governor.
+
+No requests reach Instagram: a fake post fetch stands in for
+`instaloader.Post.from_shortcode` and enforces a per-account limit like
+Instagram's (more than `--tolerated` requests per minute gets HTTP 429,
+repeated 429s get "Please wait a few minutes"). Time is compressed so one
+simulated minute takes one second; all rates and pauses are scaled alike.
+
+Compared:
+- legacy:  one global lock and a random 6-10s sleep before every fetch,
+           5 minute pause on "Please wait a few minutes" (the old get_post)
+- governor with 1, 2 and 4 sessions
+
+Reports posts/min, rate-limit responses and failed fetches, with 8
+concurrent callers asking for posts.
+
+Usage: python benchmarks/bench_instagram_governor.py [simulated_minutes] [tolerated_per_minute]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+from collections import defaultdict, deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instaloader.exceptions import ConnectionException, TooManyRequestsException
+
+import utils.instagram_governor as governor_module
+from utils.instagram_governor import InstagramGovernor, InstagramSession
+
+SCALE = 60  # Simulated seconds per real second
+CALLERS = 8
+REQUEST_LATENCY = 0.5 / SCALE  # Half a simulated second per fetch
+WAIT_AFTER_429S = 3  # 429s within a minute before "Please wait a few minutes"
+
+
+class FakeInstagram:
+    """Per-account sliding-window limit, answered the way Instagram does."""
+
+    def __init__(self, tolerated):
+        self.tolerated = tolerated
+        self.requests = defaultdict(deque)
+        self.rejections = defaultdict(deque)
+        self.throttled = 0
+
+    def fetch(self, context, shortcode):
+        time.sleep(REQUEST_LATENCY)
+        now = time.monotonic()
+        window = 60 / SCALE
+        requests, rejections = self.requests[id(context)], self.rejections[id(context)]
+        for timestamps in (requests, rejections):
+            while timestamps and timestamps[0] < now - window:
+                timestamps.popleft()
+
+        requests.append(now)
+        if len(requests) > self.tolerated:
+            self.throttled += 1
+            rejections.append(now)
+            if len(rejections) >= WAIT_AFTER_429S:
+                raise ConnectionException("JSON Query: Please wait a few minutes before you try again.")
+            error = TooManyRequestsException("429 Too Many Requests")
+            raise ConnectionException(f"JSON Query: {error}") from error
+        return shortcode
+
+
+async def legacy_fetch(instagram, lock, context, shortcode):
+    async with lock:
+        await asyncio.sleep(random.uniform(6, 10) / SCALE)
+        try:
+            return await asyncio.to_thread(instagram.fetch, context, shortcode)
+        except ConnectionException as e:
+            if "Please wait a few minutes" not in str(e):
+                raise
+            await asyncio.sleep(300 / SCALE)
+            return await asyncio.to_thread(instagram.fetch, context, shortcode)
+
+
+def scaled_governor(sessions):
+    governor_module.INSTAGRAM_429_COOLDOWN = 60 / SCALE
+    governor_module.INSTAGRAM_WAIT_COOLDOWN = 300 / SCALE
+    pool = [InstagramSession(f"account {index}") for index in range(1, sessions + 1)]
+    for session in pool:
+        bucket = session.bucket
+        bucket.base_rate = bucket.rate = bucket.base_rate * SCALE
+        bucket.min_rate *= SCALE
+    return InstagramGovernor(pool)
+
+
+async def measure(name, fetch, instagram, minutes):
+    done, failed = 0, 0
+    deadline = time.monotonic() + minutes * 60 / SCALE
+
+    async def caller(index):
+        nonlocal done, failed
+        while time.monotonic() < deadline:
+            try:
+                await fetch(f"post{index}")
+                done += 1
+            except Exception:
+                failed += 1
+
+    tasks = [asyncio.create_task(caller(index)) for index in range(CALLERS)]
+    await asyncio.sleep(minutes * 60 / SCALE)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    print(f"{name:<12} {done / minutes:6.1f} posts/min  {instagram.throttled:4d} rate-limited  {failed:4d} failed")
+
+
+async def main():
+    minutes = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    tolerated = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f"{minutes} simulated minutes, Instagram tolerating {tolerated} requests/min per account\n")
+
+    instagram = FakeInstagram(tolerated)
+    context, lock = object(), asyncio.Lock()
+    await measure("legacy", lambda code: legacy_fetch(instagram, lock, context, code), instagram, minutes)
+
+    for sessions in (1, 2, 4):
+        instagram = FakeInstagram(tolerated)
+        governor = scaled_governor(sessions)
+        await measure(f"governor x{sessions}", lambda code: governor.run(instagram.fetch, code), instagram, minutes)
+
+    print("\nWith Instagram tolerating 4 requests/min, below the configured rate:")
+    instagram = FakeInstagram(4)
+    governor = scaled_governor(1)
+    await measure("governor x1", lambda code: governor.run(instagram.fetch, code), instagram, minutes)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the durable job queue.
+
+Measures per-operation enqueue and lease+ack latency with thousands of
+jobs already sitting in the queue, both for the raw SQLite queue and for
+the priority scheduler that sits in front of it.
+
+Usage: python benchmarks/bench_job_queue.py [num_jobs]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.job_queue import PersistentJobQueue
+from utils.jobs import Job, VIDEO, AUDIO, IMAGE
+from utils.scheduler import JobScheduler
+
+
+def summarize(name, samples):
+    samples = sorted(samples)
+    p50 = samples[len(samples) // 2]
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(
+        f"{name:<14} n={len(samples):<6} mean={statistics.mean(samples) * 1e3:.3f}ms "
+        f"p50={p50 * 1e3:.3f}ms p99={p99 * 1e3:.3f}ms max={samples[-1] * 1e3:.3f}ms"
+    )
+
+
+async def run(num_jobs):
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = PersistentJobQueue(os.path.join(tmp, "jobs.db"))
+        payload = {
+            "kind": "download",
+            "chat_id": 123456789,
+            "url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+            "is_audio": False,
+            "is_video_trim": False,
+            "is_audio_trim": False,
+            "start_time": None,
+            "end_time": None,
+        }
+
+        put_times = []
+        for _ in range(num_jobs):
+            started = time.perf_counter()
+            await queue.put(payload)
+            put_times.append(time.perf_counter() - started)
+
+        get_times = []
+        ack_times = []
+        for _ in range(num_jobs):
+            started = time.perf_counter()
+            job_id, _ = await queue.get()
+            get_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            queue.ack(job_id)
+            ack_times.append(time.perf_counter() - started)
+
+        queue.close()
+
+    print(f"Durable job queue, {num_jobs} jobs")
+    summarize("enqueue", put_times)
+    summarize("lease", get_times)
+    summarize("ack", ack_times)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PersistentJobQueue(os.path.join(tmp, "jobs.db"))
+        scheduler = JobScheduler(store)
+        kinds = (VIDEO, AUDIO, IMAGE)
+
+        submit_times = []
+        for i in range(num_jobs):
+            job = Job(kinds[i % len(kinds)], 123456789, payload["url"])
+            started = time.perf_counter()
+            await scheduler.submit(job)
+            submit_times.append(time.perf_counter() - started)
+
+        next_times = []
+        for _ in range(num_jobs):
+            started = time.perf_counter()
+            job = await scheduler.get()
+            scheduler.done(job)
+            next_times.append(time.perf_counter() - started)
+
+        store.close()
+
+    print(f"Priority scheduler, {num_jobs} jobs")
+    summarize("submit", submit_times)
+    summarize("get+done", next_times)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the codec-aware postprocessing in `prepare_for_telegram`.
+
+Generates synthetic 720p30 downloads in the shapes the handlers receive
+and postprocesses each one two ways:
+
+- legacy: yt-dlp's FFmpegVideoConvertor to mp4, which leaves any .mp4 as
+  is (whatever its codecs or index position) and fully re-encodes
+  everything else with ffmpeg's defaults
+- new:    `prepare_for_telegram`, which keeps, remuxes, transcodes only
+  the audio or transcodes in full depending on the probed codecs
+
+Reports wall time, the CPU seconds of the ffmpeg children and the action
+taken. Needs ffmpeg and ffprobe on PATH.
+
+Usage: python benchmarks/bench_postprocess.py [clip_seconds]
+"""
+import os
+import sys
+import time
+import shutil
+import asyncio
+import resource
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.postprocess import prepare_for_telegram, probe_streams
+from utils.smart_trim import _run
+
+# (name, file extension, codec arguments, extra muxer arguments)
+SOURCES = (
+    ("h264/aac mp4 (faststart)", "mp4", ["-c:v", "libx264", "-c:a", "aac"], ["-movflags", "+faststart"]),
+    ("h264/aac mp4 (merged)", "mp4", ["-c:v", "libx264", "-c:a", "aac"], []),
+    ("h264/opus mkv", "mkv", ["-c:v", "libx264", "-c:a", "libopus"], []),
+    ("vp9/opus webm", "webm", ["-c:v", "libvpx-vp9", "-deadline", "realtime", "-cpu-used", "8", "-c:a", "libopus"], []),
+)
+
+
+async def make_source(path, codec_args, mux_args, seconds):
+    returncode, _, stderr = await _run([
+        "ffmpeg", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size=1280x720:rate=30:duration={seconds}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+        *codec_args, "-pix_fmt", "yuv420p", *mux_args, "-shortest", "-y", path,
+    ])
+    if returncode != 0:
+        raise RuntimeError(stderr)
+
+
+async def legacy_convert(path):
+    """What FFmpegVideoConvertor(preferedformat="mp4") did."""
+    if path.endswith(".mp4"):
+        return path, "skipped"
+    output = os.path.splitext(path)[0] + ".legacy.mp4"
+    returncode, _, stderr = await _run(["ffmpeg", "-v", "error", "-i", path, "-y", output])
+    if returncode != 0:
+        raise RuntimeError(stderr)
+    return output, "re-encode"
+
+
+def children_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def measure(process, path):
+    cpu_before = children_cpu()
+    started = time.perf_counter()
+    output, action = await process(path)
+    elapsed = time.perf_counter() - started
+    _, _, video, audio = await probe_streams(output)
+    codecs = f"{video['codec_name']}/{audio['codec_name'] if audio else '-'}"
+    return elapsed, children_cpu() - cpu_before, action, codecs
+
+
+async def main():
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, extension, codec_args, mux_args in SOURCES:
+            source = os.path.join(tmp, f"source.{extension}")
+            await make_source(source, codec_args, mux_args, seconds)
+            print(f"{name} ({seconds}s 720p30)")
+
+            for label, process in (("legacy", legacy_convert), ("new", prepare_for_telegram)):
+                work = os.path.join(tmp, f"{label}.{extension}")
+                shutil.copy(source, work)
+                elapsed, cpu, action, codecs = await measure(process, work)
+                print(f"  {label:<7} wall={elapsed:6.2f}s  cpu={cpu:6.2f}s  {action or 'none':<10} -> {codecs}")
+                for leftover in os.listdir(tmp):
+                    if leftover.startswith(label):
+                        os.remove(os.path.join(tmp, leftover))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the keyframe-aware smart trim.
+
+Generates a synthetic H.264/AAC source and cuts the same range out of it
+with the previous full re-encode (`trim_video`'s ffmpeg command) and with
+`smart_trim`, reporting wall time and how close each output is to the
+requested duration. Needs ffmpeg and ffprobe on PATH.
+
+Usage: python benchmarks/bench_smart_trim.py [source_seconds] [start] [end]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.smart_trim import smart_trim, probe_duration, _run
+
+
+async def make_source(path, seconds):
+    returncode, _, stderr = await _run([
+        "ffmpeg", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size=1280x720:rate=30:duration={seconds}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-g", "150",  # 5s GOPs
+        "-c:a", "aac", "-shortest", "-y", path,
+    ])
+    if returncode != 0:
+        raise RuntimeError(stderr)
+
+
+async def legacy_trim(input_path, output_path, start, end):
+    """The command trim_video used before smart trimming."""
+    returncode, _, stderr = await _run([
+        "ffmpeg", "-v", "error", "-i", input_path,
+        "-ss", str(start), "-to", str(end),
+        "-c:v", "libx264", "-c:a", "aac", "-preset", "fast",
+        "-y", output_path,
+    ])
+    if returncode != 0:
+        raise RuntimeError(stderr)
+    return output_path
+
+
+async def measure(name, trim, source, output, start, end):
+    started = time.perf_counter()
+    result = await trim(source, output, start, end)
+    elapsed = time.perf_counter() - started
+    duration = await probe_duration(result) if result else None
+    error = f"{abs(duration - (end - start)):.3f}s" if duration else "n/a"
+    print(f"{name:<8} wall={elapsed:6.2f}s  duration={duration}  error={error}")
+    return elapsed
+
+
+async def main():
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    start = float(sys.argv[2]) if len(sys.argv) > 2 else 121.3
+    end = float(sys.argv[3]) if len(sys.argv) > 3 else 211.7
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.mp4")
+        print(f"Generating {seconds}s 720p30 source...")
+        await make_source(source, seconds)
+        print(f"Cutting {start}s -> {end}s ({end - start:.1f}s)\n")
+
+        legacy = await measure("legacy", legacy_trim, source, os.path.join(tmp, "legacy.mp4"), start, end)
+        smart = await measure("smart", smart_trim, source, os.path.join(tmp, "smart.mp4"), start, end)
+        print(f"\nSmart trim {legacy / smart:.1f}x faster")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
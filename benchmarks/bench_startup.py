@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark for bot startup: import time and time to first update processed.
+
+Import time is measured in fresh interpreters for `import bot` alone and
+for `import bot` plus every module in its handler registry (what the bot
+imported eagerly before handlers were loaded lazily).
+
+For time to first update, a fake Telegram Bot API is served locally and
+the bot is started in a child process pointed at it. The fake API hands
+out a single /start update; the clock runs from spawning the child to the
+bot's sendMessage reply, so interpreter start, imports, job queue restore
+and the toolchain probe are all included. Three modes are run:
+
+- eager:   handler modules imported before the bot starts (old behaviour)
+- lazy:    handlers imported on first use, no pre-warm
+- prewarm: handlers imported on first use and pre-warmed in the background
+
+Runs in a temporary directory so the real job queue and caches are left
+alone. Needs pyTelegramBotAPI and aiohttp.
+
+Usage: python benchmarks/bench_startup.py [runs]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import statistics
+
+from aiohttp import web
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_CHILD = """
+import sys, time, importlib
+sys.path.insert(0, {repo!r})
+started = time.perf_counter()
+import bot
+if {eager}:
+    for module_name, _ in bot.handlers._targets.values():
+        importlib.import_module(module_name)
+print(time.perf_counter() - started)
+"""
+
+BOT_CHILD = """
+import os, sys, asyncio, importlib
+sys.path.insert(0, {repo!r})
+import telebot.asyncio_helper
+telebot.asyncio_helper.API_URL = {api_url!r}
+import bot
+if {eager}:
+    for module_name, _ in bot.handlers._targets.values():
+        importlib.import_module(module_name)
+asyncio.run(bot.main())
+"""
+
+MODES = (
+    ("eager", True, "0"),
+    ("lazy", False, "0"),
+    ("prewarm", False, "1"),
+)
+
+
+class FakeBotApi:
+    """Answers the Bot API calls the bot makes, with one /start update."""
+
+    def __init__(self):
+        self.replied = None
+        self.delivered = False
+
+    async def handle(self, request):
+        method = request.match_info["method"]
+        if method == "getMe":
+            return self.ok({"id": 1, "is_bot": True, "first_name": "bench", "username": "bench_bot"})
+        if method == "getUpdates":
+            if self.delivered:
+                await asyncio.sleep(1)
+                return self.ok([])
+            self.delivered = True
+            return self.ok([{
+                "update_id": 1,
+                "message": {
+                    "message_id": 1, "date": int(time.time()), "text": "/start",
+                    "chat": {"id": 42, "type": "private"},
+                    "from": {"id": 42, "is_bot": False, "first_name": "bench"},
+                    "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+                },
+            }])
+        if method == "sendMessage":
+            self.replied.set_result(time.perf_counter())
+            return self.ok({
+                "message_id": 2, "date": int(time.time()), "text": "ok",
+                "chat": {"id": 42, "type": "private"},
+            })
+        return self.ok(True)
+
+    @staticmethod
+    def ok(result):
+        return web.json_response({"ok": True, "result": result})
+
+
+async def import_time(eager, cwd):
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", IMPORT_CHILD.format(repo=REPO, eager=eager),
+        cwd=cwd, env={**os.environ, "BOT_TOKEN": os.getenv("BOT_TOKEN", "1:bench")},
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+    )
+    stdout, _ = await process.communicate()
+    return float(stdout.decode().strip().splitlines()[-1])
+
+
+async def first_update_time(api, api_url, eager, prewarm, cwd):
+    api.replied = asyncio.get_running_loop().create_future()
+    api.delivered = False
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", BOT_CHILD.format(repo=REPO, api_url=api_url, eager=eager),
+        cwd=cwd,
+        env={**os.environ, "BOT_TOKEN": os.getenv("BOT_TOKEN", "1:bench"), "HANDLER_PREWARM": prewarm},
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        replied = await asyncio.wait_for(api.replied, timeout=60)
+        return replied - started
+    finally:
+        process.kill()
+        await process.wait()
+
+
+async def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    api = FakeBotApi()
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", api.handle)
+    app.router.add_get("/bot{token}/{method}", api.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    api_url = f"http://127.0.0.1:{port}/bot{{0}}/{{1}}"
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"Median of {runs} runs\n")
+            for name, eager in (("bot only", False), ("bot + handlers", True)):
+                times = [await import_time(eager, tmp) for _ in range(runs)]
+                print(f"import {name:<15} {statistics.median(times):6.3f}s")
+            print()
+
+            for name, eager, prewarm in MODES:
+                times = [await first_update_time(api, api_url, eager, prewarm, tmp) for _ in range(runs)]
+                print(f"first update {name:<9} {statistics.median(times):6.3f}s")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
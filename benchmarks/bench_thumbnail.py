@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the ffmpeg thumbnail engine.
+
+Generates a synthetic 1080p clip that starts black and ends white, and
+makes a thumbnail for it with the previous moviepy path (decode a frame at
+5s, LANCZOS resize to 3840x2160, JPEG quality 95) and with
+`generate_thumbnail`, reporting wall time, output size and dimensions,
+and whether the chosen frame is blank. A second call shows the cached
+path. Needs ffmpeg and ffprobe on PATH, and moviepy for the legacy path.
+
+Usage: python benchmarks/bench_thumbnail.py [segment_seconds]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.thumb_generator import generate_thumbnail
+from utils.smart_trim import _run
+
+
+async def make_clip(path, seconds):
+    returncode, _, stderr = await _run([
+        "ffmpeg", "-v", "error",
+        "-f", "lavfi", "-i", f"color=black:size=1920x1080:duration={seconds}",
+        "-f", "lavfi", "-i", f"testsrc2=size=1920x1080:duration={seconds * 2}",
+        "-f", "lavfi", "-i", f"color=white:size=1920x1080:duration={seconds}",
+        "-filter_complex", "[0][1][2]concat=n=3:v=1[v]", "-map", "[v]",
+        "-c:v", "libx264", "-preset", "ultrafast", "-g", "60", "-y", path,
+    ])
+    if returncode != 0:
+        raise RuntimeError(stderr)
+
+
+def legacy_thumbnail(video_path, thumb_path):
+    """The moviepy path generate_thumbnail used before."""
+    from moviepy import VideoFileClip
+
+    with VideoFileClip(video_path) as clip:
+        frame = clip.get_frame(min(5, clip.duration - 0.1))
+    Image.fromarray(frame).resize((3840, 2160), Image.LANCZOS).save(thumb_path, "JPEG", quality=95)
+    return thumb_path
+
+
+def describe(name, path, elapsed):
+    with Image.open(path) as image:
+        brightness = np.asarray(image.convert("L")).mean()
+        size = image.size
+    blank = " (blank frame)" if brightness < 16 or brightness > 240 else ""
+    print(f"{name:<7} wall={elapsed:6.3f}s  {size[0]}x{size[1]}  {os.path.getsize(path) / 1024:8.0f} kB{blank}")
+
+
+async def main():
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = os.path.join(tmp, "clip.mp4")
+        print(f"Generating {seconds * 4}s 1080p clip (black, test pattern, white)...\n")
+        await make_clip(clip, seconds)
+
+        started = time.perf_counter()
+        legacy = await asyncio.to_thread(legacy_thumbnail, clip, os.path.join(tmp, "legacy.jpg"))
+        describe("legacy", legacy, time.perf_counter() - started)
+
+        media_id = ("bench", str(time.time()))
+        started = time.perf_counter()
+        thumbnail = await generate_thumbnail(clip, media_id=media_id)
+        describe("ffmpeg", thumbnail, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await generate_thumbnail(clip, media_id=media_id)
+        describe("cached", thumbnail, time.perf_counter() - started)
+        os.remove(thumbnail)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
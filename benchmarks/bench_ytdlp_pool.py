@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark for per-request yt-dlp setup overhead.
+
+Compares building a fresh YoutubeDL for every request (parse the cookie
+file, instantiate extractors/postprocessors, open the HTTP stack, save the
+cookies on close) with checking an instance out of the pool. Nothing is
+downloaded; only the setup a real request pays before its first byte is
+measured.
+
+Usage: python benchmarks/bench_ytdlp_pool.py [requests] [cookies]
+"""
+import os
+import sys
+import time
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yt_dlp
+
+from utils.ytdlp_pool import YoutubeDLPool
+
+
+def write_cookie_file(path, count):
+    """Writes a Netscape cookie file roughly the size of the bot's real ones."""
+    expires = int(time.time()) + 365 * 24 * 3600
+    with open(path, "w") as f:
+        f.write("# Netscape HTTP Cookie File\n")
+        for i in range(count):
+            f.write(f".youtube.com\tTRUE\t/\tTRUE\t{expires}\tCOOKIE_{i}\t{'x' * 120}\n")
+
+
+def make_opts(cookie_file):
+    return {
+        "format": "bv+ba/b",
+        "outtmpl": "%(title)s.%(ext)s",
+        "cookiefile": cookie_file,
+        "quiet": True,
+        "no_warnings": True,
+        "postprocessors": [{"key": "FFmpegVideoConvertor", "preferedformat": "mp4"}],
+    }
+
+
+def touch_request_stack(ydl):
+    """What the first request of a job forces yt-dlp to set up."""
+    ydl.cookiejar
+    ydl._request_director
+    ydl.get_info_extractor("Youtube")
+
+
+def bench_fresh(opts, requests):
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            touch_request_stack(ydl)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_pooled(opts, requests):
+    pool = YoutubeDLPool(max_idle=4)
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        with pool.checkout(opts) as ydl:
+            touch_request_stack(ydl)
+        samples.append(time.perf_counter() - started)
+    pool.close()
+    return samples
+
+
+def summarize(name, samples):
+    samples = sorted(samples)
+    print(
+        f"{name:<8} n={len(samples):<5} mean={statistics.mean(samples) * 1e3:.3f}ms "
+        f"p50={samples[len(samples) // 2] * 1e3:.3f}ms max={samples[-1] * 1e3:.3f}ms"
+    )
+    return statistics.mean(samples)
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    cookies = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cookie_file = os.path.join(tmp, "cookies.txt")
+        write_cookie_file(cookie_file, cookies)
+        print(f"Cookie file: {os.path.getsize(cookie_file) / 1024:.1f} KB, {requests} requests\n")
+        opts = make_opts(cookie_file)
+
+        fresh = summarize("fresh", bench_fresh(opts, requests))
+        pooled = summarize("pooled", bench_pooled(opts, requests))
+        print(f"\nSetup overhead reduced {fresh / pooled:.1f}x per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,22 @@ import os
 import gc
 import logging
 import asyncio
-import aiofiles
 import re
 import sys
 import time
-import psutil
 import signal
 from datetime import datetime, timezone
-from mega import Mega
 from telebot.async_telebot import AsyncTeleBot
+from telebot.apihelper import ApiTelegramException
 from asyncio import Semaphore
 from config import DOWNLOAD_DIR, INSTAGRAM_PASSWORD, INSTAGRAM_USERNAME
+from config import JOB_QUEUE_DB, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_PRIORITY_STEP
+from config import MAX_QUEUED_PER_CHAT, MAX_INFLIGHT_PER_CHAT, CHAT_WEIGHTS
+from config import FILE_ID_CACHE_DB, FILE_ID_TTL
+from config import ADMISSION_DISK_HEADROOM, ADMISSION_MEMORY_HEADROOM, ADMISSION_TIMEOUT
+from config import MAX_TRIM_RANGES
+from config import HANDLER_PREWARM, HANDLER_PREWARM_DELAY
+from config import INSTAGRAM_BULK_MAX_POSTS
 
 # Import local modules
 from config import (
@@ -23,18 +28,23 @@ from config import (
     DEFAULT_ADMIN,
     ADMIN_IDS
 )
-from handlers.youtube_handler import process_youtube, extract_audio_ffmpeg
-from handlers.instagram_handler import process_instagram
-from handlers.facebook_handlers import process_facebook
-from handlers.common_handler import process_adult
-from handlers.x_handler import download_twitter_media
-from handlers.trim_handlers import process_video_trim, process_audio_trim
-from handlers.image_handlers import process_instagram_image
 from utils.logger import setup_logging
-from utils.instagram_cookies import auto_refresh_cookies
+from utils.handler_registry import HandlerRegistry
+from utils.job_queue import PersistentJobQueue
+from utils.jobs import Job, VIDEO, AUDIO, VIDEO_TRIM, AUDIO_TRIM, IMAGE, BULK_IMAGE
+from utils.scheduler import JobScheduler, QuotaExceeded
+from utils.singleflight import SingleFlight
+from utils.media_id import canonical_media_id
+from utils.file_id_cache import FileIdCache
+from utils.uploader import upload_file, send_album
+from utils.media_probe import probe_media
+from utils.admission import AdmissionController, AdmissionRejected, estimate_requirements
+from utils.storage import storage, MANAGED_DIRS
+from utils.toolchain import get_toolchain
+from utils.source_cache import source_cache, source_key, VIDEO_SOURCE
+from utils.postprocess import prepare_for_telegram
 
 # Constants for memory management
-MAX_MEMORY_USAGE = 500 * 1024 * 1024  # 500MB
 MAX_CONCURRENT_DOWNLOADS = 2
 MAX_FILE_SIZE = 1024 * 1024 * 500  # 500MB
 CLEANUP_INTERVAL = 300  # 5 minutes
@@ -44,7 +54,13 @@ logger = setup_logging(logging.DEBUG)
 
 # Async Telegram bot setup
 bot = AsyncTeleBot(API_TOKEN, parse_mode="HTML")
-download_queue = asyncio.Queue()
+download_queue = JobScheduler(
+    PersistentJobQueue(JOB_QUEUE_DB, lease_seconds=JOB_LEASE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS),
+    priority_step=JOB_PRIORITY_STEP,
+    weights=CHAT_WEIGHTS,
+    max_queued_per_chat=MAX_QUEUED_PER_CHAT,
+    max_inflight_per_chat=MAX_INFLIGHT_PER_CHAT,
+)
 download_semaphore = Semaphore(MAX_CONCURRENT_DOWNLOADS)
 
 # MEGA client setup
@@ -53,6 +69,17 @@ mega = None
 # Active downloads tracking
 active_downloads = set()
 cleanup_tasks = set()
+inflight_downloads = SingleFlight()
+
+# Disk/memory reservations for running jobs
+admission = AdmissionController(
+    DOWNLOAD_DIR,
+    disk_headroom=ADMISSION_DISK_HEADROOM,
+    memory_headroom=ADMISSION_MEMORY_HEADROOM,
+)
+
+# Telegram file_ids of media we already uploaded
+file_id_cache = FileIdCache(FILE_ID_CACHE_DB, ttl=FILE_ID_TTL)
 
 # Regex patterns for different platforms
 PLATFORM_PATTERNS = {
@@ -63,46 +90,49 @@ PLATFORM_PATTERNS = {
     "Adult": re.compile(r"(pornhub\.com|xvideos\.com|redtube\.com|xhamster\.com|xnxx\.com)"),
 }
 
-# Platform handlers
-PLATFORM_HANDLERS = {
-    "YouTube": process_youtube,
-    "Instagram": process_instagram,
-    "Facebook": process_facebook,
-    "Twitter/X": download_twitter_media,
-    "Adult": process_adult,
-}
+# Trim command arguments: "<URL> HH:MM:SS-HH:MM:SS ..." or "<URL> HH:MM:SS HH:MM:SS"
+TRIM_URL = re.compile(r"https?://[^\s]+")
+TRIM_RANGE = re.compile(r"(\d{1,2}:\d{2}:\d{2})\s*-\s*(\d{1,2}:\d{2}:\d{2})")
+TRIM_START_END = re.compile(r"^\s+(\d{1,2}:\d{2}:\d{2})\s+(\d{1,2}:\d{2}:\d{2})")
+
+# Instagram post URLs in a /bulk command or an uploaded .txt file
+INSTAGRAM_POST_URL = re.compile(r"https?://(?:www\.)?instagram\.com/p/[\w-]+/?")
+BULK_FILE_MAX_SIZE = 1024 * 1024  # Larger .txt uploads are refused
+BULK_STATUS_INTERVAL = 10  # Seconds between progress updates of a bulk job
+
+# Platforms whose handler returns the download untouched, so it can be kept
+# as a source for trims and audio; the others return remuxed or re-encoded files
+NATIVE_SOURCE_PLATFORMS = {"YouTube"}
+
+# Handlers, imported the first time they are needed
+handlers = HandlerRegistry({
+    "YouTube": "handlers.youtube_handler:process_youtube",
+    "Instagram": "handlers.instagram_handler:process_instagram",
+    "Facebook": "handlers.facebook_handlers:process_facebook",
+    "Twitter/X": "handlers.x_handler:download_twitter_media",
+    "Adult": "handlers.common_handler:process_adult",
+    "audio": "handlers.youtube_handler:extract_audio_ffmpeg",
+    "video_trim": "handlers.trim_handlers:process_video_trim",
+    "audio_trim": "handlers.trim_handlers:process_audio_trim",
+    "trim_ranges": "handlers.trim_handlers:trim_ranges",
+    "instagram_image": "handlers.image_handlers:process_instagram_image",
+    "bulk_instagram_images": "handlers.image_handlers:process_bulk_instagram_images",
+})
 
 def get_current_utc():
     """Returns current UTC time in YYYY-MM-DD HH:MM:SS format."""
     return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
 
-async def main():
-    # Start background tasks inside the running loop
-    asyncio.create_task(auto_refresh_cookies())
-    asyncio.create_task(cleanup_files())
-
-
-
-async def check_memory_usage():
-    """Checks current memory usage and returns True if it's safe to proceed."""
-    process = psutil.Process(os.getpid())
-    memory_usage = process.memory_info().rss
-    return memory_usage < MAX_MEMORY_USAGE
-
 async def cleanup_files():
-    """Periodically cleans up temporary files and performs garbage collection."""
+    """Periodically expires unused files and performs garbage collection."""
     while True:
         try:
-            # Clean up temp directory
-            temp_dir = "downloads"  # Adjust to your temp directory
-            if os.path.exists(temp_dir):
-                for filename in os.listdir(temp_dir):
-                    filepath = os.path.join(temp_dir, filename)
-                    try:
-                        if os.path.isfile(filepath) and time.time() - os.path.getctime(filepath) > 3600:
-                            os.remove(filepath)
-                    except Exception as e:
-                        logger.error(f"[{get_current_utc()}] Error cleaning up file {filepath}: {e}")
+            # Expire stale artifacts from the storage index, plus untracked
+            # leftovers in the managed directories; space pressure is handled
+            # as soon as files are tracked, not here
+            expired = storage.expire(MANAGED_DIRS)
+            if expired:
+                logger.info(f"[{get_current_utc()}] Expired {expired} stale file(s)")
 
             # Force garbage collection
             gc.collect()
@@ -130,6 +160,8 @@ async def get_mega_client():
     global mega
     if mega is None:
         try:
+            # Imported here: mega.py is only needed for oversized files
+            from mega import Mega
             m = Mega()
             logger.info(f"[{get_current_utc()}] Attempting MEGA login with email: {MEGA_EMAIL}")
             mega = await asyncio.to_thread(m.login, MEGA_EMAIL, MEGA_PASSWORD)
@@ -141,10 +173,6 @@ async def get_mega_client():
 
 async def upload_to_mega(file_path, filename):
     try:
-        if not await check_memory_usage():
-            logger.error(f"[{get_current_utc()}] Insufficient memory for MEGA upload")
-            return None
-
         mega = await get_mega_client()
         if not mega:
             return None
@@ -167,100 +195,237 @@ async def upload_to_mega(file_path, filename):
         logger.error(f"[{get_current_utc()}] Unexpected error in upload_to_mega: {e}")
         return None
 
-async def process_download(message, url, is_audio=False, is_video_trim=False, is_audio_trim=False, start_time=None, end_time=None):
+# Human-readable labels for status messages
+REQUEST_TYPES = {
+    VIDEO: "Video Download",
+    AUDIO: "Audio Download",
+    VIDEO_TRIM: "Video Trimming",
+    AUDIO_TRIM: "Audio Trimming",
+}
+
+def download_key(job):
+    """Identity of the work a job needs: the canonical media plus the requested variant."""
+    extractor, media_id = canonical_media_id(job.url)
+    return extractor, media_id, job.kind, job.start_time, job.end_time
+
+def file_id_key(extractor, media_id, kind, start_time=None, end_time=None):
+    """Key of a media variant in the file_id cache."""
+    variant = f"{kind}:{start_time}-{end_time}" if start_time or end_time else kind
+    return extractor, media_id, variant
+
+def sent_file(message):
+    """Returns (media_type, file_id) of the file in a sent message, or None."""
+    if message.photo:
+        return "photo", message.photo[-1].file_id
+    for media_type in ("video", "audio", "document", "animation", "voice"):
+        media = getattr(message, media_type, None)
+        if media:
+            return media_type, media.file_id
+    return None
+
+async def send_cached_files(chat_id, key):
+    """Re-sends previously uploaded media by file_id. Returns True on a cache hit."""
+    files = file_id_cache.get(*key)
+    if not files:
+        return False
+
+    try:
+        # The cache stores (media_type, file_id); send_album takes (file_id, media_type)
+        await send_album(bot, chat_id, [(file_id, media_type) for media_type, file_id in files], from_disk=False)
+    except Exception as e:
+        # Stale file_id or any other replay failure: forget the entry and
+        # fall back to a fresh download
+        reason = e.description if isinstance(e, ApiTelegramException) else e
+        logger.warning(f"[{get_current_utc()}] Re-sending {key} by file_id failed: {reason}")
+        file_id_cache.invalidate(*key)
+        return False
+
+    logger.info(f"[{get_current_utc()}] Served {key} to chat {chat_id} from the file_id cache")
+    return True
+
+async def deliver_file(chat_id, file_path, is_audio, file_size=None):
+    """
+    Sends a file to the chat, through MEGA when it's over the Telegram limit.
+
+    Returns the (media_type, file_id) of the uploaded file, or None if it
+    can't be re-sent by file_id (offloaded to MEGA or failed).
+    """
+    file_size = file_size or os.path.getsize(file_path)
+
+    if file_size > TELEGRAM_FILE_LIMIT:
+        mega_link = await upload_to_mega(file_path, os.path.basename(file_path))
+        if mega_link:
+            await send_message(
+                chat_id,
+                f"✅ File uploaded successfully!\n\n📥 Download from MEGA:\n{mega_link}"
+            )
+        else:
+            await send_message(
+                chat_id,
+                "❌ Upload failed. Please try again later."
+            )
+        return None
+
+    if is_audio:
+        sent = await upload_file(bot, chat_id, file_path, "audio")
+    else:
+        sent = await upload_file(bot, chat_id, file_path, "video", supports_streaming=True)
+    return sent_file(sent) if sent else None
+
+async def serve_cached_source(job):
+    """
+    Prepares a full video downloaded earlier (e.g. for a trim) for sending.
+
+    Cached sources are the native download, so they get the same
+    postprocessing a fresh download would, written to a copy so the source
+    stays intact. Sources over the Telegram limit are left to a fresh
+    download, whose handler may compress them.
+
+    Returns:
+        tuple: (file_paths, file_size), or None if nothing usable is cached
+    """
+    cached_path = source_cache.lookup(source_key(job.url, VIDEO_SOURCE))
+    if not cached_path or os.path.getsize(cached_path) > TELEGRAM_FILE_LIMIT:
+        return None
+
+    base_name = os.path.splitext(os.path.basename(cached_path))[0]
+    with storage.pinned(cached_path):
+        file_path, action = await prepare_for_telegram(
+            cached_path, os.path.join(DOWNLOAD_DIR, f"{base_name}.mp4")
+        )
+    logger.info(
+        f"[{get_current_utc()}] Job {job.job_id} served from cached source {cached_path} "
+        f"({action or 'as is'})"
+    )
+
+    storage.pin(file_path)
+    if not source_cache.owns(file_path):
+        storage.track(file_path)
+    return [file_path], os.path.getsize(file_path)
+
+async def run_download(job, platform):
+    """Downloads and processes the media for a job. Returns (file_paths, file_size)."""
+    url, start_time, end_time = job.url, job.start_time, job.end_time
+
+    if job.kind == VIDEO:
+        cached = await serve_cached_source(job)
+        if cached:
+            return cached
+
+    # Reserve disk and memory from the probed size before starting;
+    # the job waits here until the reservation fits
+    probe = await probe_media(url)
+    disk, memory = estimate_requirements(job.kind, probe)
+    logger.info(
+        f"[{get_current_utc()}] Job {job.job_id} reserving {disk // (1024 ** 2)} MB disk, "
+        f"{memory // (1024 ** 2)} MB memory"
+    )
+
+    async with download_semaphore, admission.reserve(disk, memory, timeout=ADMISSION_TIMEOUT):
+        if job.kind == VIDEO_TRIM:
+            file_path, file_size = await handlers.call("video_trim", url, start_time, end_time)
+            file_paths = [file_path] if file_path else []
+        elif job.kind == AUDIO_TRIM:
+            file_path, file_size = await handlers.call("audio_trim", url, start_time, end_time)
+            file_paths = [file_path] if file_path else []
+        elif job.kind == AUDIO:
+            result = await handlers.call("audio", url)
+            file_paths = [result[0]] if isinstance(result, tuple) else [result]
+            file_size = result[1] if isinstance(result, tuple) and len(result) > 1 else None
+        else:
+            result = await handlers.call(platform, url)
+            if isinstance(result, tuple):
+                file_paths = result[0] if isinstance(result[0], list) else [result[0]]
+                file_size = result[1] if len(result) > 1 else None
+            else:
+                file_paths = [result] if result else []
+                file_size = None
+
+    # Untouched full downloads become sources for later trims and audio
+    # extractions; converted files (e.g. /audio's MP3) would be encoded twice
+    source = source_key(url, VIDEO_SOURCE)
+    if (job.kind == VIDEO and platform in NATIVE_SOURCE_PLATFORMS
+            and len(file_paths) == 1 and not source_cache.lookup(source)):
+        file_paths = [source_cache.add(source, file_paths[0])]  # Returned pinned and tracked
+
+    # Keep the results on disk until every waiting chat has been served
+    for file_path in file_paths:
+        if file_path and not source_cache.owns(file_path):
+            storage.pin(file_path)
+            storage.track(file_path)
+
+    return file_paths, file_size
+
+async def cleanup_download(result):
+    """Removes downloaded files once every chat waiting on them has been served."""
+    file_paths, _ = result
+    for file_path in file_paths:
+        if file_path:
+            storage.unpin(file_path)
+            # Cached sources stay until the storage manager evicts them
+            if not source_cache.owns(file_path):
+                storage.discard(file_path)
+
+async def process_download(job):
     """Handles video/audio download and sends it to Telegram or MEGA."""
-    download_id = f"{message.chat.id}_{int(time.time())}"
+    chat_id, url = job.chat_id, job.url
+    download_id = f"{chat_id}_{int(time.time())}"
 
     try:
-        # Check memory usage before proceeding
-        if not await check_memory_usage():
-            await send_message(message.chat.id, "⚠️ Server is currently under high load. Please try again later.")
+        # Media we uploaded before is re-sent by file_id, without downloading anything
+        key = download_key(job)
+        cache_key = file_id_key(*key)
+        if await send_cached_files(chat_id, cache_key):
             return
 
         # Add to active downloads
         active_downloads.add(download_id)
 
-        async with download_semaphore:
-            request_type = "Video Download"
-            if is_audio:
-                request_type = "Audio Download"
-            elif is_video_trim:
-                request_type = "Video Trimming"
-            elif is_audio_trim:
-                request_type = "Audio Trimming"
-
-            await send_message(message.chat.id, f"📥 Processing your {request_type.lower()}...")
-
-            platform = detect_platform(url)
-            if not platform:
-                await send_message(message.chat.id, "⚠️ Unsupported URL.")
-                return
-
-            # Process the download based on type
-            try:
-                if is_video_trim:
-                    file_path, file_size = await process_video_trim(url, start_time, end_time)
-                    file_paths = [file_path] if file_path else []
-                elif is_audio_trim:
-                    file_path, file_size = await process_audio_trim(url, start_time, end_time)
-                    file_paths = [file_path] if file_path else []
-                elif is_audio:
-                    result = await extract_audio_ffmpeg(url)
-                    file_paths = [result[0]] if isinstance(result, tuple) else [result]
-                    file_size = result[1] if isinstance(result, tuple) and len(result) > 1 else None
-                else:
-                    result = await PLATFORM_HANDLERS[platform](url)
-                    if isinstance(result, tuple):
-                        file_paths = result[0] if isinstance(result[0], list) else [result[0]]
-                        file_size = result[1] if len(result) > 1 else None
-                    else:
-                        file_paths = [result] if result else []
-                        file_size = None
+        request_type = REQUEST_TYPES[job.kind]
+        await send_message(chat_id, f"📥 Processing your {request_type.lower()}...")
 
+        platform = detect_platform(url)
+        if not platform:
+            await send_message(chat_id, "⚠️ Unsupported URL.")
+            return
+
+        # Identical requests from other chats share one download
+        if inflight_downloads.is_running(key):
+            logger.info(f"[{get_current_utc()}] Chat {chat_id} attached to in-flight download {key}")
+
+        try:
+            async with inflight_downloads.share(
+                key, lambda: run_download(job, platform), on_release=cleanup_download
+            ) as (file_paths, file_size):
                 if not file_paths:
-                    await send_message(message.chat.id, "❌ Download failed. No media found.")
+                    await send_message(chat_id, "❌ Download failed. No media found.")
                     return
 
+                sent_files = []
                 for file_path in file_paths:
                     if not file_path or not os.path.exists(file_path):
                         continue
 
-                    file_size = file_size or os.path.getsize(file_path)
-
-                    if file_size > TELEGRAM_FILE_LIMIT:
-                        mega_link = await upload_to_mega(file_path, os.path.basename(file_path))
-                        if mega_link:
-                            await send_message(
-                                message.chat.id,
-                                f"✅ File uploaded successfully!\n\n📥 Download from MEGA:\n{mega_link}"
-                            )
-                        else:
-                            await send_message(
-                                message.chat.id,
-                                "❌ Upload failed. Please try again later."
-                            )
-                    else:
-                        async with aiofiles.open(file_path, 'rb') as file:
-                            content = await file.read()
-                            if is_audio or is_audio_trim:
-                                await bot.send_audio(message.chat.id, content)
-                            else:
-                                await bot.send_video(message.chat.id, content, supports_streaming=True)
-
-                    # Cleanup
-                    try:
-                        if os.path.exists(file_path):
-                            os.remove(file_path)
-                    except Exception as cleanup_error:
-                        logger.error(f"[{get_current_utc()}] Cleanup error: {cleanup_error}")
-
-            except Exception as process_error:
-                logger.error(f"[{get_current_utc()}] Processing error: {process_error}")
-                await send_message(message.chat.id, f"❌ An error occurred: {str(process_error)}")
+                    sent = await deliver_file(chat_id, file_path, job.is_audio, file_size)
+                    if sent is None:
+                        sent_files = None  # Offloaded media can't be re-sent by file_id
+                    elif sent_files is not None:
+                        sent_files.append(sent)
+
+                if sent_files:
+                    file_id_cache.put(*cache_key, sent_files)
+
+        except AdmissionRejected as rejected:
+            logger.warning(f"[{get_current_utc()}] Job {job.job_id} rejected: {rejected}")
+            await send_message(chat_id, "⚠️ Server is currently under high load. Please try again later.")
+
+        except Exception as process_error:
+            logger.error(f"[{get_current_utc()}] Processing error: {process_error}")
+            await send_message(chat_id, f"❌ An error occurred: {str(process_error)}")
 
     except Exception as e:
         logger.error(f"[{get_current_utc()}] Comprehensive error in process_download: {e}", exc_info=True)
-        await send_message(message.chat.id, f"❌ An error occurred: {str(e)}")
+        await send_message(chat_id, f"❌ An error occurred: {str(e)}")
 
     finally:
         # Remove from active downloads
@@ -268,102 +433,245 @@ async def process_download(message, url, is_audio=False, is_video_trim=False, is
         gc.collect()
 
 
+async def process_trim_batch(job):
+    """Handles a multi-range trim, sending each clip as soon as it has been cut."""
+    chat_id, url = job.chat_id, job.url
+    download_id = f"{chat_id}_{int(time.time())}"
+    extractor, media_id = canonical_media_id(url)
 
-async def process_image_download(message, url):
-    """Handles image download and sends it to Telegram or Gofile."""
     try:
-        await send_message(message.chat.id, "🖼️ Processing Instagram image...")
-        logger.info(f"Processing Instagram image URL: {url}")
-        # Process the Instagram image
-        try:
-            result = await process_instagram_image(url)
-
-            # Handle different return formats
-            if isinstance(result, list):
-                file_paths = result
-            elif isinstance(result, tuple) and len(result) >= 2:
-                file_paths = result[0] if isinstance(result[0], list) else [result[0]]
-            else:
-                file_paths = [result] if result else []
+        # Clips we uploaded before are re-sent by file_id
+        pending = []
+        for start_time, end_time in job.ranges:
+            cache_key = file_id_key(extractor, media_id, job.kind, start_time, end_time)
+            if not await send_cached_files(chat_id, cache_key):
+                pending.append((start_time, end_time))
+        if not pending:
+            return
 
-            if not file_paths or all(not path for path in file_paths):
-                logger.warning("No valid image paths returned from Instagram handler")
-                await send_message(message.chat.id, "❌ **Download failed. No images found.**")
-                return
+        if not detect_platform(url):
+            await send_message(chat_id, "⚠️ Unsupported URL.")
+            return
 
-            # Process each image
-            for file_path in file_paths:
-                if not file_path or not os.path.exists(file_path):
-                    logger.warning(f"Image path does not exist: {file_path}")
+        active_downloads.add(download_id)
+        await send_message(chat_id, f"📥 Cutting {len(pending)} clips, each is sent as soon as it's ready...")
+
+        probe = await probe_media(url)
+        disk, memory = estimate_requirements(job.kind, probe)
+        started = time.monotonic()
+        delivered = 0
+
+        trim_ranges = await handlers.get("trim_ranges")
+        async with download_semaphore, admission.reserve(disk, memory, timeout=ADMISSION_TIMEOUT):
+            async for start_time, end_time, file_path, file_size in trim_ranges(url, pending, job.is_audio):
+                if not file_path:
+                    await send_message(chat_id, f"❌ Failed to trim {start_time}-{end_time}.")
                     continue
 
-                # Get file size
-                file_size = os.path.getsize(file_path)
-
-                # Handle case where file is too large for Telegram
-                if file_size > TELEGRAM_FILE_LIMIT:
-                    filename = f"{message.chat.id}_{os.path.basename(file_path)}"
-                    logger.info(f"Image too large for Telegram: {file_size} bytes. Using Gofile.")
-
-                    # Upload to Gofile
-                    gofile_link = await upload_to_gofile(file_path, filename)
-
-                    if gofile_link:
-                        logger.info(f"Successfully uploaded image to Gofile: {gofile_link}")
-                        await send_message(
-                            message.chat.id,
-                            f"⚠️ **Image too large for Telegram.**\n📥 [Download from Gofile]({gofile_link})",
-                            parse_mode="Markdown"
-                        )
-                    else:
-                        logger.warning("Gofile upload failed")
-                        await send_message(message.chat.id, "❌ **Image download failed.**")
-                else:
-                    # Send image to Telegram
-                    try:
-                        async with aiofiles.open(file_path, "rb") as file:
-                            file_content = await file.read()
-                            await bot.send_photo(message.chat.id, file_content, timeout=60)
-                            logger.info(f"Successfully sent image to Telegram")
-                    except Exception as send_error:
-                        logger.error(f"Error sending image to Telegram: {send_error}")
-                        await send_message(message.chat.id, f"❌ **Error sending image: {str(send_error)}**")
-
-                # Cleanup the file
+                storage.track(file_path)
                 try:
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                        logger.info(f"Cleaned up image file: {file_path}")
-                except Exception as cleanup_error:
-                    logger.error(f"Failed to clean up image file {file_path}: {cleanup_error}")
+                    with storage.pinned(file_path):
+                        sent = await deliver_file(chat_id, file_path, job.is_audio, file_size)
+                finally:
+                    storage.discard(file_path)
+
+                if sent:
+                    file_id_cache.put(*file_id_key(extractor, media_id, job.kind, start_time, end_time), [sent])
+                delivered += 1
+
+        logger.info(
+            f"[{get_current_utc()}] Job {job.job_id} delivered {delivered}/{len(pending)} clips "
+            f"in {time.monotonic() - started:.1f}s"
+        )
+
+    except AdmissionRejected as rejected:
+        logger.warning(f"[{get_current_utc()}] Job {job.job_id} rejected: {rejected}")
+        await send_message(chat_id, "⚠️ Server is currently under high load. Please try again later.")
+
+    except Exception as e:
+        logger.error(f"[{get_current_utc()}] Error in process_trim_batch: {e}", exc_info=True)
+        await send_message(chat_id, f"❌ An error occurred: {str(e)}")
+
+    finally:
+        active_downloads.discard(download_id)
+        gc.collect()
+
+async def process_image_download(chat_id, url):
+    """Downloads an Instagram post's photos and videos and sends them as albums."""
+    try:
+        cache_key = file_id_key(*canonical_media_id(url), IMAGE)
+        if await send_cached_files(chat_id, cache_key):
+            return
+
+        await send_message(chat_id, "🖼️ Processing Instagram post...")
+        logger.info(f"Processing Instagram post URL: {url}")
+        result = await handlers.call("instagram_image", url)
+
+        # Handle different return formats
+        if isinstance(result, list):
+            file_paths = result
+        elif isinstance(result, tuple) and len(result) >= 2:
+            file_paths = result[0] if isinstance(result[0], list) else [result[0]]
+        else:
+            file_paths = [result] if result else []
 
-            # Send success message
-            await send_message(message.chat.id, "✅ **Instagram image(s) downloaded successfully!**")
+        file_paths = [path for path in file_paths if path and os.path.exists(path)]
+        if not file_paths:
+            logger.warning("No valid media paths returned from Instagram handler")
+            await send_message(chat_id, "❌ **Download failed. No images found.**")
+            return
+
+        await deliver_post(chat_id, cache_key, file_paths)
+
+    except Exception as e:
+        logger.error(f"Error processing Instagram post: {e}", exc_info=True)
+        await send_message(chat_id, f"❌ An error occurred: {e}")
 
+async def deliver_post(chat_id, cache_key, file_paths):
+    """Sends a downloaded post, caches its file_ids and removes the files."""
+    for file_path in file_paths:
+        storage.track(file_path)
+    try:
+        sent_files = await deliver_album(chat_id, file_paths)
+    finally:
+        for file_path in file_paths:
+            storage.discard(file_path)
+
+    if sent_files:
+        file_id_cache.put(*cache_key, sent_files)
+
+async def deliver_album(chat_id, file_paths):
+    """
+    Sends an album's files in batches of up to ten, through MEGA when one
+    is over the Telegram limit.
+
+    Returns the (media_type, file_id) of every file, or None if any of
+    them couldn't be sent by file_id (the album isn't cached partially).
+    """
+    items, complete = [], True
+    for file_path in file_paths:
+        if os.path.getsize(file_path) > TELEGRAM_FILE_LIMIT:
+            await deliver_file(chat_id, file_path, is_audio=False)
+            complete = False
+        else:
+            items.append((file_path, "video" if file_path.endswith(".mp4") else "photo"))
+
+    messages = await send_album(bot, chat_id, items) if items else []
+    sent_files = [sent_file(message) for message in messages]
+    return sent_files if complete and all(sent_files) else None
+
+def parse_post_urls(text):
+    """Returns the distinct Instagram post URLs in a text, in order."""
+    return list(dict.fromkeys(match.group(0) for match in INSTAGRAM_POST_URL.finditer(text)))
+
+async def process_bulk_download(job):
+    """
+    Downloads many Instagram posts concurrently and sends each one as soon
+    as it's ready, keeping a status message with the throughput up to date.
+    """
+    chat_id, urls = job.chat_id, job.urls
+    started = time.monotonic()
+    delivered, failed = 0, 0
+    status = None
+    last_update = started
+
+    async def update_status(final=False):
+        nonlocal last_update
+        elapsed = time.monotonic() - started
+        rate = delivered / elapsed * 60 if elapsed else 0
+        text = (
+            f"{'✅ Finished' if final else '📥 Downloading'}: {delivered}/{len(urls)} posts delivered"
+            + (f", {failed} failed" if failed else "")
+            + f" in {elapsed:.0f}s ({rate:.1f} posts/min)"
+        )
+        last_update = time.monotonic()
+        try:
+            await bot.edit_message_text(text, chat_id, status.message_id)
         except Exception as e:
-            logger.error(f"Error processing Instagram image: {e}", exc_info=True)
-            await send_message(message.chat.id, f"❌ **An error occurred:** `{e}`", parse_mode="Markdown")
+            logger.debug(f"Bulk status update failed: {e}")
+
+    try:
+        # Posts sent before are re-sent from the file_id cache right away
+        pending = []
+        for url in urls:
+            cache_key = file_id_key(*canonical_media_id(url), IMAGE)
+            if await send_cached_files(chat_id, cache_key):
+                delivered += 1
+            else:
+                pending.append(url)
+
+        status = await bot.send_message(chat_id, f"📥 Downloading {len(pending)} of {len(urls)} posts...")
+
+        bulk_download = await handlers.get("bulk_instagram_images")
+        async for url, file_paths, _ in bulk_download(pending):
+            file_paths = [path for path in file_paths if path and os.path.exists(path)]
+            if not file_paths:
+                failed += 1
+                await send_message(chat_id, f"❌ Couldn't download {url}")
+            else:
+                try:
+                    await deliver_post(chat_id, file_id_key(*canonical_media_id(url), IMAGE), file_paths)
+                    delivered += 1
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Error sending {url}: {e}", exc_info=True)
+
+            if time.monotonic() - last_update >= BULK_STATUS_INTERVAL:
+                await update_status()
+
+        await update_status(final=True)
+        logger.info(
+            f"[{get_current_utc()}] Bulk job {job.job_id}: {delivered}/{len(urls)} posts in "
+            f"{time.monotonic() - started:.0f}s, {failed} failed"
+        )
 
     except Exception as e:
-        logger.error(f"Comprehensive error in process_image_download: {e}", exc_info=True)
-        await send_message(message.chat.id, f"❌ **An error occurred:** `{e}`")
+        logger.error(f"Error processing bulk Instagram job: {e}", exc_info=True)
+        await send_message(chat_id, f"❌ An error occurred: {e}")
 
 # Worker for parallel download tasks
+async def keep_job_leased(job):
+    """Renews a job's lease while it is being processed."""
+    while True:
+        await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+        download_queue.heartbeat(job)
+
 async def worker():
     """Worker function for parallel processing of downloads."""
     while True:
-        task = await download_queue.get()
+        job = await download_queue.get()
+        logger.info(
+            f"[{get_current_utc()}] Job {job.job_id} ({job.kind}) for chat {job.chat_id} "
+            f"waited {time.time() - job.enqueued_at:.1f}s (p95 {download_queue.wait_percentile(95):.1f}s)"
+        )
+        heartbeat = asyncio.create_task(keep_job_leased(job))
 
-        if len(task) == 2:
-            # Image processing task
-            message, url = task
-            await process_image_download(message, url)
-        else:
-            # Regular download task
-            message, url, is_audio, is_video_trim, is_audio_trim, start_time, end_time = task
-            await process_download(message, url, is_audio, is_video_trim, is_audio_trim, start_time, end_time)
+        try:
+            if job.kind == IMAGE:
+                await process_image_download(job.chat_id, job.url)
+            elif job.kind == BULK_IMAGE:
+                await process_bulk_download(job)
+            elif job.ranges:
+                await process_trim_batch(job)
+            else:
+                await process_download(job)
+        except Exception as e:
+            logger.error(f"[{get_current_utc()}] Job {job.job_id} failed: {e}", exc_info=True)
+        finally:
+            heartbeat.cancel()
+            download_queue.done(job)
 
-        download_queue.task_done()
+async def enqueue_job(job):
+    """Queues a job, telling the user when their chat is over its queue quota."""
+    try:
+        await download_queue.submit(job)
+        return True
+    except QuotaExceeded as e:
+        await send_message(
+            job.chat_id,
+            f"⚠️ You already have {e.queued} requests in the queue. Please wait for them to finish."
+        )
+        return False
 
 # Start/help command
 @bot.message_handler(commands=["start", "help"])
@@ -377,12 +685,14 @@ async def send_welcome(message):
         "• Send a direct URL to download video\n"
         "• /audio <URL> - Extract full audio from video\n"
         "• /image <URL> - Download Instagram images\n"
-        "• /trim <URL> <Start Time> <End Time> - Trim video segment\n"
-        "• /trimAudio <URL> <Start Time> <End Time> - Extract audio segment\n\n"
+        "• /bulk <URL> <URL> ... - Download many Instagram posts (or send a .txt file of URLs)\n"
+        "• /trim <URL> <Start>-<End> [<Start>-<End> ...] - Trim video segments\n"
+        "• /trimAudio <URL> <Start>-<End> [<Start>-<End> ...] - Extract audio segments\n\n"
         "Examples:\n"
         "• /i https://instagram.com/p/example\n"
-        "• /trim https://youtube.com/watch?v=example 00:01:00 00:02:30\n"
-        "• /trimAudio https://youtube.com/watch?v=example 00:01:00 00:02:30"
+        "• /trim https://youtube.com/watch?v=example 00:01:00-00:02:30\n"
+        "• /trim https://youtube.com/watch?v=example 00:01:00-00:02:00 00:10:00-00:10:30\n"
+        "• /trimAudio https://youtube.com/watch?v=example 00:01:00-00:02:30"
     )
     await bot.send_message(message.chat.id, welcome_text, parse_mode="Markdown")
 
@@ -398,10 +708,10 @@ async def handle_story_request(message):
         await send_message(message.chat.id, "⚠️ Please provide a valid Instagram story URL.")
         return
 
-    await send_message(message.chat.id, "📲 Instagram story detected! Fetching image(s)...")
-
     # Add to download queue
-    await download_queue.put((message, url))
+    if await enqueue_job(Job(IMAGE, message.chat.id, url)):
+        await send_message(message.chat.id, "📲 Instagram story detected! Fetching image(s)...")
+
 # Audio extraction handler
 @bot.message_handler(commands=["audio"])
 async def handle_audio_request(message):
@@ -410,8 +720,8 @@ async def handle_audio_request(message):
     if not url:
         await send_message(message.chat.id, "⚠️ Please provide a URL.")
         return
-    await download_queue.put((message, url, True, False, False, None, None))
-    await send_message(message.chat.id, "🎵 Added to audio extraction queue!")
+    if await enqueue_job(Job(AUDIO, message.chat.id, url)):
+        await send_message(message.chat.id, "🎵 Added to audio extraction queue!")
 
 # Instagram image download handler
 @bot.message_handler(commands=["image"])
@@ -428,54 +738,150 @@ async def handle_image_request(message):
         return
 
     # Add to download queue
-    await download_queue.put((message, url))
-    await send_message(message.chat.id, "🖼️ **Added to image download queue!**")
+    if await enqueue_job(Job(IMAGE, message.chat.id, url)):
+        await send_message(message.chat.id, "🖼️ **Added to image download queue!**")
+
+async def enqueue_bulk(chat_id, text):
+    """Queues a bulk Instagram job for the post URLs found in ``text``."""
+    urls = parse_post_urls(text)
+    if not urls:
+        await send_message(chat_id, "⚠️ No Instagram post URLs found.")
+        return
+    if len(urls) > INSTAGRAM_BULK_MAX_POSTS:
+        await send_message(chat_id, f"⚠️ At most {INSTAGRAM_BULK_MAX_POSTS} posts per request, got {len(urls)}.")
+        return
+    if await enqueue_job(Job(BULK_IMAGE, chat_id, urls[0], urls=urls)):
+        await send_message(chat_id, f"🖼️ Added {len(urls)} Instagram posts to the queue!")
+
+# Bulk Instagram download handler
+@bot.message_handler(commands=["bulk"])
+async def handle_bulk_request(message):
+    """Handles /bulk with Instagram post URLs separated by spaces or newlines."""
+    await enqueue_bulk(message.chat.id, message.text)
+
+@bot.message_handler(content_types=["document"])
+async def handle_bulk_file(message):
+    """Handles a .txt file of Instagram post URLs as a bulk request."""
+    document = message.document
+    if not (document.file_name or "").lower().endswith(".txt"):
+        return
+    if document.file_size and document.file_size > BULK_FILE_MAX_SIZE:
+        await send_message(message.chat.id, "⚠️ URL list is too large.")
+        return
+
+    try:
+        file_info = await bot.get_file(document.file_id)
+        content = await bot.download_file(file_info.file_path)
+    except Exception as e:
+        logger.error(f"[{get_current_utc()}] Error fetching URL list {document.file_name}: {e}")
+        await send_message(message.chat.id, f"❌ An error occurred: {e}")
+        return
+
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        await send_message(message.chat.id, "⚠️ URL list must be a UTF-8 text file.")
+        return
+    await enqueue_bulk(message.chat.id, text)
+
+def parse_trim_request(text):
+    """
+    Parses "<URL> HH:MM:SS-HH:MM:SS [HH:MM:SS-HH:MM:SS ...]" or the older
+    "<URL> <Start> <End>" form. Returns (url, [[start, end], ...]) or None.
+    """
+    url_match = TRIM_URL.search(text)
+    if not url_match:
+        return None
+
+    arguments = text[url_match.end():]
+    ranges = [list(times) for times in TRIM_RANGE.findall(arguments)]
+    if not ranges:
+        start_end = TRIM_START_END.match(arguments)
+        if not start_end:
+            return None
+        ranges = [list(start_end.groups())]
+    return url_match.group(0), ranges
+
+def trim_job(kind, chat_id, url, ranges):
+    """A single trim keeps the start/end form so it is coalesced and cached like before."""
+    if len(ranges) == 1:
+        return Job(kind, chat_id, url, *ranges[0])
+    return Job(kind, chat_id, url, ranges=ranges)
 
 # Video trim handler
 @bot.message_handler(commands=["trim"])
 async def handle_video_trim_request(message):
-    """Handles video trimming requests."""
-    match = re.search(r"(https?://[^\s]+)\s+(\d{1,2}:\d{2}:\d{2})\s+(\d{1,2}:\d{2}:\d{2})", message.text)
-    if not match:
+    """Handles video trimming requests, one or more ranges per message."""
+    request = parse_trim_request(message.text)
+    if not request:
         await send_message(
             message.chat.id,
-            "⚠️ Invalid format. Please send: /trim <URL> <Start Time (HH:MM:SS)> <End Time (HH:MM:SS)>"
+            "⚠️ Invalid format. Please send: /trim <URL> <Start-End> [<Start-End> ...] (times as HH:MM:SS)"
         )
         return
 
-    url, start_time, end_time = match.groups()
-    await download_queue.put((message, url, False, True, False, start_time, end_time))
-    await send_message(message.chat.id, "✂️🎬 **Added to video trimming queue!**")
+    url, ranges = request
+    if len(ranges) > MAX_TRIM_RANGES:
+        await send_message(message.chat.id, f"⚠️ Please send at most {MAX_TRIM_RANGES} ranges at once.")
+        return
+
+    if await enqueue_job(trim_job(VIDEO_TRIM, message.chat.id, url, ranges)):
+        await send_message(message.chat.id, "✂️🎬 **Added to video trimming queue!**")
 
 # Audio trim handler
 @bot.message_handler(commands=["trimAudio"])
 async def handle_audio_trim_request(message):
-    """Handles audio segment extraction requests."""
-    match = re.search(r"(https?://[^\s]+)\s+(\d{1,2}:\d{2}:\d{2})\s+(\d{1,2}:\d{2}:\d{2})", message.text)
-    if not match:
+    """Handles audio segment extraction requests, one or more ranges per message."""
+    request = parse_trim_request(message.text)
+    if not request:
         await send_message(
             message.chat.id,
-            "⚠️ Invalid format. Please send: /trimAudio <URL> <Start Time (HH:MM:SS)> <End Time (HH:MM:SS)>"
+            "⚠️ Invalid format. Please send: /trimAudio <URL> <Start-End> [<Start-End> ...] (times as HH:MM:SS)"
         )
         return
 
-    url, start_time, end_time = match.groups()
-    await download_queue.put((message, url, False, False, True, start_time, end_time))
-    await send_message(message.chat.id, "✂️🎵 **Added to audio segment extraction queue!**")
+    url, ranges = request
+    if len(ranges) > MAX_TRIM_RANGES:
+        await send_message(message.chat.id, f"⚠️ Please send at most {MAX_TRIM_RANGES} ranges at once.")
+        return
+
+    if await enqueue_job(trim_job(AUDIO_TRIM, message.chat.id, url, ranges)):
+        await send_message(message.chat.id, "✂️🎵 **Added to audio segment extraction queue!**")
 
 # General message handler
 @bot.message_handler(func=lambda message: True, content_types=["text"])
 async def handle_message(message):
     """Handles general video download requests."""
     url = message.text.strip()
-    await download_queue.put((message, url, False, False, False, None, None))
-    await send_message(message.chat.id, "🎬 Added to video download queue!")
+    if await enqueue_job(Job(VIDEO, message.chat.id, url)):
+        await send_message(message.chat.id, "🎬 Added to video download queue!")
 
 # Main bot runner
 async def main():
     """Runs the bot and initializes worker processes."""
+    # Pick up jobs that were queued or in flight before the last restart
+    requeued, dead = download_queue.restore()
+    if requeued or dead:
+        logger.info(f"[{get_current_utc()}] Recovered {requeued} queued job(s), parked {dead} failing job(s)")
+
+    file_id_cache.purge_expired()
+
+    # Probe ffmpeg/ffprobe once; handlers read the result from memory
+    await get_toolchain()
+
+    # Index files left over from the previous run and start expiring them
+    storage.seed(MANAGED_DIRS)
+    asyncio.create_task(cleanup_files())
+
     num_workers = min(3, os.cpu_count() or 1)
     for _ in range(num_workers):
         asyncio.create_task(worker())
+
+    # Import the platform handlers in the background once polling is up,
+    # so the first request for each platform doesn't pay for it
+    if HANDLER_PREWARM:
+        asyncio.create_task(handlers.prewarm(delay=HANDLER_PREWARM_DELAY))
+
+    await bot.infinity_polling()
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
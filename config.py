@@ -74,6 +74,83 @@ os.makedirs(TEMP_DIR, exist_ok=True)
 DOWNLOAD_DIR3 = "downloads/story"
 os.makedirs(DOWNLOAD_DIR3, exist_ok=True)
 
+# Thumbnail directory
+THUMBNAIL_DIR = "thumbnails"
+os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+
+# Downloaded source media kept for trims and audio extraction
+SOURCE_CACHE_DIR = os.path.join(DOWNLOAD_DIR, "sources")
+os.makedirs(SOURCE_CACHE_DIR, exist_ok=True)
+
+# Persistent state (job queue, caches)
+DATA_DIR = "data"
+os.makedirs(DATA_DIR, exist_ok=True)
+
+# Durable download queue
+JOB_QUEUE_DB = os.path.join(DATA_DIR, "jobs.db")
+JOB_LEASE_SECONDS = 300  # Lease is renewed by the worker while a job runs
+JOB_MAX_ATTEMPTS = 3  # Jobs that crashed the bot this many times are parked
+JOB_PRIORITY_STEP = 60  # Seconds of queue wait each priority level is worth
+
+# Per-chat fair share
+MAX_QUEUED_PER_CHAT = 10  # New requests are rejected beyond this
+MAX_INFLIGHT_PER_CHAT = 1  # Jobs of one chat processed at the same time
+CHAT_WEIGHTS = {admin_id: 2 for admin_id in ADMIN_IDS}  # Relative share of the workers, must be > 0
+
+# Telegram file_id cache for re-sending media without downloading it again
+FILE_ID_CACHE_DB = os.path.join(DATA_DIR, "file_ids.db")
+FILE_ID_TTL = 30 * 24 * 3600  # 30 days
+
+# Admission control: jobs reserve disk/memory before they start
+ADMISSION_DISK_HEADROOM = 1024 * 1024 * 1024  # Always keep 1GB of disk free
+ADMISSION_MEMORY_HEADROOM = 256 * 1024 * 1024  # Always keep 256MB of RAM free
+ADMISSION_TIMEOUT = 30 * 60  # Give up waiting for capacity after 30 minutes
+
+# Storage manager for downloads/, thumbnails/ and TEMP_DIR
+STORAGE_QUOTA = 5 * 1024 * 1024 * 1024  # 5GB of tracked files
+STORAGE_HIGH_WATERMARK = 0.9  # Start evicting above 90% of the quota...
+STORAGE_LOW_WATERMARK = 0.7  # ...until usage is back under 70%
+STORAGE_MIN_FREE_DISK = 2 * 1024 * 1024 * 1024  # Also evict when free disk drops below 2GB
+STORAGE_MAX_AGE = 3600  # Unused files are removed after an hour
+
+# Run yt-dlp in a pool of worker processes instead of threads (0 = threads)
+YTDLP_PROCESS_WORKERS = int(os.getenv("YTDLP_PROCESS_WORKERS", "0"))
+YTDLP_POOL_SIZE = 4  # Idle YoutubeDL instances kept per option set
+PROBE_CACHE_TTL = 10 * 60  # Extracted metadata is reused for 10 minutes
+PROBE_CACHE_SIZE = 256
+
+# Multi-range trims
+MAX_TRIM_RANGES = 10  # Ranges accepted in one /trim or /trimAudio command
+TRIM_CONCURRENCY = max(1, min(4, os.cpu_count() or 1))  # Segments cut at the same time
+
+# Audio trims: "mp3" encodes the native stream once, "copy" keeps its codec
+# (m4a/opus/...) without re-encoding when the container allows it
+AUDIO_TRIM_FORMAT = os.getenv("AUDIO_TRIM_FORMAT", "mp3")
+
+# ffmpeg runner: CPU slots shared by all ffmpeg processes and threads per encode
+FFMPEG_CPU_SLOTS = int(os.getenv("FFMPEG_CPU_SLOTS", "0")) or (os.cpu_count() or 1)
+FFMPEG_ENCODE_THREADS = max(1, FFMPEG_CPU_SLOTS // 2)  # Two encodes run side by side
+FFMPEG_STALL_TIMEOUT = 120  # Seconds without progress before ffmpeg is killed
+
+# Platform handlers are imported on first use; with pre-warm enabled they are
+# also imported in the background this many seconds after the bot starts
+HANDLER_PREWARM = os.getenv("HANDLER_PREWARM", "1") == "1"
+HANDLER_PREWARM_DELAY = 5
+
+# Instagram post fetches go through a rate governor with one token bucket per
+# account. The session cookies above are the first account; more can be listed
+# as a JSON array of {"sessionid", "csrftoken", "ds_user_id", "ig_did"} objects
+INSTAGRAM_SESSIONS_FILE = os.getenv("INSTAGRAM_SESSIONS_FILE", os.path.join("cookies", "instagram_sessions.json"))
+INSTAGRAM_RATE_PER_MINUTE = 8  # Steady post fetches per account
+INSTAGRAM_MIN_RATE_PER_MINUTE = 1  # Floor the rate is halved down to on push-back
+INSTAGRAM_BURST = 3  # Fetches an idle account may make back to back
+INSTAGRAM_429_COOLDOWN = 60  # Pause for an account answered with HTTP 429
+INSTAGRAM_WAIT_COOLDOWN = 300  # Pause for an account told to "wait a few minutes"
+INSTAGRAM_REQUEST_TIMEOUT = 60
+INSTAGRAM_ALBUM_CONCURRENCY = 4  # Album items downloaded at the same time
+INSTAGRAM_BULK_CONCURRENCY = 4  # Posts of a bulk request fetched at the same time
+INSTAGRAM_BULK_MAX_POSTS = 100  # Posts accepted in one /bulk command or .txt file
+
 # Cookies file for authenticated downloads
 X_FILE = "x.txt"
 YOUTUBE_FILE = "youtube_cookies.txt"
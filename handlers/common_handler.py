@@ -1,8 +1,6 @@
 import os
-import asyncio
 import logging
 from pathlib import Path
-from contextlib import asynccontextmanager
 
 import yt_dlp
 
@@ -10,54 +8,136 @@ from utils.logger import setup_logging
 from utils.sanitize import sanitize_filename
 from utils.renamer import rename_file
 from utils.thumb_generator import generate_thumbnail
-from config import DOWNLOAD_DIR, TELEGRAM_FILE_LIMIT
+from utils.ytdlp_runner import run_ytdlp
+from utils.media_id import canonical_media_id
+from utils.smart_trim import probe_video_stream, probe_duration
+from utils.ffmpeg_runner import run_ffmpeg
+from utils.postprocess import prepare_for_telegram
+from config import DOWNLOAD_DIR, TELEGRAM_FILE_LIMIT, FFMPEG_ENCODE_THREADS
 
 # ------------------------------------------------------------------
 # Logger
 # ------------------------------------------------------------------
 logger = setup_logging(logging.DEBUG)
 
-# ------------------------------------------------------------------
-# yt-dlp async context
-# ------------------------------------------------------------------
-@asynccontextmanager
-async def yt_dlp_context(ydl_opts):
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        yield ydl
-
 # ------------------------------------------------------------------
 # FFmpeg compression
 # ------------------------------------------------------------------
-async def compress_video(input_file: str, output_file: str):
+# Audio bitrate, lowered when the whole budget is tight
+AUDIO_BITRATE = 128_000
+LOW_AUDIO_BITRATE = 64_000
+
+# Share of the size limit kept for container overhead and rate control error
+SIZE_MARGIN = 0.04
+
+# (short side, minimum video bitrate, x264 preset). The first rung the
+# bitrate budget reaches is used: fewer bits get fewer pixels to spend
+# them on, and the lower rungs use faster presets.
+COMPRESSION_LADDER = (
+    (1080, 4_000_000, "medium"),
+    (720, 2_000_000, "medium"),
+    (540, 1_000_000, "fast"),
+    (480, 600_000, "faster"),
+    (360, 300_000, "faster"),
+    (240, 0, "veryfast"),
+)
+
+# Below this the result wouldn't be watchable, so it isn't attempted
+MIN_VIDEO_BITRATE = 100_000
+
+
+def plan_compression(duration, width, height, target_size):
+    """
+    Picks the encode settings that make a video of ``duration`` seconds
+    come out just under ``target_size`` bytes.
+
+    ``duration`` is ffprobe's float, so the budget is computed in float
+    bits per second and only the resulting video bitrate is truncated to
+    an int. A missing, zero or negative duration has no budget to split.
+
+    Returns:
+        tuple: (video_bitrate, audio_bitrate, short_side, preset), or None
+            if the target can't be met at a usable bitrate
+    """
+    if not duration or duration <= 0:
+        return None
+
+    budget = target_size * 8 * (1 - SIZE_MARGIN) / duration
+    audio_bitrate = AUDIO_BITRATE if budget >= 1_000_000 else LOW_AUDIO_BITRATE
+    video_bitrate = int(budget - audio_bitrate)
+    if video_bitrate < MIN_VIDEO_BITRATE:
+        return None
+
+    for short_side, min_bitrate, preset in COMPRESSION_LADDER:
+        if video_bitrate >= min_bitrate:
+            return video_bitrate, audio_bitrate, min(short_side, width, height), preset
+
+
+async def compress_video(input_file: str, output_file: str, target_size: int = TELEGRAM_FILE_LIMIT):
+    """
+    Re-encodes a video to fit ``target_size`` bytes in a single pass.
+
+    The target bitrate is derived from the duration and the size limit, and
+    resolution and preset come from COMPRESSION_LADDER. Rate control is
+    capped (VBV) so the output size is predictable. The encode goes through
+    the shared ffmpeg runner, which logs progress, speed and ETA and kills
+    it if it stalls.
+
+    Returns:
+        str: ``output_file``, or None if compression failed or can't fit
+    """
+    stream = await probe_video_stream(input_file)
+    duration = await probe_duration(input_file)
+    if not stream or not duration or duration <= 0:
+        logger.error(f"❌ Can't compress {input_file}: no video stream or duration")
+        return None
+
+    width, height = stream.get("width") or 0, stream.get("height") or 0
+    plan = plan_compression(duration, width, height, target_size)
+    if not plan:
+        logger.error(f"❌ {duration:.0f}s of video can't fit in {target_size / (1024 ** 2):.0f} MB")
+        return None
+    video_bitrate, audio_bitrate, short_side, preset = plan
+
+    scale = []
+    if short_side < min(width, height):
+        scale = ["-vf", f"scale=-2:{short_side}" if width >= height else f"scale={short_side}:-2"]
+
     cmd = [
-        "ffmpeg", "-y",
         "-i", input_file,
+        "-map", "0:v:0", "-map", "0:a:0?",
+        *scale,
         "-c:v", "libx264",
-        "-crf", "23",
-        "-preset", "medium",
+        "-preset", preset,
+        "-b:v", str(video_bitrate),
+        "-maxrate", str(int(video_bitrate * 1.5)),
+        "-bufsize", str(video_bitrate * 2),
+        "-pix_fmt", "yuv420p",
         "-c:a", "aac",
-        "-b:a", "128k",
+        "-b:a", str(audio_bitrate),
+        "-movflags", "+faststart",
         output_file
     ]
-
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE
+    logger.info(
+        f"🗜️ Compressing {duration:.0f}s to {target_size / (1024 ** 2):.0f} MB: "
+        f"{video_bitrate // 1000} kbps video, {short_side}p, preset {preset}"
     )
 
-    try:
-        _, stderr = await asyncio.wait_for(process.communicate(), timeout=300)
+    result = await run_ffmpeg(cmd, threads=FFMPEG_ENCODE_THREADS, duration=duration, label="compression")
 
-        if process.returncode == 0:
-            logger.info(f"✅ Video compressed: {output_file}")
-            return output_file
-        else:
-            logger.error(f"❌ Compression failed:\n{stderr.decode(errors='ignore')}")
-    except asyncio.TimeoutError:
-        logger.error("❌ Compression timeout, killing ffmpeg...")
-        process.kill()
+    if result.ok:
+        size = os.path.getsize(output_file)
+        logger.info(
+            f"✅ Video compressed: {output_file} ({size / (1024 ** 2):.1f} MB, "
+            f"{size / target_size:.0%} of target, {result.summary()})"
+        )
+        return output_file
 
+    logger.error(f"❌ Compression failed: {result.error or result.stderr}")
+
+    # Don't leave a partial encode behind
+    if os.path.exists(output_file):
+        os.remove(output_file)
     return None
 
 # ------------------------------------------------------------------
@@ -116,96 +196,99 @@ async def process_adult(url: str):
     }
 
     try:
-        async with yt_dlp_context(ydl_opts) as ydl:
-
-            # ----------------------------------------------------------
-            # STEP 1: PROBE (NO DOWNLOAD)
-            # ----------------------------------------------------------
-            try:
-                info = await asyncio.to_thread(
-                    ydl.extract_info,
-                    url,
-                    download=False
-                )
-            except Exception as e:
-                if "videoModel" in str(e):
-                    logger.error("❌ XHamster extractor broken (videoModel).")
-                    return None, 0, None
-                logger.error(f"❌ Metadata extraction failed: {e}")
-                return None, 0, None
-
-            if not info:
-                logger.error("❌ No metadata returned.")
+        # ----------------------------------------------------------
+        # STEP 1: PROBE (NO DOWNLOAD)
+        # ----------------------------------------------------------
+        try:
+            info, _ = await run_ytdlp(ydl_opts, url, download=False)
+        except Exception as e:
+            if "videoModel" in str(e):
+                logger.error("❌ XHamster extractor broken (videoModel).")
                 return None, 0, None
-
-            # ----------------------------------------------------------
-            # STEP 2: DOWNLOAD
-            # ----------------------------------------------------------
-            info = await asyncio.to_thread(
-                ydl.extract_info,
-                url,
-                download=True
-            )
-
-            if not info:
-                logger.error("❌ Download failed (no info_dict).")
+            logger.error(f"❌ Metadata extraction failed: {e}")
+            return None, 0, None
+
+        if not info:
+            logger.error("❌ No metadata returned.")
+            return None, 0, None
+
+        # ----------------------------------------------------------
+        # STEP 2: DOWNLOAD (reuses the probe's cached metadata)
+        # ----------------------------------------------------------
+        info, filename = await run_ytdlp(ydl_opts, url)
+
+        if not info:
+            logger.error("❌ Download failed (no info_dict).")
+            return None, 0, None
+
+        file_path = Path(filename)
+
+        # Fix extension mismatch
+        if not file_path.exists():
+            mp4_path = file_path.with_suffix(".mp4")
+            if mp4_path.exists():
+                file_path = mp4_path
+            else:
+                logger.error("❌ Downloaded file not found.")
                 return None, 0, None
 
-            file_path = Path(ydl.prepare_filename(info))
+        # ----------------------------------------------------------
+        # Sanitize filename
+        # ----------------------------------------------------------
+        sanitized_name = sanitize_filename(file_path.name)
+        new_path = file_path.parent / sanitized_name
 
-            # Fix extension mismatch
-            if not file_path.exists():
-                mp4_path = file_path.with_suffix(".mp4")
-                if mp4_path.exists():
-                    file_path = mp4_path
-                else:
-                    logger.error("❌ Downloaded file not found.")
-                    return None, 0, None
+        if file_path != new_path:
+            await rename_file(str(file_path), str(new_path))
+            file_path = new_path
 
-            # ----------------------------------------------------------
-            # Sanitize filename
-            # ----------------------------------------------------------
-            sanitized_name = sanitize_filename(file_path.name)
-            new_path = file_path.parent / sanitized_name
-
-            if file_path != new_path:
-                await rename_file(str(file_path), str(new_path))
-                file_path = new_path
+        file_size = file_path.stat().st_size
+        logger.info(f"✅ File size: {file_size / (1024 ** 2):.2f} MB")
 
+        # Files that fit are only remuxed/transcoded when their codecs need
+        # it; oversized ones are re-encoded by the compression below anyway
+        if file_size <= TELEGRAM_FILE_LIMIT:
+            final_path, _ = await prepare_for_telegram(str(file_path))
+            file_path = Path(final_path)
             file_size = file_path.stat().st_size
-            logger.info(f"✅ File size: {file_size / (1024 ** 2):.2f} MB")
-
-            # ----------------------------------------------------------
-            # Thumbnail
-            # ----------------------------------------------------------
-            thumbnail_path = await generate_thumbnail(str(file_path))
-
-            # ----------------------------------------------------------
-            # Telegram size handling
-            # ----------------------------------------------------------
-            if file_size > TELEGRAM_FILE_LIMIT:
-                logger.warning("⚠️ File exceeds Telegram limit, compressing...")
-
-                compressed_path = file_path.with_stem(
-                    f"{file_path.stem}_compressed"
-                )
 
-                compressed = await compress_video(
-                    str(file_path),
-                    str(compressed_path)
-                )
-
-                if compressed:
-                    new_size = Path(compressed).stat().st_size
-                    if new_size < TELEGRAM_FILE_LIMIT:
-                        logger.info("✅ Compression successful.")
-                        return compressed, new_size, thumbnail_path
+        # ----------------------------------------------------------
+        # Thumbnail
+        # ----------------------------------------------------------
+        thumbnail_path = await generate_thumbnail(
+            str(file_path), media_id=canonical_media_id(url), thumbnail_url=info.get("thumbnail")
+        )
+
+        # ----------------------------------------------------------
+        # Telegram size handling
+        # ----------------------------------------------------------
+        if file_size > TELEGRAM_FILE_LIMIT:
+            logger.warning("⚠️ File exceeds Telegram limit, compressing...")
+
+            compressed_path = file_path.with_stem(
+                f"{file_path.stem}_compressed"
+            )
 
-                logger.warning("⚠️ Still too large after compression.")
-                return str(file_path), file_size, thumbnail_path
+            compressed = await compress_video(
+                str(file_path),
+                str(compressed_path)
+            )
 
+            # Whichever file isn't returned is deleted here; nothing else
+            # tracks it
+            if compressed:
+                new_size = Path(compressed).stat().st_size
+                if new_size < TELEGRAM_FILE_LIMIT:
+                    logger.info("✅ Compression successful.")
+                    file_path.unlink(missing_ok=True)
+                    return compressed, new_size, thumbnail_path
+                Path(compressed).unlink(missing_ok=True)
+
+            logger.warning("⚠️ Still too large after compression.")
             return str(file_path), file_size, thumbnail_path
 
+        return str(file_path), file_size, thumbnail_path
+
     except yt_dlp.utils.DownloadError as e:
         logger.error(f"❌ yt-dlp DownloadError: {e}")
 
@@ -1,12 +1,14 @@
 import logging
 import gc
-import asyncio
 from pathlib import Path
 from urllib.parse import urlparse
 import yt_dlp
 from config import DOWNLOAD_DIR, FACEBOOK_FILE
 from utils.sanitize import sanitize_filename
 from utils.logger import setup_logging
+from utils.uploader import upload_file
+from utils.ytdlp_runner import run_ytdlp
+from utils.postprocess import prepare_for_telegram
 
 # Logger setup
 logger = setup_logging(logging.DEBUG)
@@ -79,22 +81,19 @@ async def process_facebook(url: str) -> tuple[str | None, int, str | None]:
             'Sec-Fetch-Mode': 'navigate',
             'Sec-Fetch-Dest': 'document'
         },
-        'postprocessors': [
-            {
-                'key': 'FFmpegVideoConvertor',
-                'preferedformat': 'mp4',
-            }
-        ],
     }
 
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info_dict = await asyncio.to_thread(ydl.extract_info, url, True)
-            if info_dict:
-                video_path = Path(ydl.prepare_filename(info_dict))
-                file_size = info_dict.get('filesize', video_path.stat().st_size if video_path.exists() else 0)
-                return str(video_path), file_size, None
-            return None, 0, "❌ Failed to extract info"
+        info_dict, filename = await run_ytdlp(ydl_opts, url)
+        if info_dict:
+            video_path = Path(filename)
+            if not video_path.exists():
+                return None, 0, "❌ Downloaded file not found"
+
+            # Remux or transcode only when the codecs need it
+            final_path, _ = await prepare_for_telegram(str(video_path))
+            return final_path, Path(final_path).stat().st_size, None
+        return None, 0, "❌ Failed to extract info"
     except yt_dlp.utils.DownloadError as e:
         logger.error(f"❌ Facebook download error: {e}")
         return None, 0, str(e)
@@ -106,8 +105,7 @@ async def process_facebook(url: str) -> tuple[str | None, int, str | None]:
 async def send_video_to_user(bot, chat_id: int, video_path: str) -> None:
     """Send the downloaded Facebook video to the specified user."""
     try:
-        with open(video_path, 'rb') as video:
-            await bot.send_video(chat_id, video)
+        await upload_file(bot, chat_id, video_path, "video")
         logger.info(f"✅ Video successfully sent to user {chat_id}")
     except Exception as e:
         logger.error(f"❌ Failed to send video to user {chat_id}: {e}")
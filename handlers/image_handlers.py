@@ -6,117 +6,58 @@ import aiohttp
 import shutil
 import instaloader
 import traceback
-import random
-import time
-from asyncio import Lock
-from instaloader.exceptions import ConnectionException
 
 from utils.logger import logger
 from utils.sanitize import sanitize_filename
+from utils.instagram_governor import InstagramGovernor
 from config import *
 
-# Path to your cookie file
-COOKIE_FILE = {
-"sessionid": session_id,
-    "csrftoken": crf_tk,
-    "ds_user_id": ds_user,
-    "ig_did": ig_dd 
-}
-
-# Lock for safe access (VERY IMPORTANT)
-SESSION_LOCK = Lock()
-
-# Instaloader configuration
-INSTALOADER_INSTANCE = instaloader.Instaloader(
-    download_videos=False,
-    download_video_thumbnails=False,
-    download_geotags=False,
-    save_metadata=False,
-    download_comments=False,
-    post_metadata_txt_pattern="",
-    quiet=True
-)
+# Post fetches are paced per account and spread over every configured session
+instagram = InstagramGovernor.from_config()
+
+
+async def warm_up():
+    """Tests the Instagram sessions ahead of the first request (handler pre-warm)."""
+    await instagram.check_sessions()
 
 
 # -------------------------------
-# SESSION INITIALIZATION
+# RATE-GOVERNED POST FETCH
 # -------------------------------
-
-def initialize_instagram_session():
-    """Load Instagram cookies safely."""
+async def get_post(shortcode: str):
+    """Fetch an Instagram post on whichever session has rate budget first."""
     try:
-        # Access the underlying requests session
-        session = requests.Session()
-        
-        # Set cookies directly on the session
-        session.cookies.set("sessionid", session_id, domain=".instagram.com")
-        session.cookies.set("csrftoken", crf_tk, domain=".instagram.com")
-        session.cookies.set("ds_user_id", ds_user, domain=".instagram.com")
-        session.cookies.set("ig_did", ig_dd, domain=".instagram.com")
-        
-        # Load the session into Instaloader using the correct method
-        INSTALOADER_INSTANCE.context._session = session
-        
-        # Test the session is valid by fetching the logged-in username
-        username = INSTALOADER_INSTANCE.test_login()
-        if username:
-            logger.info(f"✅ Instagram session loaded successfully! Logged in as: {username}")
-        else:
-            logger.error("❌ Session loaded but login test failed — cookies may be expired.")
+        return await instagram.run(instaloader.Post.from_shortcode, shortcode)
     except Exception as e:
-        logger.error(f"❌ Failed to load Instagram session: {e}")
+        logger.error(
+            f"❌ Error fetching post {shortcode}: {e}\n{traceback.format_exc()}"
+        )
+        raise
 
 
 # -------------------------------
-# SAFE POST FETCH WITH RETRY
+# MEDIA DOWNLOAD
 # -------------------------------
-async def get_post(shortcode: str, retry: bool = True):
-    """Fetch Instagram post with rate-limit handling."""
-    async with SESSION_LOCK:
-        try:
-            # Mandatory random delay (Instagram protection)
-            await asyncio.sleep(random.uniform(6, 10))
-
-            return await asyncio.to_thread(
-                instaloader.Post.from_shortcode,
-                INSTALOADER_INSTANCE.context,
-                shortcode,
-            )
-
-        except ConnectionException as e:
-            error_msg = str(e)
-
-            if "Please wait a few minutes" in error_msg and retry:
-                logger.warning("⏳ Instagram rate-limited. Cooling down for 5 minutes...")
-                await asyncio.sleep(300)  # 5 minutes cooldown
-                return await get_post(shortcode, retry=False)
-
-            logger.error(f"❌ Instagram blocked request: {error_msg}")
-            raise
-
-        except Exception as e:
-            logger.error(
-                f"❌ Error fetching post {shortcode}: {e}\n{traceback.format_exc()}"
-            )
-            raise
+# Bytes written per read, so no file is ever held in memory whole
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
 
 
-# -------------------------------
-# IMAGE DOWNLOAD
-# -------------------------------
-async def download_image(session, url, temp_path, final_path):
+async def download_media(session, semaphore, url, temp_path, final_path):
+    """Streams one photo or video to disk, then moves it into place."""
     try:
-        async with session.get(url, timeout=aiohttp.ClientTimeout(total=60)) as response:
-            response.raise_for_status()
-            async with aiofiles.open(temp_path, "wb") as f:
-                await f.write(await response.read())
+        async with semaphore:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=None, sock_read=60)) as response:
+                response.raise_for_status()
+                async with aiofiles.open(temp_path, "wb") as f:
+                    async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                        await f.write(chunk)
 
         await asyncio.to_thread(shutil.move, temp_path, final_path)
-        logger.info(f"✅ Saved image: {final_path}")
+        logger.info(f"✅ Saved media: {final_path}")
         return final_path
 
     except Exception as e:
-        logger.error(f"❌ Failed downloading image: {e}")
+        logger.error(f"❌ Failed downloading media: {e}")
         return None
 
 
@@ -128,18 +69,21 @@ async def cleanup_temp_dir(temp_dir):
 
 
 # -------------------------------
-# MAIN IMAGE PROCESSOR
+# MAIN ALBUM PROCESSOR
 # -------------------------------
 async def process_instagram_image(url: str):
-    """Download all images from an Instagram post."""
+    """
+    Download every photo and video of an Instagram post, in album order.
+
+    All sidecar nodes are streamed to disk concurrently, at most
+    INSTAGRAM_ALBUM_CONCURRENCY at a time. Returns (paths, uploader).
+    """
     if "/p/" not in url:
         logger.warning("⚠️ Invalid Instagram post URL")
         return [], None
 
     shortcode = url.split("/p/")[1].split("/")[0]
     temp_dir = tempfile.mkdtemp()
-    image_paths = []
-    uploader = None
 
     try:
         post = await get_post(shortcode)
@@ -151,40 +95,30 @@ async def process_instagram_image(url: str):
             else [post]
         )
 
+        semaphore = asyncio.Semaphore(INSTAGRAM_ALBUM_CONCURRENCY)
         async with aiohttp.ClientSession() as session:
-            tasks = []
 
-            for idx, node in enumerate(nodes):
-                if node.is_video:
-                    continue
-
-                filename = sanitize_filename(
-                    f"{uploader}_{shortcode}_{idx}.jpg"
-                )
+            async def fetch(idx, node):
+                extension = "mp4" if node.is_video else "jpg"
+                filename = sanitize_filename(f"{uploader}_{shortcode}_{idx}.{extension}")
                 final_path = os.path.join(DOWNLOAD_DIR, filename)
-                temp_path = os.path.join(temp_dir, filename)
-
                 if os.path.exists(final_path):
-                    image_paths.append(final_path)
-                    continue
-
-                tasks.append(
-                    download_image(
-                        session,
-                        node.display_url,
-                        temp_path,
-                        final_path,
-                    )
+                    return final_path
+                return await download_media(
+                    session,
+                    semaphore,
+                    node.video_url if node.is_video else node.display_url,
+                    os.path.join(temp_dir, filename),
+                    final_path,
                 )
 
-            results = await asyncio.gather(*tasks)
-            image_paths.extend([r for r in results if r])
+            results = await asyncio.gather(*(fetch(idx, node) for idx, node in enumerate(nodes)))
 
-        return image_paths, uploader
+        return [path for path in results if path], uploader
 
     except Exception as e:
         logger.error(
-            f"❌ Instagram image processing failed: {e}\n{traceback.format_exc()}"
+            f"❌ Instagram album processing failed: {e}\n{traceback.format_exc()}"
         )
         return [], None
 
@@ -193,16 +127,28 @@ async def process_instagram_image(url: str):
 
 
 # -------------------------------
-# BULK HANDLER (SAFE SEQUENTIAL)
+# BULK HANDLER (BOUNDED CONCURRENCY)
 # -------------------------------
 async def process_bulk_instagram_images(urls: list[str]):
-    all_imgs = []
-    for url in urls:
-        imgs, _ = await process_instagram_image(url)
-        all_imgs.extend(imgs)
-        await asyncio.sleep(8)  # prevent bulk rate-limit
-    return all_imgs
-
-
-# Load cookies immediately
-initialize_instagram_session()
\ No newline at end of file
+    """
+    Downloads many posts concurrently and yields (url, paths, uploader) for
+    each one as soon as it's done, in completion order.
+
+    At most INSTAGRAM_BULK_CONCURRENCY posts are in flight; the rate
+    governor behind get_post paces the actual Instagram requests, so
+    throughput follows the rate budget of the configured sessions.
+    """
+    semaphore = asyncio.Semaphore(INSTAGRAM_BULK_CONCURRENCY)
+
+    async def fetch(url):
+        async with semaphore:
+            paths, uploader = await process_instagram_image(url)
+            return url, paths, uploader
+
+    tasks = [asyncio.create_task(fetch(url)) for url in urls]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -2,16 +2,17 @@
 import os
 import gc
 import logging
-import asyncio
 from pathlib import Path
 from urllib.parse import urlparse
 import yt_dlp
-import aiofiles
 from typing import Optional, Tuple
 from config import DOWNLOAD_DIR
 from utils.instagram_cookies import COOKIES_FILE  # ensure this is a Netscape cookies.txt
 from utils.sanitize import sanitize_filename
 from utils.logger import setup_logging
+from utils.uploader import upload_file
+from utils.ytdlp_runner import run_ytdlp
+from utils.postprocess import prepare_for_telegram
 
 # Logger setup
 logger = setup_logging(logging.DEBUG)
@@ -70,12 +71,6 @@ async def process_instagram(url: str) -> Tuple[Optional[str], int, Optional[str]
         'cookiefile': str(cookie_path),
         # Keep verbose only during debug
         # 'verbose': True,
-        'postprocessors': [
-            {
-                'key': 'FFmpegVideoConvertor',
-                'preferedformat': 'mp4',
-            }
-        ],
         'http_headers': {
             'User-Agent': (
                 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:123.0 '
@@ -87,12 +82,7 @@ async def process_instagram(url: str) -> Tuple[Optional[str], int, Optional[str]
     }
 
     try:
-        # Run blocking yt-dlp in threadpool
-        def run_extract():
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                return ydl.extract_info(url, download=True)
-
-        info_dict = await asyncio.to_thread(run_extract)
+        info_dict, _ = await run_ytdlp(ydl_opts, url)
 
         if not info_dict:
             return None, 0, "❌ Failed to extract info"
@@ -112,8 +102,12 @@ async def process_instagram(url: str) -> Tuple[Optional[str], int, Optional[str]
             if candidates:
                 video_path = candidates[0]
 
-        file_size = info_dict.get('filesize') or (video_path.stat().st_size if video_path.exists() else 0)
-        return str(video_path), int(file_size), None
+        if not video_path.exists():
+            return None, 0, "❌ Downloaded file not found"
+
+        # Remux or transcode only when the codecs need it
+        final_path, _ = await prepare_for_telegram(str(video_path))
+        return final_path, os.path.getsize(final_path), None
 
     except yt_dlp.utils.DownloadError as e:
         logger.error(f"❌ Instagram download error: {e}")
@@ -125,10 +119,8 @@ async def process_instagram(url: str) -> Tuple[Optional[str], int, Optional[str]
 # Send Video to User (async, non-blocking)
 async def send_video_to_user(bot, chat_id: int, video_path: str) -> None:
     try:
-        # Read file asynchronously to bytes (careful with very large files)
-        async with aiofiles.open(video_path, 'rb') as f:
-            data = await f.read()
-        await bot.send_video(chat_id, data, supports_streaming=True)
+        # Streamed from disk, never read into memory as a whole
+        await upload_file(bot, chat_id, video_path, "video", supports_streaming=True)
         logger.info(f"✅ Video successfully sent to user {chat_id}")
     except Exception as e:
         logger.error(f"❌ Failed to send video to user {chat_id}: {e}")
@@ -2,11 +2,17 @@ import os
 import re
 import asyncio
 import yt_dlp
+from yt_dlp.utils import download_range_func
 import logging
-import subprocess
 from utils.sanitize import sanitize_filename
-from config import DOWNLOAD_DIR, YOUTUBE_FILE
+from config import DOWNLOAD_DIR, YOUTUBE_FILE, TRIM_CONCURRENCY, AUDIO_TRIM_FORMAT, FFMPEG_ENCODE_THREADS
 from utils.logger import setup_logging
+from utils.ytdlp_runner import run_ytdlp
+from utils.smart_trim import smart_trim
+from utils.ffmpeg_runner import run_ffmpeg
+from utils.toolchain import get_toolchain
+from utils.media_probe import probe_media
+from utils.source_cache import source_cache, source_key, VIDEO_SOURCE, AUDIO_SOURCE
 
 # Setup logging
 logger = setup_logging(logging.DEBUG)
@@ -14,6 +20,21 @@ logger = setup_logging(logging.DEBUG)
 # Ensure the download directory exists
 os.makedirs(DOWNLOAD_DIR, exist_ok=True)
 
+# Multi-range trims fetch each section separately while the ranges cover
+# less than this share of the media; beyond it one full download is cheaper
+SECTION_BATCH_RATIO = 0.5
+
+# Containers audio codecs are stream-copied into when AUDIO_TRIM_FORMAT is "copy"
+COPY_CONTAINERS = {"aac": "m4a", "mp3": "mp3", "opus": "opus", "vorbis": "ogg", "flac": "flac"}
+
+# Protocols ffmpeg can seek in directly, so a section is cut from the remote stream
+SEEKABLE_PROTOCOLS = ("http", "https", "m3u8", "m3u8_native")
+
+def derived_path(input_path, suffix):
+    """Output path in DOWNLOAD_DIR for a file derived from input_path (which may be a cached source)."""
+    base_name = os.path.basename(input_path).rsplit(".", 1)[0]
+    return os.path.join(DOWNLOAD_DIR, base_name + suffix)
+
 def time_to_seconds(time_str):
     """
     Converts time string to seconds.
@@ -36,29 +57,31 @@ def time_to_seconds(time_str):
         logger.error(f"Time conversion error for '{time_str}': {e}")
         return None
 
-async def download_media(url, is_audio=False):
+async def download_media(url, is_audio=False, section=None):
     """
     Downloads video or audio using yt-dlp.
     
     Args:
         url (str): URL of the media to download
-        is_audio (bool): Whether to download as audio only
+        is_audio (bool): Whether to download the native audio stream only
+        section (tuple): Optional (start, end) in seconds. Only that part of
+            the media is fetched (HTTP range seeking or just the HLS/DASH
+            fragments covering it) and cut at exactly those times.
         
     Returns:
         str: Path to the downloaded file or None if download failed
     """
-    output_path = os.path.join(DOWNLOAD_DIR, "%(title)s_%(id)s.%(ext)s")
+    if section:
+        output_path = os.path.join(DOWNLOAD_DIR, "%(title)s_%(id)s_%(section_start)d-%(section_end)d.%(ext)s")
+    else:
+        output_path = os.path.join(DOWNLOAD_DIR, "%(title)s_%(id)s.%(ext)s")
 
     # Set different options based on whether we're downloading audio or video
     if is_audio:
+        # Native audio stream (opus/m4a); trims encode it once themselves
         ydl_opts = {
-            'format': 'bestaudio',
+            'format': 'bestaudio/best',
             'outtmpl': output_path,
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
             'cookiefile': YOUTUBE_FILE if os.path.exists(YOUTUBE_FILE) else None,
             'quiet': False,
             'noplaylist': True,
@@ -73,30 +96,37 @@ async def download_media(url, is_audio=False):
             'noplaylist': True,
         }
 
-    loop = asyncio.get_running_loop()
+    if section:
+        ydl_opts['download_ranges'] = download_range_func(None, [section])
+        # Re-encode around the cut points so video starts exactly at `start`
+        ydl_opts['force_keyframes_at_cuts'] = not is_audio
+
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = await loop.run_in_executor(None, lambda: ydl.extract_info(url, download=True))
-            file_path = ydl.prepare_filename(info)
-
-            # Ensure correct file extension
-            if is_audio:
-                file_path = file_path.rsplit(".", 1)[0] + ".mp3"
-            else:
-                # Check if the file exists with mp4 extension, otherwise try original extension
-                mp4_path = file_path.rsplit(".", 1)[0] + ".mp4"
-                if os.path.exists(mp4_path):
-                    file_path = mp4_path
-                elif not os.path.exists(file_path):
-                    # Check for any file with the same base name
-                    base_name = file_path.rsplit(".", 1)[0]
-                    for file in os.listdir(DOWNLOAD_DIR):
-                        if file.startswith(os.path.basename(base_name)):
-                            file_path = os.path.join(DOWNLOAD_DIR, file)
-                            break
-
-            logger.debug(f"Downloaded file path: {file_path}")
-            return file_path if os.path.exists(file_path) else None
+        info, file_path = await run_ytdlp(ydl_opts, url)
+
+        if section:
+            # The section's own path, after merging/audio extraction
+            downloads = (info or {}).get('requested_downloads') or [{}]
+            file_path = downloads[0].get('filepath')
+            logger.debug(f"Downloaded section file path: {file_path}")
+            return file_path if file_path and os.path.exists(file_path) else None
+
+        # Ensure correct file extension
+        if not is_audio:
+            # Check if the file exists with mp4 extension, otherwise try original extension
+            mp4_path = file_path.rsplit(".", 1)[0] + ".mp4"
+            if os.path.exists(mp4_path):
+                file_path = mp4_path
+            elif not os.path.exists(file_path):
+                # Check for any file with the same base name
+                base_name = file_path.rsplit(".", 1)[0]
+                for file in os.listdir(DOWNLOAD_DIR):
+                    if file.startswith(os.path.basename(base_name)):
+                        file_path = os.path.join(DOWNLOAD_DIR, file)
+                        break
+
+        logger.debug(f"Downloaded file path: {file_path}")
+        return file_path if os.path.exists(file_path) else None
     except yt_dlp.utils.DownloadError as e:
         logger.error(f"Error downloading media: {e}")
         return None
@@ -120,42 +150,45 @@ async def trim_video(input_path, start_time, end_time):
         logger.error(f"Input file does not exist: {input_path}")
         return None, None
         
-    output_path = input_path.rsplit(".", 1)[0] + f"_trim_{start_time}_{end_time}.mp4"
+    output_path = derived_path(input_path, f"_trim_{start_time}_{end_time}.mp4")
 
     # Check if ffmpeg is installed
-    try:
-        subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True)
-    except (subprocess.SubprocessError, FileNotFoundError):
+    toolchain = await get_toolchain()
+    if not toolchain.has_ffmpeg:
         logger.error("FFmpeg not found. Please install FFmpeg.")
         return None, None
 
+    # Stream-copy whole GOPs and only re-encode the edges when possible
+    if toolchain.can_smart_trim and await smart_trim(input_path, output_path, start_time, end_time):
+        file_size = os.path.getsize(output_path)
+        logger.info(f"Smart video trimming successful. Output file: {output_path}, Size: {file_size} bytes")
+        return output_path, file_size
+
+    if not toolchain.has_encoder("libx264"):
+        logger.warning("libx264 not available, trimming with stream copy")
+        return await trim_video_alternative(input_path, start_time, end_time)
+
     command = [
-        "ffmpeg", "-i", input_path, 
+        "-i", input_path, 
         "-ss", str(start_time), 
         "-to", str(end_time),
         "-c:v", "libx264", 
         "-c:a", "aac", 
         "-preset", "fast",
-        "-y", output_path
+        output_path
     ]
 
-    logger.debug(f"Running FFmpeg video trim command: {' '.join(command)}")
+    logger.debug(f"Running FFmpeg video trim command: ffmpeg {' '.join(command)}")
 
     try:
-        process = await asyncio.create_subprocess_exec(
-            *command, 
-            stdout=asyncio.subprocess.PIPE, 
-            stderr=asyncio.subprocess.PIPE
-        )
+        result = await run_ffmpeg(command, threads=FFMPEG_ENCODE_THREADS, duration=end_time - start_time, label="video trim")
 
-        stdout, stderr = await process.communicate()
-
-        if process.returncode == 0 and os.path.exists(output_path):
+        if result.ok and os.path.exists(output_path):
             file_size = os.path.getsize(output_path)
-            logger.info(f"Video trimming successful. Output file: {output_path}, Size: {file_size} bytes")
+            logger.info(f"Video trimming successful. Output file: {output_path}, Size: {file_size} bytes ({result.summary()})")
             return output_path, file_size
         else:
-            logger.error(f"FFmpeg video trim error (return code {process.returncode}): {stderr.decode()}")
+            logger.error(f"FFmpeg video trim error (return code {result.returncode}): {result.error or result.stderr}")
             # Try alternative approach
             return await trim_video_alternative(input_path, start_time, end_time)
     except Exception as e:
@@ -164,43 +197,122 @@ async def trim_video(input_path, start_time, end_time):
 
 async def trim_video_alternative(input_path, start_time, end_time):
     """Alternative video trimming method that uses a different FFmpeg approach"""
-    output_path = input_path.rsplit(".", 1)[0] + f"_trim_alt_{start_time}_{end_time}.mp4"
+    output_path = derived_path(input_path, f"_trim_alt_{start_time}_{end_time}.mp4")
     
     # Different FFmpeg command that may work in some cases where the other fails
     command = [
-        "ffmpeg",
         "-ss", str(start_time),  # Place -ss before -i for faster seeking
         "-i", input_path,
         "-t", str(end_time - start_time),  # Duration instead of end time
         "-c", "copy",  # Use stream copy (no re-encoding, faster but less precise)
-        "-y", output_path
+        output_path
     ]
     
-    logger.debug(f"Running alternative FFmpeg video trim command: {' '.join(command)}")
+    logger.debug(f"Running alternative FFmpeg video trim command: ffmpeg {' '.join(command)}")
     
     try:
-        process = await asyncio.create_subprocess_exec(
-            *command, 
-            stdout=asyncio.subprocess.PIPE, 
-            stderr=asyncio.subprocess.PIPE
-        )
+        result = await run_ffmpeg(command, duration=end_time - start_time, label="video trim (copy)")
 
-        stdout, stderr = await process.communicate()
-
-        if process.returncode == 0 and os.path.exists(output_path):
+        if result.ok and os.path.exists(output_path):
             file_size = os.path.getsize(output_path)
-            logger.info(f"Alternative video trimming successful. Output file: {output_path}, Size: {file_size} bytes")
+            logger.info(f"Alternative video trimming successful. Output file: {output_path}, Size: {file_size} bytes ({result.summary()})")
             return output_path, file_size
         else:
-            logger.error(f"Alternative FFmpeg video trim error (return code {process.returncode}): {stderr.decode()}")
+            logger.error(f"Alternative FFmpeg video trim error (return code {result.returncode}): {result.error or result.stderr}")
             return None, None
     except Exception as e:
         logger.error(f"Exception during alternative video trim: {str(e)}", exc_info=True)
         return None, None
 
+def normalize_codec(codec):
+    """Maps yt-dlp/ffprobe audio codec names (e.g. "mp4a.40.2") to COPY_CONTAINERS keys."""
+    if not codec or codec == "none":
+        return None
+    return "aac" if codec.startswith("mp4a") else codec.split(".")[0]
+
+def copy_extension(codec):
+    """Extension the codec is stream-copied into, or None when trims are encoded to MP3."""
+    if AUDIO_TRIM_FORMAT != "copy":
+        return None
+    return COPY_CONTAINERS.get(normalize_codec(codec))
+
+async def probe_audio_codec(input_path):
+    """Returns the codec name of the first audio stream, or None."""
+    process = await asyncio.create_subprocess_exec(
+        "ffprobe", "-v", "error", "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name", "-of", "default=noprint_wrappers=1:nokey=1",
+        input_path,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL
+    )
+    stdout, _ = await process.communicate()
+    if process.returncode != 0:
+        return None
+    return stdout.decode(errors="ignore").strip() or None
+
+async def cut_audio(source, output_base, start_time, end_time, codec=None, input_args=()):
+    """
+    Seeks, cuts and encodes audio in a single ffmpeg run.
+
+    The source is read once from ``start_time`` and either encoded to MP3
+    or, when ``copy_extension(codec)`` allows it, stream-copied into a
+    matching container. The CPU time ffmpeg used is logged. Encodes hold
+    a single CPU slot: the MP3 encoder doesn't use more threads.
+
+    Args:
+        source (str): Local path or remote URL of the audio (or video)
+        output_base (str): Output path without extension
+        start_time (int): Start time in seconds
+        end_time (int): End time in seconds
+        codec (str): Audio codec of the source, if known
+        input_args (list): Extra ffmpeg input options (e.g. HTTP headers)
+
+    Returns:
+        tuple: (file_path, file_size) if successful, or (None, None) if failed
+    """
+    extension = copy_extension(codec)
+    if extension:
+        codec_args = ["-c:a", "copy"]
+    else:
+        extension = "mp3"
+        codec_args = ["-c:a", "libmp3lame", "-q:a", "2"]
+    output_path = f"{output_base}.{extension}"
+
+    command = [
+        "-ss", str(start_time),  # Input seeking: only the selection is decoded
+        "-t", str(end_time - start_time),
+        *input_args, "-i", source,
+        "-map", "0:a:0", "-vn",
+        *codec_args,
+        output_path
+    ]
+
+    # The source may be a signed URL and the headers may carry cookies, keep them out of the log
+    logger.debug(f"Running FFmpeg audio trim: {start_time}-{end_time}s -> {output_path} ({' '.join(codec_args)})")
+
+    try:
+        result = await run_ffmpeg(command, duration=end_time - start_time, label="audio trim")
+
+        if result.ok and os.path.exists(output_path):
+            file_size = os.path.getsize(output_path)
+            logger.info(
+                f"Audio trimming successful ({'stream copy' if codec_args[1] == 'copy' else 'mp3'}). "
+                f"Output file: {output_path}, Size: {file_size} bytes ({result.summary()})"
+            )
+            return output_path, file_size
+
+        logger.error(f"FFmpeg audio trim error (return code {result.returncode}): {result.error or result.stderr}")
+        return None, None
+    except Exception as e:
+        logger.error(f"Exception during audio trim: {str(e)}", exc_info=True)
+        return None, None
+
 async def trim_audio(input_path, start_time, end_time):
     """
     Trims an audio file using ffmpeg.
+
+    The source (native bestaudio or a cached video) is cut and encoded in
+    one run, see ``cut_audio``.
     
     Args:
         input_path (str): Path to the audio file
@@ -213,84 +325,110 @@ async def trim_audio(input_path, start_time, end_time):
     if not os.path.exists(input_path):
         logger.error(f"Input file does not exist: {input_path}")
         return None, None
-        
-    output_path = input_path.rsplit(".", 1)[0] + f"_trim_{start_time}_{end_time}.mp3"
 
     # Check if ffmpeg is installed
-    try:
-        subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True)
-    except (subprocess.SubprocessError, FileNotFoundError):
+    toolchain = await get_toolchain()
+    if not toolchain.has_ffmpeg:
         logger.error("FFmpeg not found. Please install FFmpeg.")
         return None, None
 
-    command = [
-        "ffmpeg", "-i", input_path, 
-        "-ss", str(start_time), 
-        "-to", str(end_time),
-        "-acodec", "libmp3lame", 
-        "-q:a", "2",
-        "-y", output_path
-    ]
-
-    logger.debug(f"Running FFmpeg audio trim command: {' '.join(command)}")
+    codec = await probe_audio_codec(input_path) if AUDIO_TRIM_FORMAT == "copy" else None
+    if not copy_extension(codec) and not toolchain.has_encoder("libmp3lame"):
+        logger.warning("libmp3lame not available, trimming with stream copy")
+        return await trim_audio_alternative(input_path, start_time, end_time)
 
-    try:
-        process = await asyncio.create_subprocess_exec(
-            *command, 
-            stdout=asyncio.subprocess.PIPE, 
-            stderr=asyncio.subprocess.PIPE
-        )
+    output_base = derived_path(input_path, f"_trim_{start_time}_{end_time}")
+    trimmed_path, file_size = await cut_audio(input_path, output_base, start_time, end_time, codec=codec)
+    if trimmed_path:
+        return trimmed_path, file_size
 
-        stdout, stderr = await process.communicate()
-
-        if process.returncode == 0 and os.path.exists(output_path):
-            file_size = os.path.getsize(output_path)
-            logger.info(f"Audio trimming successful. Output file: {output_path}, Size: {file_size} bytes")
-            return output_path, file_size
-        else:
-            logger.error(f"FFmpeg audio trim error (return code {process.returncode}): {stderr.decode()}")
-            # Try alternative approach
-            return await trim_audio_alternative(input_path, start_time, end_time)
-    except Exception as e:
-        logger.error(f"Exception during audio trim: {str(e)}", exc_info=True)
-        return None, None
+    # Try alternative approach
+    return await trim_audio_alternative(input_path, start_time, end_time)
 
 async def trim_audio_alternative(input_path, start_time, end_time):
     """Alternative audio trimming method that uses a different FFmpeg approach"""
-    output_path = input_path.rsplit(".", 1)[0] + f"_trim_alt_{start_time}_{end_time}.mp3"
+    # Stream copy needs a container that fits the source codec
+    extension = COPY_CONTAINERS.get(normalize_codec(await probe_audio_codec(input_path)), "mka")
+    output_path = derived_path(input_path, f"_trim_alt_{start_time}_{end_time}.{extension}")
     
     # Different FFmpeg command that may work in some cases where the other fails
     command = [
-        "ffmpeg",
         "-ss", str(start_time),  # Place -ss before -i for faster seeking
         "-i", input_path,
         "-t", str(end_time - start_time),  # Duration instead of end time
+        "-vn",
         "-acodec", "copy",  # Use stream copy (no re-encoding, faster but less precise)
-        "-y", output_path
+        output_path
     ]
     
-    logger.debug(f"Running alternative FFmpeg audio trim command: {' '.join(command)}")
+    logger.debug(f"Running alternative FFmpeg audio trim command: ffmpeg {' '.join(command)}")
     
     try:
-        process = await asyncio.create_subprocess_exec(
-            *command, 
-            stdout=asyncio.subprocess.PIPE, 
-            stderr=asyncio.subprocess.PIPE
-        )
-
-        stdout, stderr = await process.communicate()
+        result = await run_ffmpeg(command, duration=end_time - start_time, label="audio trim (copy)")
 
-        if process.returncode == 0 and os.path.exists(output_path):
+        if result.ok and os.path.exists(output_path):
             file_size = os.path.getsize(output_path)
-            logger.info(f"Alternative audio trimming successful. Output file: {output_path}, Size: {file_size} bytes")
+            logger.info(f"Alternative audio trimming successful. Output file: {output_path}, Size: {file_size} bytes ({result.summary()})")
             return output_path, file_size
         else:
-            logger.error(f"Alternative FFmpeg audio trim error (return code {process.returncode}): {stderr.decode()}")
+            logger.error(f"Alternative FFmpeg audio trim error (return code {result.returncode}): {result.error or result.stderr}")
             return None, None
     except Exception as e:
         logger.error(f"Exception during alternative audio trim: {str(e)}", exc_info=True)
         return None, None
 
+async def cut_audio_from_url(url, start_time, end_time):
+    """
+    Cuts an audio section straight from the remote native bestaudio stream.
+
+    ffmpeg seeks in the stream over HTTP, so only the data around the
+    section is fetched, and the seek, cut and encode are a single run with
+    no intermediate file.
+
+    Returns:
+        tuple: (file_path, file_size), or (None, None) if the stream can't
+            be seeked directly (e.g. DASH segments) or the cut failed
+    """
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'cookiefile': YOUTUBE_FILE if os.path.exists(YOUTUBE_FILE) else None,
+        'quiet': True,
+        'noplaylist': True,
+    }
+    try:
+        info, _ = await run_ytdlp(ydl_opts, url, download=False)
+    except Exception as e:
+        logger.warning(f"Could not resolve the audio stream of {url}: {e}")
+        return None, None
+
+    if not info or not info.get("url") or info.get("protocol") not in SEEKABLE_PROTOCOLS:
+        return None, None
+
+    headers = "".join(f"{name}: {value}\r\n" for name, value in (info.get("http_headers") or {}).items())
+    output_base = os.path.join(
+        DOWNLOAD_DIR, f"{sanitize_filename(info.get('title') or 'audio')}_{info.get('id')}_trim_{start_time}_{end_time}"
+    )
+    return await cut_audio(
+        info["url"], output_base, start_time, end_time,
+        codec=info.get("acodec"), input_args=["-headers", headers] if headers else []
+    )
+
+async def download_section(url, start_time, end_time, is_audio=False):
+    """
+    Fetches only [start_time, end_time] of the media, already cut.
+
+    Returns:
+        tuple: (file_path, file_size), or (None, None) if the source can't be
+            fetched by section and has to be downloaded in full
+    """
+    if is_audio:
+        return await cut_audio_from_url(url, start_time, end_time)
+
+    trimmed_path = await download_media(url, is_audio=False, section=(start_time, end_time))
+    if not trimmed_path:
+        return None, None
+    return trimmed_path, os.path.getsize(trimmed_path)
+
 async def process_video_trim(url, start_time, end_time):
     """
     Process a video trim request - downloads video and trims it.
@@ -318,28 +456,30 @@ async def process_video_trim(url, start_time, end_time):
             logger.error(f"Invalid video trim range: Start time ({start_seconds}s) must be less than end time ({end_seconds}s)")
             return None, None
 
-        # Download the video
-        logger.info(f"Downloading video for trimming from: {url}")
-        video_path = await download_media(url, is_audio=False)
-
-        if not video_path:
-            logger.error("Failed to download video for trimming")
-            return None, None
-
-        # Get original file size for logging
-        orig_size = os.path.getsize(video_path)
-        logger.info(f"Downloaded video file: {video_path}, Size: {orig_size} bytes")
-
-        # Trim the video
-        logger.info(f"Trimming video: Start: {start_seconds}s, End: {end_seconds}s")
-        trimmed_path, file_size = await trim_video(video_path, start_seconds, end_seconds)
-
-        # Clean up the original downloaded file
-        try:
-            os.remove(video_path)
-            logger.info(f"Removed original video file: {video_path}")
-        except Exception as e:
-            logger.warning(f"Could not remove original video file {video_path}: {e}")
+        # A source downloaded earlier for this media is trimmed locally
+        video_key = source_key(url, VIDEO_SOURCE)
+        if not source_cache.lookup(video_key):
+            # Fetch only the requested section when the source can be seeked
+            logger.info(f"Downloading video section {start_seconds}-{end_seconds}s from: {url}")
+            trimmed_path, file_size = await download_section(url, start_seconds, end_seconds)
+            if trimmed_path:
+                logger.info(f"Video section downloaded directly. Output file: {trimmed_path}, Size: {file_size} bytes")
+                return trimmed_path, file_size
+            logger.warning(f"Section download not possible, downloading full video for trimming from: {url}")
+
+        # The full video stays in the source cache for later trims
+        async with source_cache.source(
+            video_key, lambda: download_media(url, is_audio=False)
+        ) as video_path:
+            if not video_path:
+                logger.error("Failed to download video for trimming")
+                return None, None
+
+            logger.info(f"Using video source: {video_path}, Size: {os.path.getsize(video_path)} bytes")
+
+            # Trim the video
+            logger.info(f"Trimming video: Start: {start_seconds}s, End: {end_seconds}s")
+            trimmed_path, file_size = await trim_video(video_path, start_seconds, end_seconds)
 
         if trimmed_path:
             return trimmed_path, file_size
@@ -378,28 +518,31 @@ async def process_audio_trim(url, start_time, end_time):
             logger.error(f"Invalid audio trim range: Start time ({start_seconds}s) must be less than end time ({end_seconds}s)")
             return None, None
 
-        # Download the audio
-        logger.info(f"Downloading audio for trimming from: {url}")
-        audio_path = await download_media(url, is_audio=True)
-
-        if not audio_path:
-            logger.error("Failed to download audio for trimming")
-            return None, None
-
-        # Get original file size for logging
-        orig_size = os.path.getsize(audio_path)
-        logger.info(f"Downloaded audio file: {audio_path}, Size: {orig_size} bytes")
-
-        # Trim the audio
-        logger.info(f"Trimming audio: Start: {start_seconds}s, End: {end_seconds}s")
-        trimmed_path, file_size = await trim_audio(audio_path, start_seconds, end_seconds)
-
-        # Clean up the original downloaded file
-        try:
-            os.remove(audio_path)
-            logger.info(f"Removed original audio file: {audio_path}")
-        except Exception as e:
-            logger.warning(f"Could not remove original audio file {audio_path}: {e}")
+        # A source downloaded earlier for this media is trimmed locally
+        audio_key = source_key(url, AUDIO_SOURCE)
+        video_key = source_key(url, VIDEO_SOURCE)
+        if not source_cache.lookup(audio_key) and not source_cache.lookup(video_key):
+            # Fetch only the requested section when the source can be seeked
+            logger.info(f"Cutting audio section {start_seconds}-{end_seconds}s from the stream of: {url}")
+            trimmed_path, file_size = await download_section(url, start_seconds, end_seconds, is_audio=True)
+            if trimmed_path:
+                logger.info(f"Audio section cut directly from the stream. Output file: {trimmed_path}, Size: {file_size} bytes")
+                return trimmed_path, file_size
+            logger.warning(f"Section download not possible, downloading full audio for trimming from: {url}")
+
+        # The full native audio stays in the source cache for later trims
+        async with source_cache.source(
+            audio_key, lambda: download_media(url, is_audio=True), alternatives=[video_key]
+        ) as audio_path:
+            if not audio_path:
+                logger.error("Failed to download audio for trimming")
+                return None, None
+
+            logger.info(f"Using audio source: {audio_path}, Size: {os.path.getsize(audio_path)} bytes")
+
+            # Trim the audio
+            logger.info(f"Trimming audio: Start: {start_seconds}s, End: {end_seconds}s")
+            trimmed_path, file_size = await trim_audio(audio_path, start_seconds, end_seconds)
 
         if trimmed_path:
             return trimmed_path, file_size
@@ -409,4 +552,78 @@ async def process_audio_trim(url, start_time, end_time):
 
     except Exception as e:
         logger.error(f"Error in process_audio_trim: {e}", exc_info=True)
-        return None, None
\ No newline at end of file
+        return None, None
+
+async def trim_ranges(url, ranges, is_audio=False):
+    """
+    Cuts several ranges out of one media, yielding each clip as soon as it's ready.
+
+    The media is probed once. When the ranges cover a small part of it, each
+    section is fetched on its own (reusing the cached probe); otherwise the
+    full source is downloaded once into the source cache and every range is
+    cut from it locally. At most TRIM_CONCURRENCY segments are processed at
+    the same time.
+
+    Args:
+        url (str): URL of the media
+        ranges (list): (start_time, end_time) pairs in HH:MM:SS format
+        is_audio (bool): Whether to cut audio clips instead of video
+
+    Yields:
+        tuple: (start_time, end_time, file_path, file_size) in completion
+            order, with file_path None for ranges that failed
+    """
+    audio_key = source_key(url, AUDIO_SOURCE)
+    video_key = source_key(url, VIDEO_SOURCE)
+    key, alternatives = (audio_key, [video_key]) if is_audio else (video_key, [])
+    trim = trim_audio if is_audio else trim_video
+
+    use_sections = False
+    if not source_cache.lookup_any([key, *alternatives]):
+        probe = await probe_media(url)
+        duration = probe and probe.get("duration")
+        covered = sum(
+            max(0, (time_to_seconds(end) or 0) - (time_to_seconds(start) or 0)) for start, end in ranges
+        )
+        use_sections = bool(duration) and covered < duration * SECTION_BATCH_RATIO
+        logger.info(
+            f"Trimming {len(ranges)} ranges ({covered}s of {duration}s) from {url} "
+            f"{'by section' if use_sections else 'from one full download'}"
+        )
+
+    slots = asyncio.Semaphore(TRIM_CONCURRENCY)
+
+    async def cut(start_time, end_time):
+        start_seconds, end_seconds = time_to_seconds(start_time), time_to_seconds(end_time)
+        if start_seconds is None or end_seconds is None or start_seconds >= end_seconds:
+            logger.error(f"Invalid trim range: {start_time}-{end_time}")
+            return start_time, end_time, None, None
+
+        try:
+            async with slots:
+                if use_sections:
+                    trimmed_path, file_size = await download_section(url, start_seconds, end_seconds, is_audio)
+                    if trimmed_path:
+                        return start_time, end_time, trimmed_path, file_size
+                    logger.warning(f"Section download failed for {start_time}-{end_time}, using the full source")
+
+                # Concurrent cuts share one download of the source
+                async with source_cache.source(
+                    key, lambda: download_media(url, is_audio=is_audio), alternatives=alternatives
+                ) as source_path:
+                    if not source_path:
+                        return start_time, end_time, None, None
+                    trimmed_path, file_size = await trim(source_path, start_seconds, end_seconds)
+                    return start_time, end_time, trimmed_path, file_size
+        except Exception as e:
+            logger.error(f"Error trimming {start_time}-{end_time} from {url}: {e}", exc_info=True)
+            return start_time, end_time, None, None
+
+    tasks = [asyncio.create_task(cut(start_time, end_time)) for start_time, end_time in ranges]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        # The consumer stopped early; don't leave cuts running
+        for task in tasks:
+            task.cancel()
@@ -1,18 +1,15 @@
 import os
-import asyncio
 import yt_dlp
-import telebot
 import logging
 from utils.logger import setup_logging
 from utils.thumb_generator import generate_thumbnail
-from config import DOWNLOAD_DIR, X_FILE, API_TOKEN
+from utils.ytdlp_runner import run_ytdlp
+from utils.media_id import canonical_media_id
+from config import DOWNLOAD_DIR, X_FILE
 
 # Initialize logger
 logger = setup_logging(logging.DEBUG)
 
-# Initialize Telegram bot
-bot = telebot.TeleBot(API_TOKEN, parse_mode='HTML')
-
 async def download_twitter_media(url):
     """
     Downloads a Twitter/X video in HD and returns (file_path, file_size, thumbnail_path).
@@ -38,29 +35,29 @@ async def download_twitter_media(url):
     }
 
     try:
-        loop = asyncio.get_running_loop()
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info_dict = await loop.run_in_executor(None, ydl.extract_info, url, True)
-            if not info_dict or "requested_downloads" not in info_dict:
-                logger.error("❌ No video found.")
-                return None, None, None
+        info_dict, _ = await run_ytdlp(ydl_opts, url)
+        if not info_dict or "requested_downloads" not in info_dict:
+            logger.error("❌ No video found.")
+            return None, None, None
 
-            file_path = info_dict["requested_downloads"][0]["filepath"]
+        file_path = info_dict["requested_downloads"][0]["filepath"]
 
-            # Check if file exists before getting size
-            file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        # Check if file exists before getting size
+        file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
 
-            # ✅ Await async function & check for None
-            thumbnail_path = await generate_thumbnail(file_path)
+        # ✅ Await async function & check for None
+        thumbnail_path = await generate_thumbnail(
+            file_path, media_id=canonical_media_id(url), thumbnail_url=info_dict.get("thumbnail")
+        )
 
-            if thumbnail_path and os.path.exists(thumbnail_path):
-                logger.info(f"✅ Thumbnail generated: {thumbnail_path}")
-            else:
-                logger.warning("⚠️ Thumbnail generation failed.")
+        if thumbnail_path and os.path.exists(thumbnail_path):
+            logger.info(f"✅ Thumbnail generated: {thumbnail_path}")
+        else:
+            logger.warning("⚠️ Thumbnail generation failed.")
 
-            logger.info(f"✅ Download completed: {file_path}")
+        logger.info(f"✅ Download completed: {file_path}")
 
-            return file_path, file_size, thumbnail_path
+        return file_path, file_size, thumbnail_path
 
     except yt_dlp.DownloadError as e:
         logger.error(f"⚠️ Download failed: {e}")
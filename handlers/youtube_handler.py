@@ -1,10 +1,13 @@
 import os
-import asyncio
 import yt_dlp
 import logging
 from utils.sanitize import sanitize_filename
 from config import YOUTUBE_FILE, DOWNLOAD_DIR
 from utils.logger import setup_logging
+from utils.ytdlp_runner import run_ytdlp
+from utils.source_cache import source_cache, source_key, VIDEO_SOURCE, AUDIO_SOURCE
+from utils.storage import storage
+from utils.ffmpeg_runner import run_ffmpeg
 import sys
 
 
@@ -24,21 +27,18 @@ async def process_youtube(url):
         'verbose': True,
     }
     try:
-        loop = asyncio.get_running_loop()
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info_dict = await loop.run_in_executor(None, ydl.extract_info, url, True)
-            if not info_dict:
-                logger.error("❌ No info_dict returned. Download failed.")
-                return None, 0, "❌ No video information found."
+        info_dict, file_path = await run_ytdlp(ydl_opts, url)
+        if not info_dict:
+            logger.error("❌ No info_dict returned. Download failed.")
+            return None, 0, "❌ No video information found."
 
-            # Handle unavailable video error directly
-            if 'entries' in info_dict and not info_dict['entries']:
-                logger.error("❌ Video unavailable or restricted.")
-                return None, 0, "❌ Video unavailable or restricted."
+        # Handle unavailable video error directly
+        if 'entries' in info_dict and not info_dict['entries']:
+            logger.error("❌ Video unavailable or restricted.")
+            return None, 0, "❌ Video unavailable or restricted."
 
-            file_path = ydl.prepare_filename(info_dict)
-            file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-            return file_path, file_size, None
+        file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        return file_path, file_size, None
     except yt_dlp.utils.ExtractorError as e:
         logger.error(f"❌ Extractor Error: {e}")
         return None, 0, "❌ Video may be private, deleted, or region-restricted."
@@ -46,9 +46,33 @@ async def process_youtube(url):
         logger.error(f"⚠️ Error downloading video: {e}")
         return None, 0, str(e)
 
+async def audio_from_source(source_path):
+    """Extracts a 320k MP3 from a locally cached video or native audio with ffmpeg."""
+    base_name = os.path.splitext(os.path.basename(source_path))[0]
+    output_path = os.path.join(DOWNLOAD_DIR, f"{base_name}.mp3")
+    result = await run_ffmpeg([
+        "-i", source_path,
+        "-vn", "-c:a", "libmp3lame", "-b:a", "320k", output_path,
+    ], label="audio extraction")
+    if not result.ok or not os.path.exists(output_path):
+        logger.error(f"❌ Audio extraction from {source_path} failed: {result.error or result.stderr}")
+        return None
+    return output_path
+
 async def extract_audio_ffmpeg(url):
     """Download and extract audio from a YouTube video asynchronously."""
     os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+
+    # Native audio (kept by audio trims) or a full video downloaded earlier
+    # is converted locally instead of downloading again
+    cached_source = source_cache.lookup_any([source_key(url, AUDIO_SOURCE), source_key(url, VIDEO_SOURCE)])
+    if cached_source:
+        logger.info(f"🗃️ Extracting audio from cached source: {cached_source}")
+        with storage.pinned(cached_source):
+            audio_filename = await audio_from_source(cached_source)
+        if audio_filename:
+            return audio_filename, os.path.getsize(audio_filename)
+
     audio_opts = {
         'format': 'bestaudio/best',
         'outtmpl': f'{DOWNLOAD_DIR}/{sanitize_filename("%(title)s")}.%(ext)s',
@@ -62,16 +86,14 @@ async def extract_audio_ffmpeg(url):
         'verbose': True,
     }
     try:
-        loop = asyncio.get_running_loop()
-        with yt_dlp.YoutubeDL(audio_opts) as ydl:
-            info_dict = await loop.run_in_executor(None, ydl.extract_info, url, True)
-            if not info_dict:
-                logger.error("❌ No info_dict returned. Audio download failed.")
-                return None, 0
+        info_dict, file_path = await run_ytdlp(audio_opts, url)
+        if not info_dict:
+            logger.error("❌ No info_dict returned. Audio download failed.")
+            return None, 0
 
-            audio_filename = ydl.prepare_filename(info_dict).replace('.webm', '.mp3').replace('.m4a', '.mp3')
-            file_size = os.path.getsize(audio_filename) if os.path.exists(audio_filename) else 0
-            return audio_filename, file_size
+        audio_filename = file_path.replace('.webm', '.mp3').replace('.m4a', '.mp3')
+        file_size = os.path.getsize(audio_filename) if os.path.exists(audio_filename) else 0
+        return audio_filename, file_size
     except yt_dlp.utils.ExtractorError as e:
         logger.error(f"❌ Extractor Error: {e}")
         return None, 0
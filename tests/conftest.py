@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Tests import the bot's modules from the repository root, and run in a
+# scratch directory so the databases and download folders they create at
+# import time don't land in the checkout
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+os.environ.setdefault("BOT_TOKEN", "1:test")
+os.chdir(tempfile.mkdtemp(prefix="bot-tests-"))
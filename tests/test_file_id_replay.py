@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import bot
+from utils.file_id_cache import FileIdCache
+
+
+class FakeBot:
+    """Records the Bot API calls send_album makes."""
+
+    def __init__(self, fail=None):
+        self.calls = []
+        self.fail = fail
+
+    async def send_video(self, chat_id, media, **kwargs):
+        if self.fail:
+            raise self.fail
+        self.calls.append(("send_video", media))
+        return SimpleNamespace(video=SimpleNamespace(file_id=media))
+
+    async def send_media_group(self, chat_id, media):
+        self.calls.append(("send_media_group", [(item.type, item.media) for item in media]))
+        return [SimpleNamespace() for _ in media]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = FileIdCache(str(tmp_path / "file_ids.db"))
+    monkeypatch.setattr(bot, "file_id_cache", cache)
+    yield cache
+    cache.close()
+
+
+def test_cached_file_is_resent_by_file_id(cache, monkeypatch):
+    key = ("youtube", "abc", "video")
+    cache.put(*key, [bot.sent_file(SimpleNamespace(photo=None, video=SimpleNamespace(file_id="BAACAgFILEID")))])
+    fake = FakeBot()
+    monkeypatch.setattr(bot, "bot", fake)
+
+    assert asyncio.run(bot.send_cached_files(42, key))
+    assert fake.calls == [("send_video", "BAACAgFILEID")]
+
+
+def test_cached_album_is_resent_as_media_group(cache, monkeypatch):
+    key = ("instagram", "post", "image")
+    cache.put(*key, [("photo", "PHOTO1"), ("video", "VIDEO1")])
+    fake = FakeBot()
+    monkeypatch.setattr(bot, "bot", fake)
+
+    assert asyncio.run(bot.send_cached_files(42, key))
+    assert fake.calls == [("send_media_group", [("photo", "PHOTO1"), ("video", "VIDEO1")])]
+
+
+def test_failed_replay_drops_the_entry(cache, monkeypatch):
+    key = ("youtube", "abc", "video")
+    cache.put(*key, [("video", "BAACAgFILEID")])
+    monkeypatch.setattr(bot, "bot", FakeBot(fail=ConnectionError("network down")))
+
+    assert not asyncio.run(bot.send_cached_files(42, key))
+    assert cache.get(*key) is None
@@ -0,0 +1,29 @@
+import time
+
+from utils.job_queue import PersistentJobQueue, DEAD
+
+
+def expire_leases(queue):
+    queue._conn.execute("UPDATE jobs SET lease_until = ?", (time.time() - 1,))
+
+
+def test_expired_lease_is_handed_out_again(tmp_path):
+    queue = PersistentJobQueue(str(tmp_path / "jobs.db"), max_attempts=3)
+    job_id = queue.put_nowait({"url": "https://example.com"})
+
+    assert queue.get_nowait()[0] == job_id
+    expire_leases(queue)
+    assert queue.get_nowait()[0] == job_id
+
+
+def test_expired_lease_out_of_attempts_is_parked_as_dead(tmp_path):
+    queue = PersistentJobQueue(str(tmp_path / "jobs.db"), max_attempts=2)
+    job_id = queue.put_nowait({"url": "https://example.com"})
+
+    for _ in range(2):
+        assert queue.get_nowait()[0] == job_id
+        expire_leases(queue)
+
+    assert queue.get_nowait() is None
+    state, = queue._conn.execute("SELECT state FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    assert state == DEAD
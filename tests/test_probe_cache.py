@@ -0,0 +1,52 @@
+import yt_dlp
+
+from utils.probe_cache import ProbeCache
+
+URL = "https://www.youtube.com/watch?v=abcdefghijk"
+
+YDL_OPTS = {"quiet": True, "no_warnings": True, "simulate": True}
+
+
+def raw_info():
+    """An extracted video with separate video and audio formats, as a probe sees it."""
+    return {
+        "id": "abcdefghijk",
+        "title": "probe",
+        "extractor": "youtube",
+        "extractor_key": "Youtube",
+        "webpage_url": URL,
+        "formats": [
+            {"format_id": "a1", "url": "https://media.invalid/a1", "ext": "m4a",
+             "vcodec": "none", "acodec": "mp4a.40.2", "abr": 128, "protocol": "https"},
+            {"format_id": "v1", "url": "https://media.invalid/v1", "ext": "mp4",
+             "vcodec": "avc1.640028", "acodec": "none", "height": 720, "protocol": "https"},
+        ],
+    }
+
+
+def select(ydl_opts, info, download):
+    with yt_dlp.YoutubeDL({**YDL_OPTS, **ydl_opts}) as ydl:
+        return ydl.process_ie_result(info, download=download)
+
+
+def test_probe_selection_is_not_reused_by_an_audio_download():
+    cache = ProbeCache()
+    probed = select({"format": "bv*+ba/b"}, raw_info(), download=False)
+    assert [fmt["format_id"] for fmt in probed["requested_formats"]] == ["v1", "a1"]
+    cache.put(URL, probed)
+
+    downloaded = select({"format": "bestaudio/best"}, cache.get(URL), download=True)
+
+    assert downloaded["format_id"] == "a1"
+    assert not downloaded.get("requested_formats")
+    assert [d["format_id"] for d in downloaded["requested_downloads"]] == ["a1"]
+
+
+def test_cached_info_keeps_the_formats():
+    cache = ProbeCache()
+    cache.put(URL, select({"format": "bv*+ba/b"}, raw_info(), download=False))
+
+    cached = cache.get(URL)
+
+    assert [fmt["format_id"] for fmt in cached["formats"]] == ["a1", "v1"]
+    assert not {"requested_formats", "requested_downloads", "format_id", "url", "ext"} & cached.keys()
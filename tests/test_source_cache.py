@@ -0,0 +1,53 @@
+import os
+import asyncio
+
+import pytest
+
+import utils.source_cache as source_cache_module
+from utils.source_cache import SourceCache
+from utils.storage import StorageManager
+
+KEY = ("youtube", "abcdefghijk", "video")
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    # Smaller than any source added below, so tracking one triggers reclamation
+    storage = StorageManager(quota=100)
+    monkeypatch.setattr(source_cache_module, "storage", storage)
+    return storage
+
+
+def downloaded_file(directory, size=1000):
+    path = os.path.join(directory, "video.mp4")
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    return path
+
+
+def test_added_source_survives_its_own_reclamation(tmp_path, storage):
+    cache = SourceCache(str(tmp_path / "sources"))
+
+    cached_path = cache.add(KEY, downloaded_file(str(tmp_path)))
+
+    assert os.path.exists(cached_path)
+    assert cache.lookup(KEY) == cached_path
+    storage.unpin(cached_path)
+
+
+def test_source_yields_a_freshly_downloaded_file_over_budget(tmp_path, storage):
+    cache = SourceCache(str(tmp_path / "sources"))
+
+    async def download():
+        return downloaded_file(str(tmp_path))
+
+    async def use_source():
+        async with cache.source(KEY, download) as path:
+            assert path is not None and os.path.exists(path)
+            return path
+
+    path = asyncio.run(use_source())
+
+    # Released once the block is done, and evictable again
+    storage.track(path)
+    assert not os.path.exists(path)
@@ -0,0 +1,151 @@
+import time
+import shutil
+import asyncio
+from contextlib import asynccontextmanager
+
+import psutil
+
+from utils.jobs import VIDEO, AUDIO, VIDEO_TRIM, AUDIO_TRIM
+
+MB = 1024 * 1024
+
+# Working memory a job needs besides the files on disk (yt-dlp, ffmpeg, upload)
+JOB_MEMORY = {
+    VIDEO: 256 * MB,
+    AUDIO: 128 * MB,
+    VIDEO_TRIM: 384 * MB,  # libx264 re-encode
+    AUDIO_TRIM: 128 * MB,
+}
+
+# Disk needed per byte of source media: separate streams + merged output,
+# plus the trimmed copy for trims
+DISK_FACTORS = {
+    VIDEO: 2.0,
+    AUDIO: 1.0,
+    VIDEO_TRIM: 2.5,
+    AUDIO_TRIM: 1.0,
+}
+
+DEFAULT_MEDIA_SIZE = 200 * MB  # Assumed when the probe can't tell
+AUDIO_BYTES_PER_SECOND = (160 + 320) * 1000 // 8  # Source audio + 320k MP3
+
+
+class AdmissionRejected(Exception):
+    """Raised when a job's reservation can't be satisfied."""
+
+
+def estimate_requirements(kind, probe):
+    """
+    Estimates the disk and memory a job will need.
+
+    Args:
+        kind (str): Job kind
+        probe (dict | None): Result of ``probe_media``
+
+    Returns:
+        tuple: (disk_bytes, memory_bytes)
+    """
+    probe = probe or {}
+    duration = probe.get("duration")
+
+    if kind in (AUDIO, AUDIO_TRIM) and duration:
+        media_size = duration * AUDIO_BYTES_PER_SECOND
+    else:
+        media_size = probe.get("filesize") or DEFAULT_MEDIA_SIZE
+
+    disk = int(media_size * DISK_FACTORS.get(kind, 2.0))
+    return disk, JOB_MEMORY.get(kind, 256 * MB)
+
+
+class AdmissionController:
+    """
+    Reserves disk and memory for jobs before they start.
+
+    A reservation is granted when it fits into the free disk space of
+    ``disk_path`` and the system's available memory, minus the configured
+    headroom and minus everything already reserved by running jobs.
+    Otherwise the job waits until running jobs release their reservations
+    (or free space appears). A job that can't fit even on an idle server is
+    rejected right away.
+
+    Disk is reserved against a snapshot of the free space taken when the
+    first of the running jobs was admitted, not the live reading: bytes a
+    running job has already written would otherwise count twice, once as
+    used space and once in its reservation. The live reading still caps the
+    result, and the snapshot is lowered on every release (files kept by the
+    finished job) and dropped once no reservations are left.
+    """
+
+    def __init__(self, disk_path, disk_headroom=0, memory_headroom=0, poll_interval=5.0):
+        self.disk_path = disk_path
+        self.disk_headroom = disk_headroom
+        self.memory_headroom = memory_headroom
+        self.poll_interval = poll_interval
+        self._reserved_disk = 0
+        self._reserved_memory = 0
+        self._disk_snapshot = None  # Free disk before the running jobs wrote anything
+        self._changed = asyncio.Condition()
+
+    def _free_disk(self):
+        live = shutil.disk_usage(self.disk_path).free
+        if self._disk_snapshot is None:
+            return live - self._reserved_disk
+        return min(live, self._disk_snapshot - self._reserved_disk)
+
+    def free_resources(self):
+        """Returns (free_disk, available_memory) after headroom and reservations."""
+        free_disk = self._free_disk() - self.disk_headroom
+        free_memory = psutil.virtual_memory().available - self.memory_headroom - self._reserved_memory
+        return free_disk, free_memory
+
+    def _fits(self, disk, memory):
+        free_disk, free_memory = self.free_resources()
+        return disk <= free_disk and memory <= free_memory
+
+    @asynccontextmanager
+    async def reserve(self, disk, memory, timeout=None):
+        """
+        Holds a reservation of ``disk`` bytes and ``memory`` bytes for the block.
+
+        Raises:
+            AdmissionRejected: If the reservation can never fit, or doesn't
+                fit within ``timeout`` seconds.
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+
+        async with self._changed:
+            while not self._fits(disk, memory):
+                if not self._reserved_disk and not self._reserved_memory:
+                    free_disk, free_memory = self.free_resources()
+                    raise AdmissionRejected(
+                        f"needs {disk // MB} MB disk / {memory // MB} MB memory, "
+                        f"only {max(free_disk, 0) // MB} MB / {max(free_memory, 0) // MB} MB available"
+                    )
+                if deadline and time.monotonic() >= deadline:
+                    raise AdmissionRejected("timed out waiting for server capacity")
+
+                # Woken up by a release, or re-check live readings periodically
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+            if self._disk_snapshot is None:
+                self._disk_snapshot = shutil.disk_usage(self.disk_path).free
+            self._reserved_disk += disk
+            self._reserved_memory += memory
+
+        try:
+            yield
+        finally:
+            async with self._changed:
+                self._reserved_disk -= disk
+                self._reserved_memory -= memory
+                if not self._reserved_disk:
+                    self._disk_snapshot = None
+                else:
+                    # Whatever the finished job left on disk is no longer free;
+                    # live free space plus the remaining reservations bounds it
+                    live = shutil.disk_usage(self.disk_path).free
+                    self._disk_snapshot = min(self._disk_snapshot, live + self._reserved_disk)
+                self._changed.notify_all()
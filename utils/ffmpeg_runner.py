@@ -0,0 +1,240 @@
+import re
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+
+from config import FFMPEG_CPU_SLOTS, FFMPEG_STALL_TIMEOUT
+from utils.logger import logger
+
+# "-benchmark" summary lines printed when ffmpeg exits
+BENCH_TIMES = re.compile(r"bench: utime=([\d.]+)s stime=([\d.]+)s")
+BENCH_MAXRSS = re.compile(r"bench: maxrss=(\d+)kB")
+
+# Log levels kept in FFmpegResult.stderr; the rest is stream info
+PROBLEM_LEVELS = ("[warning]", "[error]", "[fatal]", "[panic]")
+
+# Jobs running longer than this log their progress
+PROGRESS_LOG_AFTER = 10
+
+
+@dataclass(slots=True)
+class FFmpegResult:
+    """Outcome and resource usage of one ffmpeg invocation."""
+
+    returncode: int | None
+    stderr: str = ""  # Warnings and errors only
+    error: str | None = None  # Why the runner killed it ("timeout", "stalled") or couldn't start it
+    wall_time: float = 0.0
+    cpu_time: float | None = None  # User + system seconds
+    max_rss_kb: int | None = None
+    speed: float | None = None  # Last reported media seconds per wall second
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and self.error is None
+
+    def summary(self):
+        cpu = f"{self.cpu_time:.2f}s" if self.cpu_time is not None else "n/a"
+        rss = f"{self.max_rss_kb // 1024} MB" if self.max_rss_kb else "n/a"
+        speed = f"{self.speed:.2f}x" if self.speed else "n/a"
+        return f"wall {self.wall_time:.2f}s, CPU {cpu}, max RSS {rss}, speed {speed}"
+
+
+class CpuSlots:
+    """
+    Weighted FIFO semaphore over the CPU cores ffmpeg may use.
+
+    Every invocation holds as many slots as it runs threads, so the sum of
+    ``-threads`` across running ffmpeg processes never exceeds the number of
+    slots. Waiters are served in arrival order; a large request at the head
+    is not overtaken by smaller ones behind it.
+
+    Only ffmpeg started through ``run_ffmpeg`` is accounted for. ffmpeg that
+    yt-dlp spawns itself (format merges, FFmpegExtractAudio, and the
+    ``force_keyframes_at_cuts`` section downloads used by trims) runs
+    outside the slots with ffmpeg's default threading.
+    """
+
+    def __init__(self, total):
+        self.total = max(1, total)
+        self.available = self.total
+        self._waiters = deque()  # (count, future)
+
+    def _wake(self):
+        while self._waiters and self._waiters[0][0] <= self.available:
+            count, waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.available -= count
+            waiter.set_result(None)
+
+    def _release(self, count):
+        self.available += count
+        self._wake()
+
+    @asynccontextmanager
+    async def hold(self, count):
+        """Holds ``count`` slots (capped to the total) for the duration of the block."""
+        count = min(max(1, count), self.total)
+        if not self._waiters and self.available >= count:
+            self.available -= count
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            entry = (count, waiter)
+            self._waiters.append(entry)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Granted just before the cancellation landed
+                    self._release(count)
+                else:
+                    self._waiters.remove(entry)
+                    self._wake()
+                raise
+        try:
+            yield
+        finally:
+            self._release(count)
+
+
+def _parse_speed(value):
+    try:
+        return float(value.rstrip("x"))
+    except ValueError:
+        return None
+
+
+async def run_ffmpeg(args, threads=1, duration=None, timeout=None,
+                     stall_timeout=FFMPEG_STALL_TIMEOUT, label="ffmpeg"):
+    """
+    Runs ``ffmpeg *args`` under the shared CPU slot pool.
+
+    The process starts once ``threads`` slots are free and gets that budget
+    as ``-threads`` on every input (decoders) and on the output (encoder),
+    plus ``-filter_threads``/``-filter_complex_threads`` for filter graphs,
+    so no stage spawns a thread per core. Its ``-progress`` output is
+    parsed for speed and ETA; the process is killed when it runs longer
+    than ``timeout``, when its output position stops advancing for
+    ``stall_timeout`` seconds, or when the calling task is cancelled. CPU
+    time and peak memory come from ``-benchmark``.
+
+    Args:
+        args (list): ffmpeg arguments without global options; the output
+            path must be the last one
+        threads (int): CPU slots to hold (1 is enough for stream copies)
+        duration (float): Seconds of media the output will cover, for
+            percentage and ETA
+        timeout (float): Maximum wall time, or None
+        stall_timeout (float): Maximum time without progress
+        label (str): Name used in the logs
+
+    Returns:
+        FFmpegResult
+    """
+    *options, output = args
+    budget = str(threads)
+    limited = []
+    for option in options:
+        if option == "-i":
+            limited += ["-threads", budget]  # Input option: applies to this input's decoder
+        limited.append(option)
+    command = [
+        "ffmpeg", "-hide_banner", "-nostats", "-loglevel", "level+info",
+        "-benchmark", "-progress", "pipe:1", "-y",
+        "-filter_threads", budget, "-filter_complex_threads", budget,
+        *limited, "-threads", budget, output,
+    ]
+
+    async with ffmpeg_slots.hold(threads):
+        started = time.monotonic()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except (FileNotFoundError, PermissionError) as e:
+            return FFmpegResult(returncode=None, error=f"ffmpeg could not be started: {e}")
+
+        result = FFmpegResult(returncode=None)
+        state = {"position": 0, "advanced": started, "logged": 0.0}
+
+        async def read_progress():
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    return
+                key, _, value = line.decode(errors="ignore").strip().partition("=")
+                if key == "out_time_us" and value.isdigit() and int(value) > state["position"]:
+                    state["position"] = int(value)
+                    state["advanced"] = time.monotonic()
+                elif key == "speed":
+                    result.speed = _parse_speed(value) or result.speed
+                elif key == "progress" and duration:
+                    log_progress()
+
+        def log_progress():
+            done = min(1.0, state["position"] / 1_000_000 / duration)
+            elapsed = time.monotonic() - started
+            if elapsed < PROGRESS_LOG_AFTER or done - state["logged"] < 0.1:
+                return
+            state["logged"] = done
+            eta = (duration - state["position"] / 1_000_000) / result.speed if result.speed else None
+            logger.info(
+                f"⏳ {label} {done:.0%}, speed {result.speed or 0:.2f}x"
+                + (f", ETA {eta:.0f}s" if eta is not None else "")
+            )
+
+        work = asyncio.ensure_future(asyncio.gather(read_progress(), process.stderr.read(), process.wait()))
+        try:
+            while not work.done():
+                await asyncio.wait([work], timeout=1)
+                now = time.monotonic()
+                if work.done():
+                    break
+                if timeout and now - started > timeout:
+                    result.error = "timeout"
+                elif now - state["advanced"] > stall_timeout:
+                    result.error = "stalled"
+                if result.error:
+                    break
+        except asyncio.CancelledError:
+            await _kill(process, work)
+            logger.info(f"🛑 {label} cancelled, ffmpeg killed")
+            raise
+
+        if result.error:
+            await _kill(process, work)
+            result.returncode = process.returncode
+            logger.error(f"❌ {label} {result.error}, ffmpeg killed after {time.monotonic() - started:.0f}s")
+        else:
+            _, stderr, result.returncode = work.result()
+            stderr = stderr.decode(errors="ignore")
+            times = BENCH_TIMES.search(stderr)
+            maxrss = BENCH_MAXRSS.search(stderr)
+            result.cpu_time = float(times.group(1)) + float(times.group(2)) if times else None
+            result.max_rss_kb = int(maxrss.group(1)) if maxrss else None
+            result.stderr = "\n".join(
+                line for line in stderr.splitlines() if any(level in line for level in PROBLEM_LEVELS)
+            )
+
+        result.wall_time = time.monotonic() - started
+
+    logger.debug(f"{label}: exit {result.returncode}, {result.summary()}")
+    return result
+
+
+async def _kill(process, work):
+    if process.returncode is None:
+        process.kill()
+    await process.wait()
+    work.cancel()
+    with suppress(asyncio.CancelledError):
+        await work
+
+
+# Shared by every ffmpeg invocation in the bot
+ffmpeg_slots = CpuSlots(FFMPEG_CPU_SLOTS)
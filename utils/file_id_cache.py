@@ -0,0 +1,72 @@
+import json
+import time
+import sqlite3
+
+
+class FileIdCache:
+    """
+    Persistent index from (extractor, media ID, variant) to Telegram file IDs.
+
+    Once a file has been uploaded, Telegram can re-send it by ``file_id``
+    without us downloading or uploading anything. Entries expire after
+    ``ttl`` seconds and are dropped when Telegram rejects a stale ID.
+    """
+
+    def __init__(self, path, ttl=30 * 24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS file_ids (
+                extractor TEXT NOT NULL,
+                media_id TEXT NOT NULL,
+                variant TEXT NOT NULL,
+                files TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (extractor, media_id, variant)
+            )
+            """
+        )
+
+    def get(self, extractor, media_id, variant):
+        """
+        Returns the cached files as a list of (media_type, file_id), or None.
+        """
+        row = self._conn.execute(
+            "SELECT files, created_at FROM file_ids WHERE extractor = ? AND media_id = ? AND variant = ?",
+            (extractor, media_id, variant),
+        ).fetchone()
+        if row is None:
+            return None
+
+        files, created_at = row
+        if time.time() - created_at > self.ttl:
+            self.invalidate(extractor, media_id, variant)
+            return None
+        return [tuple(entry) for entry in json.loads(files)]
+
+    def put(self, extractor, media_id, variant, files):
+        """Stores the (media_type, file_id) pairs Telegram returned for a media variant."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO file_ids (extractor, media_id, variant, files, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (extractor, media_id, variant, json.dumps(files), time.time()),
+        )
+
+    def invalidate(self, extractor, media_id, variant):
+        self._conn.execute(
+            "DELETE FROM file_ids WHERE extractor = ? AND media_id = ? AND variant = ?",
+            (extractor, media_id, variant),
+        )
+
+    def purge_expired(self):
+        """Deletes expired entries. Returns the number removed."""
+        return self._conn.execute(
+            "DELETE FROM file_ids WHERE created_at < ?", (time.time() - self.ttl,)
+        ).rowcount
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,88 @@
+import time
+import asyncio
+import importlib
+
+from utils.logger import logger
+
+# Optional module-level coroutine function run by ``prewarm`` after import,
+# e.g. to open a session before the first request needs it
+WARM_UP_HOOK = "warm_up"
+
+
+class HandlerRegistry:
+    """
+    Resolves handler names to functions, importing their modules on first use.
+
+    Platform modules pull in heavy or fragile dependencies (instaloader,
+    Pillow/NumPy, playwright, ...), so the bot registers them by dotted path
+    instead of importing them at startup. A handler's module is imported the
+    first time it is requested, in a worker thread so the event loop keeps
+    serving updates, and the function is cached afterwards. ``prewarm``
+    imports everything in the background once the bot is up.
+    """
+
+    def __init__(self, handlers):
+        """
+        Args:
+            handlers (dict): Handler name -> "package.module:function"
+        """
+        self._targets = {
+            name: tuple(target.split(":", 1)) for name, target in handlers.items()
+        }
+        self._handlers = {}
+        self._loading = {}  # Module name -> import task
+        self._warmed = set()
+
+    def __contains__(self, name):
+        return name in self._targets
+
+    def is_loaded(self, name):
+        return name in self._handlers
+
+    async def _import(self, module_name):
+        task = self._loading.get(module_name)
+        # A failed import is retried by the next caller
+        if task is None or (task.done() and (task.cancelled() or task.exception())):
+            task = self._loading[module_name] = asyncio.ensure_future(self._import_module(module_name))
+        # Shielded so a cancelled caller doesn't abort an import others wait on
+        return await asyncio.shield(task)
+
+    async def _import_module(self, module_name):
+        started = time.perf_counter()
+        module = await asyncio.to_thread(importlib.import_module, module_name)
+        logger.info(f"📦 Loaded {module_name} in {time.perf_counter() - started:.2f}s")
+        return module
+
+    async def get(self, name):
+        """Returns the handler registered as ``name``, importing its module if needed."""
+        handler = self._handlers.get(name)
+        if handler is None:
+            module_name, attribute = self._targets[name]
+            module = await self._import(module_name)
+            handler = self._handlers[name] = getattr(module, attribute)
+        return handler
+
+    async def call(self, name, *args, **kwargs):
+        """Awaits the handler registered as ``name`` with the given arguments."""
+        return await (await self.get(name))(*args, **kwargs)
+
+    async def prewarm(self, delay=0):
+        """
+        Imports every registered module in the background, one at a time,
+        and runs its ``warm_up`` hook. Failures are logged and left for the
+        first real request to surface.
+        """
+        await asyncio.sleep(delay)
+        started = time.perf_counter()
+        for name, (module_name, _) in self._targets.items():
+            try:
+                await self.get(name)
+                if module_name in self._warmed:
+                    continue
+                self._warmed.add(module_name)
+                hook = getattr(await self._import(module_name), WARM_UP_HOOK, None)
+                if hook:
+                    await hook()
+            except Exception as e:
+                logger.warning(f"⚠️ Pre-warming handler {name} ({module_name}) failed: {e}")
+        logger.info(f"🔥 Handlers pre-warmed in {time.perf_counter() - started:.2f}s")
@@ -1,7 +1,6 @@
 import os
 import json
 import asyncio
-from playwright.async_api import async_playwright
 
 from config import INSTAGRAM_USERNAME, INSTAGRAM_PASSWORD
 
@@ -38,6 +37,9 @@ def convert_to_netscape(json_file, output_file):
 
 # Fetch cookies using Playwright
 async def fetch_instagram_cookies(username, password):
+    # Imported here: playwright (and its browser) is only needed for a login
+    from playwright.async_api import async_playwright
+
     print("🔄 Logging in to Instagram...")
 
     async with async_playwright() as p:
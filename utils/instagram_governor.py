@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import asyncio
+
+import instaloader
+from instaloader.exceptions import TooManyRequestsException
+
+from utils.logger import logger
+from config import (
+    session_id, crf_tk, ds_user, ig_dd,
+    INSTAGRAM_SESSIONS_FILE,
+    INSTAGRAM_RATE_PER_MINUTE,
+    INSTAGRAM_MIN_RATE_PER_MINUTE,
+    INSTAGRAM_BURST,
+    INSTAGRAM_429_COOLDOWN,
+    INSTAGRAM_WAIT_COOLDOWN,
+    INSTAGRAM_REQUEST_TIMEOUT,
+)
+
+# Share of the base rate won back after every successful fetch
+RATE_RECOVERY_STEP = 0.1
+
+WAIT_MESSAGE = "Please wait a few minutes"
+
+
+class InstagramThrottled(Exception):
+    """Raised instead of sleeping when Instaloader wants to wait before a query."""
+
+    def __init__(self, seconds):
+        super().__init__(f"Instaloader asked to wait {seconds:.0f}s")
+        self.seconds = seconds
+
+
+class GovernedRateController(instaloader.RateController):
+    """
+    Hands Instaloader's own waits to the governor.
+
+    Instaloader sleeps inside the calling thread when its sliding-window
+    limits are reached; here the request is failed instead, so the governor
+    can move on to another account and cool this one down.
+    """
+
+    def sleep(self, secs):
+        raise InstagramThrottled(secs)
+
+
+class TokenBucket:
+    """
+    Token bucket whose refill rate adapts to push-back from the server.
+
+    Every throttling response halves the rate (down to ``min_rate``) and
+    pauses the bucket; every success wins back a tenth of the base rate, so
+    an account settles just under the rate Instagram tolerates.
+    """
+
+    def __init__(self, rate, burst, min_rate):
+        self.base_rate = self.rate = rate  # Tokens per second
+        self.min_rate = min_rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()  # In the future while paused
+        self.generation = 0  # Bumped on throttling, voiding pending reservations
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self):
+        """Seconds until the next token is available."""
+        now = time.monotonic()
+        self._refill(now)
+        return max(0.0, self.updated - now) + max(0.0, 1 - self.tokens) / self.rate
+
+    def reserve(self):
+        """Takes the next token, possibly ahead of time, and returns how long to wait for it."""
+        delay = self.delay()
+        self.tokens -= 1
+        return delay
+
+    def throttle(self, cooldown):
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0.0
+        self.updated = max(self.updated, time.monotonic() + cooldown)
+        self.generation += 1
+
+    def recover(self):
+        self.rate = min(self.base_rate, self.rate + self.base_rate * RATE_RECOVERY_STEP)
+
+
+class InstagramSession:
+    """One logged-in (or anonymous) Instaloader context and its rate limit."""
+
+    def __init__(self, name, cookies=None):
+        self.name = name
+        self.loader = instaloader.Instaloader(
+            sleep=False,  # Pacing is the governor's job
+            quiet=True,
+            download_videos=False,
+            download_video_thumbnails=False,
+            download_geotags=False,
+            save_metadata=False,
+            download_comments=False,
+            post_metadata_txt_pattern="",
+            max_connection_attempts=1,
+            request_timeout=INSTAGRAM_REQUEST_TIMEOUT,
+            rate_controller=GovernedRateController,
+        )
+        if cookies:
+            self.loader.load_session(cookies.get("ds_user_id") or name, cookies)
+        self.bucket = TokenBucket(
+            INSTAGRAM_RATE_PER_MINUTE / 60,
+            INSTAGRAM_BURST,
+            INSTAGRAM_MIN_RATE_PER_MINUTE / 60,
+        )
+
+    @property
+    def context(self):
+        return self.loader.context
+
+
+def throttle_cooldown(error):
+    """Seconds an account should rest after ``error``, or None if it wasn't rate limiting."""
+    if isinstance(error, InstagramThrottled):
+        return error.seconds
+    text = str(error)
+    if WAIT_MESSAGE in text:
+        return INSTAGRAM_WAIT_COOLDOWN
+    if (isinstance(error, TooManyRequestsException)
+            or isinstance(error.__cause__, TooManyRequestsException)
+            or "Too Many Requests" in text):
+        return INSTAGRAM_429_COOLDOWN
+    return None
+
+
+def load_session_cookies():
+    """Cookie sets from the environment and INSTAGRAM_SESSIONS_FILE, usable ones only."""
+    cookie_sets = [{"sessionid": session_id, "csrftoken": crf_tk, "ds_user_id": ds_user, "ig_did": ig_dd}]
+    if os.path.exists(INSTAGRAM_SESSIONS_FILE):
+        try:
+            with open(INSTAGRAM_SESSIONS_FILE) as f:
+                cookie_sets.extend(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Could not read {INSTAGRAM_SESSIONS_FILE}: {e}")
+
+    usable = []
+    for cookies in cookie_sets:
+        cookies = {name: value for name, value in cookies.items() if value}
+        if cookies.get("sessionid") and cookies.get("csrftoken"):
+            usable.append(cookies)
+    return usable
+
+
+class InstagramGovernor:
+    """
+    Spreads Instagram requests over a pool of sessions, each rate limited.
+
+    A request goes to the session whose bucket frees up first and runs in a
+    worker thread, so sessions fetch in parallel and throughput grows with
+    the number of accounts. A rate-limited response cools that session down
+    and the request is retried on the next one.
+    """
+
+    def __init__(self, sessions):
+        self.sessions = sessions
+
+    @classmethod
+    def from_config(cls):
+        cookie_sets = load_session_cookies()
+        if not cookie_sets:
+            logger.warning("⚠️ No Instagram session cookies configured, fetching anonymously")
+            return cls([InstagramSession("anonymous")])
+        return cls([
+            InstagramSession(f"account {index}", cookies)
+            for index, cookies in enumerate(cookie_sets, start=1)
+        ])
+
+    async def _acquire(self):
+        while True:
+            session = min(self.sessions, key=lambda s: s.bucket.delay())
+            generation = session.bucket.generation
+            delay = session.bucket.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+            # A session throttled while we waited voids the reservation
+            if session.bucket.generation == generation:
+                return session
+
+    async def run(self, func, *args):
+        """
+        Calls ``func(context, *args)`` in a thread on the session that's ready first.
+
+        Rate-limited calls are retried on another session, once per session
+        in the pool; other errors propagate.
+        """
+        error = None
+        for _ in range(len(self.sessions) + 1):
+            session = await self._acquire()
+            try:
+                result = await asyncio.to_thread(func, session.context, *args)
+            except Exception as e:
+                cooldown = throttle_cooldown(e)
+                if cooldown is None:
+                    raise
+                session.bucket.throttle(cooldown)
+                logger.warning(
+                    f"⏳ Instagram throttled {session.name}, resting it {cooldown:.0f}s "
+                    f"at {session.bucket.rate * 60:.1f} requests/min"
+                )
+                error = e
+                continue
+            session.bucket.recover()
+            return result
+        raise error
+
+    async def check_sessions(self):
+        """Tests every logged-in session once and logs which account it belongs to."""
+        for session in self.sessions:
+            if not session.context.is_logged_in:
+                continue
+            try:
+                username = await asyncio.to_thread(session.loader.test_login)
+            except Exception as e:
+                username = None
+                logger.error(f"❌ Instagram {session.name} login test failed: {e}")
+            if username:
+                logger.info(f"✅ Instagram {session.name} logged in as {username}")
+            else:
+                logger.error(f"❌ Instagram {session.name} cookies may be expired")
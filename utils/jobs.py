@@ -0,0 +1,89 @@
+import time
+from dataclasses import dataclass, field
+
+# Job kinds
+VIDEO = "video"
+AUDIO = "audio"
+VIDEO_TRIM = "video_trim"
+AUDIO_TRIM = "audio_trim"
+IMAGE = "image"
+BULK_IMAGE = "bulk_image"
+
+# Lower value = served earlier. Cheap, interactive jobs go first.
+JOB_PRIORITIES = {
+    IMAGE: 0,
+    AUDIO: 1,
+    AUDIO_TRIM: 1,
+    VIDEO_TRIM: 2,
+    VIDEO: 3,
+    BULK_IMAGE: 3,
+}
+
+# Rough relative cost of each kind, charged by the fair-share scheduler
+JOB_COSTS = {
+    IMAGE: 1.0,
+    AUDIO: 3.0,
+    AUDIO_TRIM: 3.0,
+    VIDEO_TRIM: 5.0,
+    VIDEO: 10.0,
+    BULK_IMAGE: 1.0,  # Per post
+}
+
+
+@dataclass(slots=True)
+class Job:
+    """A queued unit of work for the download workers."""
+
+    kind: str
+    chat_id: int
+    url: str
+    start_time: str | None = None
+    end_time: str | None = None
+    ranges: list | None = None  # [[start, end], ...] for multi-range trims
+    urls: list | None = None  # Post URLs of a bulk Instagram job
+    priority: int | None = None
+    enqueued_at: float = field(default_factory=time.time)
+    est_cost: float | None = None
+    job_id: int | None = None
+
+    def __post_init__(self):
+        if self.priority is None:
+            self.priority = JOB_PRIORITIES.get(self.kind, max(JOB_PRIORITIES.values()))
+        if self.est_cost is None:
+            self.est_cost = JOB_COSTS.get(self.kind, 1.0) * len(self.ranges or self.urls or [None])
+
+    @property
+    def is_audio(self):
+        return self.kind in (AUDIO, AUDIO_TRIM)
+
+    def to_payload(self):
+        """Returns the JSON-serializable form stored in the job queue."""
+        return {
+            "kind": self.kind,
+            "chat_id": self.chat_id,
+            "url": self.url,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "ranges": self.ranges,
+            "urls": self.urls,
+            "priority": self.priority,
+            "enqueued_at": self.enqueued_at,
+            "est_cost": self.est_cost,
+        }
+
+    @classmethod
+    def from_payload(cls, payload, job_id=None):
+        """Rebuilds a job from its stored payload."""
+        return cls(
+            kind=payload["kind"],
+            chat_id=payload["chat_id"],
+            url=payload["url"],
+            start_time=payload.get("start_time"),
+            end_time=payload.get("end_time"),
+            ranges=payload.get("ranges"),
+            urls=payload.get("urls"),
+            priority=payload.get("priority"),
+            enqueued_at=payload.get("enqueued_at") or time.time(),
+            est_cost=payload.get("est_cost"),
+            job_id=job_id,
+        )
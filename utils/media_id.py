@@ -0,0 +1,48 @@
+import re
+from urllib.parse import urlsplit, parse_qsl, urlencode, urlunsplit
+
+# (extractor, pattern) pairs; the first group is the media ID
+MEDIA_ID_PATTERNS = [
+    ("youtube", re.compile(r"(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/|v/)|youtu\.be/)([\w-]{11})")),
+    ("instagram", re.compile(r"instagram\.com/(?:[\w.]+/)?(?:p|reel|reels|tv)/([\w-]+)")),
+    ("instagram", re.compile(r"instagram\.com/stories/[\w.]+/(\d+)")),
+    ("facebook", re.compile(r"facebook\.com/(?:[\w.]+/videos/(?:[\w.-]+/)?|watch/?\?(?:.*&)?v=|reel/|video\.php\?(?:.*&)?v=)(\d+)")),
+    ("facebook", re.compile(r"fb\.watch/([\w-]+)")),
+    ("twitter", re.compile(r"(?:x|twitter)\.com/[\w]+/status(?:es)?/(\d+)")),
+    ("xvideos", re.compile(r"xvideos\.com/video[./]?([\w]+)")),
+    ("xnxx", re.compile(r"xnxx\.com/video-([\w]+)")),
+    ("pornhub", re.compile(r"pornhub\.com/view_video\.php\?(?:.*&)?viewkey=([\w]+)")),
+    ("xhamster", re.compile(r"xhamster\.com/videos/[\w-]*?-?([\w]+)(?:[/?#]|$)")),
+    ("redtube", re.compile(r"redtube\.com/(\d+)")),
+]
+
+# Query parameters that never change which media a URL points to
+TRACKING_PARAMS = {"si", "feature", "igsh", "igshid", "fbclid", "ref", "ref_src", "s", "t"}
+
+
+def normalize_url(url: str) -> str:
+    """Returns a canonical form of a URL with tracking noise removed."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www.") or host.startswith("m."):
+        host = host.split(".", 1)[1]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query)
+        if key not in TRACKING_PARAMS and not key.startswith("utm_")
+    )
+    return urlunsplit(("https", host, parts.path.rstrip("/"), urlencode(query), ""))
+
+
+def canonical_media_id(url: str) -> tuple[str, str]:
+    """
+    Identifies the media a URL points to, independent of how the link was shared.
+
+    Returns:
+        tuple: (extractor, media_id). Unknown sites fall back to
+        ("generic", normalized_url).
+    """
+    for extractor, pattern in MEDIA_ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return extractor, match.group(1)
+    return "generic", normalize_url(url)
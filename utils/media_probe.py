@@ -0,0 +1,65 @@
+import os
+
+from config import YOUTUBE_FILE, INSTAGRAM_FILE, FACEBOOK_FILE, X_FILE
+from utils.logger import logger
+from utils.media_id import canonical_media_id
+from utils.ytdlp_runner import run_ytdlp
+
+# Cookie file used when probing each site
+PROBE_COOKIE_FILES = {
+    "youtube": YOUTUBE_FILE,
+    "instagram": INSTAGRAM_FILE,
+    "facebook": FACEBOOK_FILE,
+    "twitter": X_FILE,
+}
+
+PROBE_OPTS = {
+    "quiet": True,
+    "no_warnings": True,
+    "skip_download": True,
+    "noplaylist": True,
+    "socket_timeout": 15,
+}
+
+
+def estimate_filesize(info):
+    """Best guess of the download size in bytes from an info dict, or None."""
+    formats = info.get("requested_formats") or [info]
+    total = 0
+    for fmt in formats:
+        size = fmt.get("filesize") or fmt.get("filesize_approx")
+        if not size and fmt.get("tbr") and info.get("duration"):
+            size = fmt["tbr"] * 1000 / 8 * info["duration"]
+        if not size:
+            return None
+        total += size
+    return int(total)
+
+
+async def probe_media(url):
+    """
+    Fetches metadata for a URL without downloading anything.
+
+    Returns:
+        dict: {"duration", "filesize", "is_live"} or None if the probe failed
+    """
+    extractor, _ = canonical_media_id(url)
+    ydl_opts = dict(PROBE_OPTS)
+    cookie_file = PROBE_COOKIE_FILES.get(extractor)
+    if cookie_file and os.path.exists(cookie_file):
+        ydl_opts["cookiefile"] = cookie_file
+
+    try:
+        info, _ = await run_ytdlp(ydl_opts, url, download=False)
+    except Exception as e:
+        logger.warning(f"⚠️ Metadata probe failed for {url}: {e}")
+        return None
+
+    if not info:
+        return None
+
+    return {
+        "duration": info.get("duration"),
+        "filesize": estimate_filesize(info),
+        "is_live": bool(info.get("is_live")),
+    }
@@ -0,0 +1,151 @@
+import os
+import json
+import struct
+
+from utils.logger import logger
+from utils.smart_trim import _run
+from utils.ffmpeg_runner import run_ffmpeg
+from config import FFMPEG_ENCODE_THREADS
+
+# What Telegram clients play inline everywhere
+COMPATIBLE_VIDEO_CODECS = {"h264"}
+COMPATIBLE_PIX_FMTS = {"yuv420p", "yuvj420p"}
+COMPATIBLE_AUDIO_CODECS = {"aac", "mp3"}
+
+# Postprocessing actions, cheapest first
+KEEP = "keep"  # Already playable and streamable as is
+REMUX = "remux"  # Stream copy into MP4 with the index up front
+AUDIO = "audio"  # Video copied, audio transcoded to AAC
+TRANSCODE = "transcode"  # Full H.264/AAC encode
+
+AUDIO_BITRATE = "128k"
+
+
+async def probe_streams(input_path):
+    """Returns (format_name, duration, video stream, audio stream) from one ffprobe call, or None."""
+    returncode, stdout, _ = await _run([
+        "ffprobe", "-v", "error",
+        "-show_entries", "stream=codec_type,codec_name,pix_fmt:format=format_name,duration",
+        "-of", "json", input_path,
+    ])
+    if returncode != 0:
+        return None
+    probe = json.loads(stdout or "{}")
+    streams = probe.get("streams") or []
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    fmt = probe.get("format") or {}
+    try:
+        duration = float(fmt.get("duration"))
+    except (TypeError, ValueError):
+        duration = None
+    return fmt.get("format_name", ""), duration, video, audio
+
+
+def moov_before_mdat(input_path):
+    """Whether an MP4's index (moov) precedes its media data, i.e. it can stream while downloading."""
+    try:
+        with open(input_path, "rb") as f:
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return False
+                size, box = struct.unpack(">I4s", header)
+                if box == b"moov":
+                    return True
+                if box == b"mdat":
+                    return False
+                if size == 1:
+                    size = struct.unpack(">Q", f.read(8))[0] - 8
+                elif size == 0:
+                    return False
+                f.seek(size - 8, os.SEEK_CUR)
+    except (OSError, struct.error):
+        return False
+
+
+def choose_action(format_name, video, audio, faststart):
+    """Picks the cheapest postprocessing that makes a file Telegram-friendly."""
+    if not video:
+        return None  # Audio-only or unreadable; left alone
+    video_ok = (
+        video.get("codec_name") in COMPATIBLE_VIDEO_CODECS
+        and video.get("pix_fmt") in COMPATIBLE_PIX_FMTS
+    )
+    if not video_ok:
+        return TRANSCODE
+    if audio and audio.get("codec_name") not in COMPATIBLE_AUDIO_CODECS:
+        return AUDIO
+    if "mp4" in format_name.split(",") and faststart:
+        return KEEP
+    return REMUX
+
+
+async def prepare_for_telegram(input_path, output_path=None):
+    """
+    Makes a downloaded video playable inline in Telegram as cheaply as possible.
+
+    The file is probed once; H.264/AAC MP4s that already stream are kept,
+    other H.264 files are remuxed (or get only their audio transcoded),
+    and anything else is transcoded in full. The result replaces the input
+    as ``<name>.mp4``, or is written to ``output_path`` with the input left
+    in place (e.g. for a cached source).
+
+    Args:
+        input_path (str): Downloaded file
+        output_path (str, optional): Where to write a processed copy
+
+    Returns:
+        tuple: (output path, action taken); the input path and None when
+            probing or processing failed
+    """
+    probe = await probe_streams(input_path)
+    if not probe:
+        logger.warning(f"⚠️ Could not probe {input_path}, sending it as is")
+        return input_path, None
+
+    format_name, duration, video, audio = probe
+    faststart = "mp4" in format_name.split(",") and moov_before_mdat(input_path)
+    action = choose_action(format_name, video, audio, faststart)
+    if action == KEEP:
+        logger.info(f"✅ {os.path.basename(input_path)} is Telegram-ready, no postprocessing")
+    if action in (KEEP, None):
+        return input_path, action
+
+    keep_input = output_path is not None
+    if not keep_input:
+        output_path = f"{os.path.splitext(input_path)[0]}.mp4"
+    temp_path = f"{os.path.splitext(output_path)[0]}.{action}.mp4"
+
+    if action == TRANSCODE:
+        codec_args = [
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-pix_fmt", "yuv420p",
+            "-c:a", "aac", "-b:a", AUDIO_BITRATE,
+        ]
+        threads = FFMPEG_ENCODE_THREADS
+    elif action == AUDIO:
+        codec_args = ["-c:v", "copy", "-c:a", "aac", "-b:a", AUDIO_BITRATE]
+        threads = 1
+    else:
+        codec_args = ["-c", "copy"]
+        threads = 1
+
+    result = await run_ffmpeg([
+        "-i", input_path,
+        "-map", "0:v:0?", "-map", "0:a:0?",
+        *codec_args,
+        "-movflags", "+faststart",
+        temp_path,
+    ], threads=threads, duration=duration, label=f"postprocess {action}")
+
+    if not result.ok:
+        logger.error(f"❌ Postprocessing ({action}) failed: {result.error or result.stderr[-500:]}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return input_path, None
+
+    os.replace(temp_path, output_path)
+    if not keep_input and output_path != input_path and os.path.exists(input_path):
+        os.remove(input_path)
+    logger.info(f"✅ Postprocessed {os.path.basename(output_path)} ({action}): {result.summary()}")
+    return output_path, action
@@ -0,0 +1,100 @@
+import copy
+import time
+import threading
+from collections import OrderedDict
+
+import yt_dlp
+
+from config import PROBE_CACHE_TTL, PROBE_CACHE_SIZE
+from utils.media_id import canonical_media_id
+
+# Top-level info dict fields nothing downstream uses; on YouTube the caption
+# tables alone are often larger than the rest of the dict
+NOISE_KEYS = (
+    "automatic_captions", "subtitles", "thumbnails", "heatmap",
+    "description", "tags", "categories", "storyboards",
+)
+
+
+# Top-level results of the probe's own format selection. Left in, they make
+# yt-dlp download the probe's formats whatever ``format`` the download asks
+# for (e.g. a bv*+ba merge for an audio-only request)
+SELECTION_KEYS = ("format_id", "url", "ext", "_format_sort_fields")
+
+
+def _is_noise_format(fmt):
+    return fmt.get("format_note") == "storyboard" or fmt.get("ext") == "mhtml"
+
+
+def compact_info(info):
+    """
+    Strips an info dict down to what format selection and the download need.
+
+    Playable formats are kept so the download can still select its own
+    format; the probe's selection, storyboards and caption/thumbnail tables
+    are dropped. Like yt-dlp's ``download_with_info_file``, the result is
+    sanitized with private keys (``requested_formats``,
+    ``requested_downloads``, ...) removed.
+    """
+    compact = {
+        key: value for key, value in info.items()
+        if key not in NOISE_KEYS and key not in SELECTION_KEYS
+    }
+    if compact.get("formats"):
+        compact["formats"] = [fmt for fmt in compact["formats"] if not _is_noise_format(fmt)]
+    return yt_dlp.YoutubeDL.sanitize_info(compact, remove_private_keys=True)
+
+
+class ProbeCache:
+    """
+    In-memory cache of extracted metadata, keyed by canonical media ID.
+
+    A probe (``download=False`` extraction) stores its result here, and the
+    download that follows feeds it back to yt-dlp instead of fetching and
+    parsing the page again. Entries expire after ``ttl`` seconds since the
+    format URLs inside them eventually do too.
+    """
+
+    def __init__(self, ttl=600, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (stored_at, info)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(url):
+        return canonical_media_id(url)
+
+    def get(self, url):
+        """Returns a private copy of the cached info dict, or None."""
+        key = self._key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, info = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # yt-dlp mutates the dicts it processes
+        return copy.deepcopy(info)
+
+    def put(self, url, info):
+        """Caches a single video's info dict. Playlists are not cached."""
+        if not info or info.get("_type", "video") != "video":
+            return
+        key = self._key(url)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), compact_info(info))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url):
+        with self._lock:
+            self._entries.pop(self._key(url), None)
+
+
+# Shared cache for the bot and all handlers
+probe_cache = ProbeCache(PROBE_CACHE_TTL, PROBE_CACHE_SIZE)
@@ -0,0 +1,175 @@
+import heapq
+import time
+import asyncio
+from collections import deque
+
+from utils.jobs import Job
+
+
+class QuotaExceeded(Exception):
+    """Raised when a chat already has too many jobs queued."""
+
+    def __init__(self, chat_id, queued, limit):
+        super().__init__(f"Chat {chat_id} has {queued} queued job(s), limit is {limit}")
+        self.chat_id = chat_id
+        self.queued = queued
+        self.limit = limit
+
+
+class JobScheduler:
+    """
+    Fair-share priority scheduler in front of the durable job queue.
+
+    Each chat has its own heap of queued jobs ordered by a virtual deadline,
+    ``enqueued_at + priority * priority_step``: a cheap ``/image`` job jumps
+    ahead of a video download enqueued a moment ago, but a video that has
+    already waited ``priority_step`` seconds per priority level is no longer
+    overtaken.
+
+    Across chats, jobs are handed out by deficit round-robin on the jobs'
+    estimated cost, so a chat that pastes 50 links gets the same share of
+    the workers as a chat that sends one. Chats can be given a larger share
+    through ``weights``. Admission quotas cap how many jobs a chat may have
+    queued (``submit()`` raises ``QuotaExceeded``) and running at once.
+
+    The SQLite queue remains the source of truth; the heaps are rebuilt
+    from it on startup by ``restore()``.
+    """
+
+    def __init__(self, store, priority_step=60, quantum=10.0, weights=None,
+                 max_queued_per_chat=None, max_inflight_per_chat=None):
+        # A zero or negative share never grows a chat's deficit, and _pick
+        # would spin on it forever
+        if quantum <= 0:
+            raise ValueError(f"quantum must be positive, got {quantum}")
+        invalid = {chat_id: weight for chat_id, weight in (weights or {}).items() if not weight > 0}
+        if invalid:
+            raise ValueError(f"chat weights must be positive, got {invalid}")
+
+        self.store = store
+        self.priority_step = priority_step
+        self.quantum = quantum
+        self.weights = weights or {}
+        self.max_queued_per_chat = max_queued_per_chat
+        self.max_inflight_per_chat = max_inflight_per_chat
+
+        self._queues = {}  # chat_id -> heap of (deadline, job_id, job)
+        self._active = deque()  # Round-robin order of chats with queued jobs
+        self._deficit = {}
+        self._inflight = {}
+        self._waits = deque(maxlen=1000)  # Recent queue wait times in seconds
+        self._changed = asyncio.Event()
+
+    def _push(self, job):
+        heap = self._queues.get(job.chat_id)
+        if heap is None:
+            heap = self._queues[job.chat_id] = []
+            self._active.append(job.chat_id)
+            self._deficit[job.chat_id] = 0.0
+
+        deadline = job.enqueued_at + job.priority * self.priority_step
+        # job_id is unique, so Job objects themselves are never compared
+        heapq.heappush(heap, (deadline, job.job_id, job))
+        self._changed.set()
+
+    def _can_run(self, chat_id):
+        if self.max_inflight_per_chat is None:
+            return True
+        return self._inflight.get(chat_id, 0) < self.max_inflight_per_chat
+
+    def _pick(self):
+        """Pops the next job by deficit round-robin, or returns None if no chat may run."""
+        if not any(self._can_run(chat_id) for chat_id in self._active):
+            return None
+
+        while True:
+            chat_id = self._active[0]
+            if not self._can_run(chat_id):
+                self._active.rotate(-1)
+                continue
+
+            heap = self._queues[chat_id]
+            cost = heap[0][2].est_cost
+            if self._deficit[chat_id] < cost:
+                self._deficit[chat_id] += self.quantum * self.weights.get(chat_id, 1)
+                if self._deficit[chat_id] < cost:
+                    self._active.rotate(-1)
+                    continue
+
+            _, _, job = heapq.heappop(heap)
+            self._deficit[chat_id] -= cost
+
+            if heap:
+                self._active.rotate(-1)
+            else:
+                # Idle chats don't bank credit
+                self._active.popleft()
+                del self._queues[chat_id]
+                del self._deficit[chat_id]
+            return job
+
+    def restore(self):
+        """
+        Requeues jobs left over from the previous run and loads them into the heaps.
+
+        Quotas are not applied to restored jobs.
+
+        Returns:
+            tuple: (requeued_count, dead_count) as reported by the store
+        """
+        requeued, dead = self.store.recover()
+        for job_id, payload in self.store.pending():
+            self._push(Job.from_payload(payload, job_id))
+        return requeued, dead
+
+    async def submit(self, job):
+        """Persists a job and schedules it. Raises QuotaExceeded if the chat's queue is full."""
+        queued = self.queued_for(job.chat_id)
+        if self.max_queued_per_chat is not None and queued >= self.max_queued_per_chat:
+            raise QuotaExceeded(job.chat_id, queued, self.max_queued_per_chat)
+
+        job.job_id = self.store.put_nowait(job.to_payload())
+        self._push(job)
+        return job
+
+    async def get(self):
+        """Waits for the next job this worker may run and leases it."""
+        while True:
+            job = self._pick()
+            if job is None:
+                self._changed.clear()
+                await self._changed.wait()
+                continue
+
+            if self.store.lease(job.job_id):
+                self._inflight[job.chat_id] = self._inflight.get(job.chat_id, 0) + 1
+                self._waits.append(time.time() - job.enqueued_at)
+                return job
+
+    def heartbeat(self, job):
+        self.store.heartbeat(job.job_id)
+
+    def done(self, job):
+        """Acknowledges a finished job and frees its chat's in-flight slot."""
+        self.store.ack(job.job_id)
+
+        remaining = self._inflight.get(job.chat_id, 0) - 1
+        if remaining > 0:
+            self._inflight[job.chat_id] = remaining
+        else:
+            self._inflight.pop(job.chat_id, None)
+        self._changed.set()
+
+    def queued_for(self, chat_id):
+        return len(self._queues.get(chat_id, ()))
+
+    def qsize(self):
+        return sum(len(heap) for heap in self._queues.values())
+
+    def wait_percentile(self, percentile):
+        """Returns the given percentile of recent queue wait times in seconds."""
+        if not self._waits:
+            return 0.0
+        waits = sorted(self._waits)
+        index = min(len(waits) - 1, int(len(waits) * percentile / 100))
+        return waits[index]
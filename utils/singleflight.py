@@ -0,0 +1,58 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class _Flight:
+    __slots__ = ("task", "refs")
+
+    def __init__(self, task):
+        self.task = task
+        self.refs = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one execution.
+
+    The first caller for a key starts the work; callers arriving while it
+    is running (or while earlier callers are still using the result) attach
+    to it and receive the same result. Once the last caller is done with
+    the result, ``on_release`` runs exactly once, e.g. to delete files.
+    """
+
+    def __init__(self):
+        self._flights = {}
+
+    def is_running(self, key):
+        return key in self._flights
+
+    @asynccontextmanager
+    async def share(self, key, factory, on_release=None):
+        """
+        Runs ``factory()`` once per key and yields its result to every caller.
+
+        Args:
+            key: Hashable identity of the work
+            factory: Zero-argument coroutine function doing the work
+            on_release: Optional coroutine function called with the result
+                after the last caller leaves
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(asyncio.ensure_future(factory()))
+        flight.refs += 1
+
+        try:
+            # Shielded so one caller being cancelled doesn't kill the shared work
+            result = await asyncio.shield(flight.task)
+            yield result
+        finally:
+            flight.refs -= 1
+            if flight.refs == 0:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+                if not flight.task.done():
+                    flight.task.cancel()
+                elif on_release and not flight.task.cancelled() and flight.task.exception() is None:
+                    await on_release(flight.task.result())
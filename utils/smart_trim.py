@@ -0,0 +1,177 @@
+import os
+import json
+import shutil
+import asyncio
+import tempfile
+
+from config import TEMP_DIR, FFMPEG_ENCODE_THREADS
+from utils.logger import logger
+from utils.ffmpeg_runner import run_ffmpeg
+
+# Shorter edges than this (about a frame) are dropped instead of re-encoded
+MIN_EDGE = 0.02
+
+# How far around the cut points keyframes are searched for
+KEYFRAME_SEARCH_MARGIN = 60
+
+# Maximum deviation from the requested duration before the result is rejected
+DURATION_TOLERANCE = 0.5
+
+
+async def _run(command):
+    """Runs a command (ffprobe) and returns (returncode, stdout, stderr)."""
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate()
+    return process.returncode, stdout.decode(errors="ignore"), stderr.decode(errors="ignore")
+
+
+async def probe_video_stream(input_path):
+    """Returns codec_name, pix_fmt, width, height of the first video stream, or None."""
+    returncode, stdout, _ = await _run([
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "stream=codec_name,pix_fmt,width,height",
+        "-of", "json", input_path,
+    ])
+    if returncode != 0:
+        return None
+    streams = json.loads(stdout or "{}").get("streams") or []
+    return streams[0] if streams else None
+
+
+async def probe_duration(input_path):
+    """Returns the container duration in seconds, or None."""
+    returncode, stdout, _ = await _run([
+        "ffprobe", "-v", "error", "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1", input_path,
+    ])
+    try:
+        return float(stdout.strip()) if returncode == 0 else None
+    except ValueError:
+        return None
+
+
+async def probe_keyframes(input_path, start_time, end_time):
+    """
+    Returns the sorted keyframe timestamps of the first video stream near
+    [start_time, end_time]. Only packet headers are read, nothing is decoded.
+    """
+    read_from = max(0, start_time - KEYFRAME_SEARCH_MARGIN)
+    returncode, stdout, _ = await _run([
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-read_intervals", f"{read_from}%{end_time + KEYFRAME_SEARCH_MARGIN}",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0", input_path,
+    ])
+    if returncode != 0:
+        return []
+
+    keyframes = []
+    for line in stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            keyframes.append(float(pts_time))
+    return sorted(keyframes)
+
+
+def _encode_edge(input_path, output_path, start, duration, pix_fmt):
+    return run_ffmpeg([
+        "-ss", f"{start:.6f}", "-i", input_path, "-t", f"{duration:.6f}",
+        "-map", "0:v:0", "-an", "-sn",
+        "-c:v", "libx264", "-preset", "fast", "-crf", "18", "-pix_fmt", pix_fmt,
+        "-f", "matroska", output_path,
+    ], threads=FFMPEG_ENCODE_THREADS, duration=duration, label="smart trim edge")
+
+
+def _copy_interior(input_path, output_path, start, duration):
+    return run_ffmpeg([
+        "-ss", f"{start:.6f}", "-i", input_path, "-t", f"{duration:.6f}",
+        "-map", "0:v:0", "-an", "-sn",
+        "-c:v", "copy",
+        "-f", "matroska", output_path,
+    ], duration=duration, label="smart trim copy")
+
+
+async def smart_trim(input_path, output_path, start_time, end_time):
+    """
+    Frame-accurate trim that re-encodes as little as possible.
+
+    The video between the first keyframe after ``start_time`` and the last
+    keyframe before ``end_time`` is stream-copied; only the partial GOPs at
+    the two cut points are re-encoded with libx264. The pieces are joined
+    with the concat demuxer, and the audio for the whole range is encoded
+    once alongside. Only H.264 sources qualify, since the re-encoded edges
+    have to be concatenable with the copied interior.
+
+    Returns:
+        str: ``output_path`` on success, or None if the source doesn't
+            qualify or the result failed validation (callers should fall
+            back to a full re-encode)
+    """
+    stream = await probe_video_stream(input_path)
+    if not stream or stream.get("codec_name") != "h264":
+        logger.debug(f"Smart trim skipped, video codec is {stream and stream.get('codec_name')}")
+        return None
+
+    keyframes = await probe_keyframes(input_path, start_time, end_time)
+    interior = [k for k in keyframes if start_time <= k <= end_time]
+    if len(interior) < 2:
+        logger.debug("Smart trim skipped, selection is shorter than a GOP")
+        return None
+    first_key, last_key = interior[0], interior[-1]
+    pix_fmt = stream.get("pix_fmt") or "yuv420p"
+
+    work_dir = os.path.abspath(tempfile.mkdtemp(prefix="smart_trim_", dir=TEMP_DIR))
+    try:
+        pieces = []
+        if first_key - start_time > MIN_EDGE:
+            pieces.append((os.path.join(work_dir, "head.mkv"),
+                           _encode_edge(input_path, os.path.join(work_dir, "head.mkv"),
+                                        start_time, first_key - start_time, pix_fmt)))
+        pieces.append((os.path.join(work_dir, "interior.mkv"),
+                       _copy_interior(input_path, os.path.join(work_dir, "interior.mkv"),
+                                      first_key, last_key - first_key)))
+        if end_time - last_key > MIN_EDGE:
+            pieces.append((os.path.join(work_dir, "tail.mkv"),
+                           _encode_edge(input_path, os.path.join(work_dir, "tail.mkv"),
+                                        last_key, end_time - last_key, pix_fmt)))
+
+        results = await asyncio.gather(*(job for _, job in pieces))
+        for (path, _), result in zip(pieces, results):
+            if not result.ok or not os.path.exists(path):
+                logger.warning(f"Smart trim piece {os.path.basename(path)} failed: {result.error or result.stderr}")
+                return None
+
+        concat_list = os.path.join(work_dir, "pieces.txt")
+        with open(concat_list, "w") as f:
+            for path, _ in pieces:
+                f.write(f"file '{path}'\n")
+
+        result = await run_ffmpeg([
+            "-f", "concat", "-safe", "0", "-i", concat_list,
+            "-ss", f"{start_time:.6f}", "-t", f"{end_time - start_time:.6f}", "-i", input_path,
+            "-map", "0:v:0", "-map", "1:a:0?",
+            "-c:v", "copy", "-c:a", "aac", "-b:a", "192k",
+            "-movflags", "+faststart", output_path,
+        ], duration=end_time - start_time, label="smart trim concat")
+        if not result.ok or not os.path.exists(output_path):
+            logger.warning(f"Smart trim concat failed: {result.error or result.stderr}")
+            return None
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    duration = await probe_duration(output_path)
+    expected = end_time - start_time
+    if duration is None or abs(duration - expected) > DURATION_TOLERANCE:
+        logger.warning(f"Smart trim produced {duration}s instead of {expected}s, discarding")
+        os.remove(output_path)
+        return None
+
+    logger.info(
+        f"Smart trim: re-encoded {first_key - start_time:.2f}s + {end_time - last_key:.2f}s, "
+        f"copied {last_key - first_key:.2f}s"
+    )
+    return output_path
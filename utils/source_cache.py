@@ -0,0 +1,128 @@
+import os
+import shutil
+import hashlib
+from contextlib import asynccontextmanager
+
+from config import SOURCE_CACHE_DIR
+from utils.logger import logger
+from utils.media_id import canonical_media_id
+from utils.singleflight import SingleFlight
+from utils.storage import storage
+
+# Source variants: a full video (with audio) or an audio-only download
+VIDEO_SOURCE = "video"
+AUDIO_SOURCE = "audio"
+
+
+def source_key(url, variant):
+    """(extractor, media_id, variant) identifying a downloaded source."""
+    extractor, media_id = canonical_media_id(url)
+    return extractor, media_id, variant
+
+
+class SourceCache:
+    """
+    Keeps downloaded source media around so derived outputs (trims, audio
+    extractions) are computed locally instead of downloading again.
+
+    Sources are content-addressed: each (extractor, media ID, variant) gets
+    its own directory named after a hash of the key, holding the file under
+    its original name (so uploads keep a readable filename). The files are
+    tracked by ``storage``, which evicts them in LRU order by bytes like any
+    other artifact; this class only maps keys to files that still exist.
+    """
+
+    def __init__(self, directory):
+        self.directory = os.path.abspath(directory)
+        self._inflight = SingleFlight()
+
+    def _entry_dir(self, key):
+        extractor, media_id, variant = key
+        digest = hashlib.sha256(f"{extractor}:{media_id}".encode()).hexdigest()[:24]
+        return os.path.join(self.directory, f"{digest}.{variant}")
+
+    def owns(self, path):
+        """Whether ``path`` is a cached source (and must not be deleted after use)."""
+        return bool(path) and os.path.abspath(path).startswith(self.directory + os.sep)
+
+    def lookup(self, key):
+        """Returns the cached file for ``key``, or None."""
+        entry_dir = self._entry_dir(key)
+        try:
+            names = os.listdir(entry_dir)
+        except FileNotFoundError:
+            return None
+
+        if not names:
+            # The file was evicted; drop the empty entry
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+        path = os.path.join(entry_dir, names[0])
+        storage.touch(path)
+        return path
+
+    def lookup_any(self, keys):
+        """Returns the first cached file among ``keys``, or None."""
+        for key in keys:
+            path = self.lookup(key)
+            if path:
+                return path
+        return None
+
+    def add(self, key, file_path):
+        """
+        Moves a downloaded file into the cache and returns its new path.
+
+        The cached file comes back pinned, and is pinned before it is
+        tracked: tracking a large source may reclaim space, which must not
+        evict the file being added. The caller unpins it when done.
+        """
+        if not file_path or not os.path.isfile(file_path):
+            return file_path
+        if self.owns(file_path):
+            storage.pin(file_path)
+            return file_path
+
+        entry_dir = self._entry_dir(key)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.makedirs(entry_dir, exist_ok=True)
+        cached_path = os.path.join(entry_dir, os.path.basename(file_path))
+        os.replace(file_path, cached_path)
+
+        storage.discard(file_path)
+        storage.pin(cached_path)
+        storage.track(cached_path)
+        logger.info(f"🗃️ Cached source {key} ({os.path.getsize(cached_path) / (1024 ** 2):.1f} MB)")
+        return cached_path
+
+    @asynccontextmanager
+    async def source(self, key, download, alternatives=()):
+        """
+        Yields the cached file for ``key`` (or for one of the ``alternatives``
+        keys, e.g. a full video that can stand in for its audio), downloading
+        it with ``download()`` first if none is cached. Concurrent callers
+        share one download. The file is protected from eviction for the
+        duration of the block. Yields None if the download failed.
+        """
+        path = self.lookup_any([key, *alternatives])
+        if path is not None:
+            with storage.pinned(path):
+                yield path if os.path.exists(path) else None
+            return
+
+        async def fetch():
+            return self.add(key, await download())
+
+        async def release(path):
+            if self.owns(path):
+                storage.unpin(path)
+
+        # The pin taken by add() is held until the last caller sharing the
+        # download is done with it
+        async with self._inflight.share(key, fetch, on_release=release) as path:
+            yield path if path and os.path.exists(path) else None
+
+
+# Shared cache for the bot and all handlers
+source_cache = SourceCache(SOURCE_CACHE_DIR)
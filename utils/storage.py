@@ -0,0 +1,204 @@
+import os
+import time
+import shutil
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from config import (
+    DOWNLOAD_DIR,
+    TEMP_DIR,
+    THUMBNAIL_DIR,
+    STORAGE_QUOTA,
+    STORAGE_HIGH_WATERMARK,
+    STORAGE_LOW_WATERMARK,
+    STORAGE_MIN_FREE_DISK,
+    STORAGE_MAX_AGE,
+)
+from utils.logger import logger
+
+
+class StorageManager:
+    """
+    Tracks every file the bot creates and keeps them within a byte quota.
+
+    Artifacts are kept in LRU order. When tracked usage crosses the high
+    watermark (or the disk's free space drops below ``min_free_disk``),
+    least recently used artifacts are deleted until usage is back under the
+    low watermark. Files pinned by in-flight jobs are never evicted.
+    Reclamation is triggered by ``track()`` itself; ``expire()`` only ages
+    out stale files, with a sweep of the directories as a backstop for
+    anything that was never tracked.
+    """
+
+    def __init__(self, quota, high_watermark=0.9, low_watermark=0.7, min_free_disk=0, max_age=None):
+        self.quota = quota
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.min_free_disk = min_free_disk
+        self.max_age = max_age
+        self._artifacts = OrderedDict()  # path -> (size, last_access), oldest first
+        self._pins = {}
+        self.usage = 0
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+    def track(self, path, last_access=None):
+        """Adds or refreshes an artifact and reclaims space if needed."""
+        if not path or not os.path.isfile(path):
+            return
+
+        path = os.path.abspath(path)
+        size = os.path.getsize(path)
+        previous = self._artifacts.pop(path, None)
+        if previous:
+            self.usage -= previous[0]
+
+        self._artifacts[path] = (size, last_access or time.time())
+        self.usage += size
+        self._maybe_reclaim()
+
+    def touch(self, path):
+        """Marks an artifact as recently used."""
+        path = os.path.abspath(path)
+        if path in self._artifacts:
+            size, _ = self._artifacts.pop(path)
+            self._artifacts[path] = (size, time.time())
+
+    def discard(self, path):
+        """Deletes an artifact and forgets it."""
+        path = os.path.abspath(path)
+        entry = self._artifacts.pop(path, None)
+        if entry:
+            self.usage -= entry[0]
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            logger.error(f"❌ Failed to delete {path}: {e}")
+
+    def seed(self, directories):
+        """Indexes files left over from a previous run. Only called at startup."""
+        found = []
+        for directory in directories:
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        found.append((os.path.getmtime(path), path))
+                    except OSError:
+                        continue
+
+        for mtime, path in sorted(found):
+            self.track(path, last_access=mtime)
+        logger.info(f"🗄️ Storage index seeded with {len(found)} file(s), {self.usage / (1024 ** 2):.1f} MB")
+
+    # ------------------------------------------------------------------
+    # Pinning
+    # ------------------------------------------------------------------
+    def pin(self, path):
+        path = os.path.abspath(path)
+        self._pins[path] = self._pins.get(path, 0) + 1
+
+    def unpin(self, path):
+        path = os.path.abspath(path)
+        remaining = self._pins.get(path, 0) - 1
+        if remaining > 0:
+            self._pins[path] = remaining
+        else:
+            self._pins.pop(path, None)
+
+    @contextmanager
+    def pinned(self, *paths):
+        """Protects files from eviction for the duration of the block."""
+        paths = [path for path in paths if path]
+        for path in paths:
+            self.pin(path)
+        try:
+            yield
+        finally:
+            for path in paths:
+                self.unpin(path)
+
+    # ------------------------------------------------------------------
+    # Reclamation
+    # ------------------------------------------------------------------
+    def _disk_low(self):
+        if not self.min_free_disk:
+            return False
+        return shutil.disk_usage(DOWNLOAD_DIR).free < self.min_free_disk
+
+    def _maybe_reclaim(self):
+        if self.usage > self.quota * self.high_watermark or self._disk_low():
+            self.reclaim(int(self.quota * self.low_watermark))
+
+    def reclaim(self, target_usage):
+        """Evicts least recently used, unpinned artifacts until usage <= target_usage."""
+        freed = 0
+        for path in list(self._artifacts):
+            if self.usage <= target_usage and not self._disk_low():
+                break
+            if path in self._pins:
+                continue
+            freed += self._artifacts[path][0]
+            self.discard(path)
+
+        if freed:
+            logger.info(
+                f"🧹 Reclaimed {freed / (1024 ** 2):.1f} MB, "
+                f"tracked usage now {self.usage / (1024 ** 2):.1f} MB"
+            )
+        return freed
+
+    def expire(self, directories=()):
+        """
+        Evicts unpinned artifacts not used for ``max_age`` seconds.
+
+        Files in ``directories`` that were never tracked (yt-dlp ``.part``
+        fragments, intermediates left by failed or partial processing) are
+        swept too once their mtime is older than ``max_age``, so nothing
+        stays on disk until the next restart reseeds the index.
+        """
+        if not self.max_age:
+            return 0
+
+        cutoff = time.time() - self.max_age
+        expired = [
+            path for path, (_, last_access) in self._artifacts.items()
+            if last_access < cutoff and path not in self._pins
+        ]
+        for path in expired:
+            self.discard(path)
+        return len(expired) + self._sweep_untracked(directories, cutoff)
+
+    def _sweep_untracked(self, directories, cutoff):
+        swept = 0
+        for directory in directories:
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    path = os.path.abspath(os.path.join(root, name))
+                    if path in self._artifacts or path in self._pins:
+                        continue
+                    try:
+                        if os.path.getmtime(path) >= cutoff:
+                            continue
+                        os.remove(path)
+                        swept += 1
+                    except FileNotFoundError:
+                        continue  # Removed by its job meanwhile
+                    except OSError as e:
+                        logger.error(f"❌ Failed to delete {path}: {e}")
+        return swept
+
+
+# Shared instance for the bot and all handlers
+storage = StorageManager(
+    STORAGE_QUOTA,
+    high_watermark=STORAGE_HIGH_WATERMARK,
+    low_watermark=STORAGE_LOW_WATERMARK,
+    min_free_disk=STORAGE_MIN_FREE_DISK,
+    max_age=STORAGE_MAX_AGE,
+)
+
+# Directories whose files are managed by ``storage``
+MANAGED_DIRS = [DOWNLOAD_DIR, TEMP_DIR, THUMBNAIL_DIR]
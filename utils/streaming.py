@@ -1,16 +1,13 @@
-import yt_dlp
 import logging
-import asyncio
 import os
-import subprocess
-from config import COOKIES_FILE
+from config import COOKIES_FILE, FFMPEG_ENCODE_THREADS
+from utils.ytdlp_runner import run_ytdlp
+from utils.ffmpeg_runner import run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
 async def get_download_url(url):
     """Fetches a direct MP4 download URL and gets video duration."""
-    loop = asyncio.get_running_loop()
-
     ydl_opts = {
         'format': 'bv*+ba/best[ext=mp4]/best',
         'merge_output_format': 'mp4',
@@ -20,25 +17,21 @@ async def get_download_url(url):
         'nocheckcertificate': True
     }
 
-    def fetch():
-        try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info_dict = ydl.extract_info(url, download=False)
-                video_url = info_dict.get('url')
-                duration = info_dict.get('duration', 0)
-                filesize = info_dict.get('filesize', 0)
-
-                if video_url:
-                    print(f"✅ Extracted Video URL: {video_url}")
-                else:
-                    print("❌ Failed to extract download URL.")
+    try:
+        info_dict, _ = await run_ytdlp(ydl_opts, url, download=False)
+        video_url = info_dict.get('url')
+        duration = info_dict.get('duration', 0)
+        filesize = info_dict.get('filesize', 0)
 
-                return video_url, duration, filesize if video_url else (None, None, None)
-        except Exception as e:
-            logger.error(f"⚠️ Error fetching download URL: {e}")
-            return None, None, None
+        if video_url:
+            print(f"✅ Extracted Video URL: {video_url}")
+        else:
+            print("❌ Failed to extract download URL.")
 
-    return await loop.run_in_executor(None, fetch)
+        return video_url, duration, filesize if video_url else (None, None, None)
+    except Exception as e:
+        logger.error(f"⚠️ Error fetching download URL: {e}")
+        return None, None, None
 
 async def download_best_clip(video_url, duration):
     """Downloads a 1-minute best scene clip from the video."""
@@ -46,13 +39,13 @@ async def download_best_clip(video_url, duration):
     start_time = max(0, duration // 3)  # Start at 1/3rd of the video
 
     command = [
-        "ffmpeg", "-i", video_url, "-ss", str(start_time),
+        "-ss", str(start_time), "-i", video_url,  # Seek in the input instead of decoding up to the start
         "-t", "60", "-c:v", "libx264", "-c:a", "aac",
-        "-b:a", "128k", "-preset", "fast", clip_path, "-y"
+        "-b:a", "128k", "-preset", "fast", clip_path
     ]
 
-    process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    return clip_path if process.returncode == 0 and os.path.exists(clip_path) else None
+    result = await run_ffmpeg(command, threads=FFMPEG_ENCODE_THREADS, duration=60, label="best clip")
+    return clip_path if result.ok and os.path.exists(clip_path) else None
 
 async def send_download_options(bot, chat_id, video_url, clip_path, filesize):
     """Sends a download link and a 1-minute clip."""
@@ -88,13 +81,12 @@ async def handle_video_request(bot, chat_id, url):
 # M3U8 to MP4 conversion function
 async def convert_m3u8_to_mp4(m3u8_url, output_path):
     command = [
-        "ffmpeg", "-i", m3u8_url, "-c", "copy", "-bsf:a", "aac_adtstoasc", "-y", output_path
+        "-i", m3u8_url, "-c", "copy", "-bsf:a", "aac_adtstoasc", output_path
     ]
 
-    process = await asyncio.create_subprocess_exec(*command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    await process.communicate()
+    result = await run_ffmpeg(command, label="m3u8 remux")
 
-    if process.returncode == 0 and os.path.exists(output_path):
+    if result.ok and os.path.exists(output_path):
         return output_path
     return None
 
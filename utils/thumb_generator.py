@@ -1,60 +1,164 @@
+import io
 import os
+import hashlib
 import logging
 import asyncio
+
+import aiohttp
+import numpy as np
 from PIL import Image
-from moviepy import VideoFileClip  # ✅ Correct import
+
 from utils.logger import setup_logging
+from utils.storage import storage
+from utils.smart_trim import probe_duration
+from utils.ffmpeg_runner import run_ffmpeg
+from config import THUMBNAIL_DIR
 
 # ✅ Logger Initialization
 logger = setup_logging(logging.DEBUG)
 
-# ✅ Thumbnail Directory
-THUMBNAIL_DIR = "thumbnails"
-os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+# Telegram thumbnails: JPEG, at most 320px on each side and under 200 kB
+THUMBNAIL_SIZE = 320
+JPEG_QUALITY = 85
+
+# Where in the video candidate frames are taken, as fractions of its duration
+CANDIDATE_POSITIONS = (0.1, 0.25, 0.5, 0.75)
+
+# Frames darker/brighter than this on average are treated as blank
+MIN_BRIGHTNESS = 16
+MAX_BRIGHTNESS = 240
+MIN_CONTRAST = 8
+
+THUMBNAIL_URL_TIMEOUT = 10
 
-def extract_frame(video_path, time=5):
+
+def thumbnail_path(key):
+    """Cache path of the thumbnail for ``key`` (a media ID tuple or a file path)."""
+    digest = hashlib.sha256(":".join(map(str, key)).encode()).hexdigest()[:24]
+    return os.path.join(THUMBNAIL_DIR, f"{digest}.jpg")
+
+
+def score_frame(image):
     """
-    Extracts a frame from the video at a given timestamp.
+    Scores how usable a frame is as a thumbnail (higher is better).
+
+    Black, white and flat frames score 0; otherwise the score is the
+    variance of the Laplacian, a cheap sharpness measure, so blurry frames
+    (fades, motion) lose against crisp ones.
     """
+    gray = np.asarray(image.convert("L"), dtype=np.float32)
+    mean, contrast = gray.mean(), gray.std()
+    if not MIN_BRIGHTNESS < mean < MAX_BRIGHTNESS or contrast < MIN_CONTRAST:
+        return 0.0
+
+    laplacian = (
+        4 * gray[1:-1, 1:-1]
+        - gray[:-2, 1:-1] - gray[2:, 1:-1]
+        - gray[1:-1, :-2] - gray[1:-1, 2:]
+    )
+    return float(laplacian.var())
+
+
+def save_thumbnail(image, path):
+    """Fits an image into THUMBNAIL_SIZE and writes it as a JPEG."""
+    image = image.convert("RGB")
+    image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+    image.save(path, "JPEG", quality=JPEG_QUALITY)
+
+
+async def thumbnail_from_url(url, path):
+    """Downloads the extractor's own thumbnail and shrinks it to Telegram's size."""
     try:
-        with VideoFileClip(video_path) as clip:  # ✅ Ensure proper closing
-            frame_time = min(time, clip.duration - 0.1)  # Avoid out-of-range issue
-            frame = clip.get_frame(frame_time)
-            return Image.fromarray(frame)  # Convert frame to PIL Image
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=THUMBNAIL_URL_TIMEOUT)) as response:
+                response.raise_for_status()
+                data = await response.read()
+
+        await asyncio.to_thread(lambda: save_thumbnail(Image.open(io.BytesIO(data)), path))
+        return path
     except Exception as e:
-        logger.error(f"⚠️ Error extracting frame: {e}")
+        logger.warning(f"⚠️ Thumbnail URL unusable ({e}), extracting a frame instead")
         return None
 
-async def generate_thumbnail(video_path, size=(3840, 2160)):
-    """
-    Asynchronously generate a high-definition thumbnail for the given video.
-    
-    :param video_path: Path to the video file.
-    :param size: Thumbnail size (width, height). Default is 4K resolution (3840x2160).
-    :return: Path to the generated thumbnail or None on failure.
-    """
+
+async def extract_candidate(video_path, position, path):
+    """Decodes the keyframe nearest ``position`` into a small JPEG."""
+    result = await run_ffmpeg([
+        "-skip_frame", "nokey",  # Only keyframes are decoded
+        "-ss", f"{position:.3f}", "-i", video_path,
+        "-map", "0:v:0", "-frames:v", "1",
+        "-vf", f"scale={THUMBNAIL_SIZE}:{THUMBNAIL_SIZE}:force_original_aspect_ratio=decrease",
+        "-q:v", "3",
+        path,
+    ], label="thumbnail frame")
+    return path if result.ok and os.path.exists(path) else None
+
+
+async def thumbnail_from_video(video_path, path):
+    """Extracts a few low-res keyframes and keeps the best scoring one."""
+    duration = await probe_duration(video_path) or 0
+    positions = sorted({round(duration * fraction, 3) for fraction in CANDIDATE_POSITIONS}) if duration else [0]
+
+    candidates = await asyncio.gather(*(
+        extract_candidate(video_path, position, f"{path}.{index}.jpg")
+        for index, position in enumerate(positions)
+    ))
+    candidates = [candidate for candidate in candidates if candidate]
+    if not candidates:
+        return None
+
+    def pick():
+        scores = {}
+        for candidate in candidates:
+            with Image.open(candidate) as image:
+                scores[candidate] = score_frame(image)
+        return max(candidates, key=scores.get)
+
     try:
-        loop = asyncio.get_running_loop()
+        best = await asyncio.to_thread(pick)
+        os.replace(best, path)
+        return path
+    finally:
+        for candidate in candidates:
+            if os.path.exists(candidate):
+                os.remove(candidate)
 
-        # ✅ Extract frame in a separate thread
-        frame = await loop.run_in_executor(None, extract_frame, video_path)
 
-        if frame is None:
-            logger.error("❌ Failed to extract frame.")
-            return None
+async def generate_thumbnail(video_path, media_id=None, thumbnail_url=None):
+    """
+    Returns a Telegram-sized JPEG thumbnail for a video.
 
-        # ✅ Generate thumbnail path
-        thumb_path = os.path.join(THUMBNAIL_DIR, os.path.basename(video_path) + ".jpg")
+    The extractor's ``thumbnail_url`` is used when given. Otherwise a few
+    keyframes are decoded at thumbnail resolution with ffmpeg (no full
+    decode, no upscaling) and the sharpest non-blank one is kept. Results
+    are cached by ``media_id`` ((extractor, id), falling back to the file
+    name), so the same media never gets its thumbnail generated twice.
+
+    :param video_path: Path to the video file.
+    :param media_id: Canonical (extractor, media_id) of the video, if known.
+    :param thumbnail_url: Thumbnail URL from the extractor's info dict, if any.
+    :return: Path to the thumbnail or None on failure.
+    """
+    path = thumbnail_path(media_id or ("file", os.path.basename(video_path)))
+    if os.path.exists(path):
+        storage.touch(path)
+        return path
 
-        # ✅ Resize & Save in a separate thread
-        def resize_and_save():
-            frame.resize(size, Image.LANCZOS).save(thumb_path, "JPEG", quality=95)
+    try:
+        result = None
+        if thumbnail_url:
+            result = await thumbnail_from_url(thumbnail_url, path)
+        if not result and video_path and os.path.exists(video_path):
+            result = await thumbnail_from_video(video_path, path)
 
-        await loop.run_in_executor(None, resize_and_save)
+        if not result:
+            logger.error("❌ Failed to generate thumbnail.")
+            return None
 
-        logger.info(f"✅ HD Thumbnail saved at: {thumb_path}")
-        return thumb_path
+        storage.track(path)
+        logger.info(f"✅ Thumbnail saved at: {path} ({os.path.getsize(path) / 1024:.0f} kB)")
+        return path
 
     except Exception as e:
         logger.error(f"⚠️ Failed to generate thumbnail: {e}")
-        return None
\ No newline at end of file
+        return None
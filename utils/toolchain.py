@@ -0,0 +1,137 @@
+import re
+import asyncio
+from dataclasses import dataclass
+
+from utils.logger import logger
+
+# Capabilities the handlers rely on, logged at startup
+REQUIRED_ENCODERS = ("libx264", "aac", "libmp3lame", "libopus")
+REQUIRED_MUXERS = ("mp4", "matroska", "mp3")
+REQUIRED_PROTOCOLS = ("https", "hls")
+
+ENCODER_LINE = re.compile(r"^\s*[VAS][\w.]{5}\s+(\S+)")
+MUXER_LINE = re.compile(r"^\s*D?E\s+(\S+)")
+
+
+@dataclass(slots=True, frozen=True)
+class Toolchain:
+    """What the installed ffmpeg/ffprobe can do, probed once at startup."""
+
+    ffmpeg_version: str | None = None
+    ffprobe_version: str | None = None
+    encoders: frozenset = frozenset()
+    muxers: frozenset = frozenset()
+    bitstream_filters: frozenset = frozenset()
+    input_protocols: frozenset = frozenset()
+
+    @property
+    def has_ffmpeg(self):
+        return self.ffmpeg_version is not None
+
+    @property
+    def has_ffprobe(self):
+        return self.ffprobe_version is not None
+
+    def has_encoder(self, name):
+        return name in self.encoders
+
+    @property
+    def can_stream_copy(self):
+        """Whether remux fast paths (``-c copy`` into MP4) are available."""
+        return self.has_ffmpeg and "mp4" in self.muxers and "aac_adtstoasc" in self.bitstream_filters
+
+    @property
+    def can_smart_trim(self):
+        """Whether keyframe-aware trimming (ffprobe + libx264 + Matroska pieces) works."""
+        return self.has_ffprobe and self.has_encoder("libx264") and {"matroska", "mp4"} <= self.muxers
+
+    def summary(self):
+        missing = [
+            name for name in REQUIRED_ENCODERS + REQUIRED_MUXERS
+            if name not in self.encoders and name not in self.muxers
+        ] + [name for name in REQUIRED_PROTOCOLS if name not in self.input_protocols]
+        return (
+            f"ffmpeg {self.ffmpeg_version or 'MISSING'}, ffprobe {self.ffprobe_version or 'MISSING'}, "
+            f"stream copy {'yes' if self.can_stream_copy else 'no'}, "
+            f"smart trim {'yes' if self.can_smart_trim else 'no'}"
+            + (f", missing: {', '.join(missing)}" if missing else "")
+        )
+
+
+async def _capture(*command):
+    """Returns a command's stdout, or None if it can't be run."""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+    except (FileNotFoundError, PermissionError):
+        return None
+    stdout, _ = await process.communicate()
+    return stdout.decode(errors="ignore") if process.returncode == 0 else None
+
+
+def _version(output):
+    match = re.search(r"version (\S+)", output or "")
+    return match.group(1) if match else None
+
+
+def _names(output, pattern):
+    return frozenset(
+        match.group(1) for match in map(pattern.match, (output or "").splitlines()) if match
+    )
+
+
+def _after_header(output, header, stop=None):
+    """Names listed one per line after ``header`` (and before ``stop``)."""
+    names, listing = set(), False
+    for line in (output or "").splitlines():
+        line = line.strip()
+        if line == header:
+            listing = True
+        elif line == stop:
+            break
+        elif listing and line:
+            names.add(line)
+    return frozenset(names)
+
+
+async def probe_toolchain():
+    """Runs the ffmpeg/ffprobe capability queries concurrently."""
+    ffmpeg_version, ffprobe_version, encoders, muxers, bsfs, protocols = await asyncio.gather(
+        _capture("ffmpeg", "-hide_banner", "-version"),
+        _capture("ffprobe", "-hide_banner", "-version"),
+        _capture("ffmpeg", "-hide_banner", "-encoders"),
+        _capture("ffmpeg", "-hide_banner", "-muxers"),
+        _capture("ffmpeg", "-hide_banner", "-bsfs"),
+        _capture("ffmpeg", "-hide_banner", "-protocols"),
+    )
+    return Toolchain(
+        ffmpeg_version=_version(ffmpeg_version),
+        ffprobe_version=_version(ffprobe_version),
+        encoders=_names(encoders, ENCODER_LINE),
+        muxers=_names(muxers, MUXER_LINE),
+        bitstream_filters=_after_header(bsfs, "Bitstream filters:"),
+        input_protocols=_after_header(protocols, "Input:", stop="Output:"),
+    )
+
+
+_toolchain = None
+_toolchain_lock = asyncio.Lock()
+
+
+async def get_toolchain():
+    """
+    Returns the probed toolchain capabilities.
+
+    The probe runs once (normally at startup); every later call is answered
+    from memory.
+    """
+    global _toolchain
+    if _toolchain is None:
+        async with _toolchain_lock:
+            if _toolchain is None:
+                _toolchain = await probe_toolchain()
+                logger.info(f"🧰 Toolchain: {_toolchain.summary()}")
+    return _toolchain
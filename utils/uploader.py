@@ -0,0 +1,139 @@
+import os
+import time
+import asyncio
+from contextlib import ExitStack
+
+import psutil
+from telebot.types import InputMediaPhoto, InputMediaVideo
+
+from utils.logger import logger
+
+# Bot API method used for each kind of media
+UPLOAD_METHODS = {
+    "video": "send_video",
+    "audio": "send_audio",
+    "photo": "send_photo",
+    "document": "send_document",
+}
+
+RSS_SAMPLE_INTERVAL = 0.1  # Seconds between RSS samples during an upload
+
+# Media that can share an album, and how many items an album holds
+INPUT_MEDIA = {"photo": InputMediaPhoto, "video": InputMediaVideo}
+MEDIA_GROUP_LIMIT = 10
+
+# Extra arguments per media type, for single uploads and album items alike
+MEDIA_OPTIONS = {"video": {"supports_streaming": True}}
+
+
+async def _sample_peak_rss(process, peak):
+    while True:
+        peak[0] = max(peak[0], process.memory_info().rss)
+        await asyncio.sleep(RSS_SAMPLE_INTERVAL)
+
+
+async def upload_file(bot, chat_id, file_path, media_type, **kwargs):
+    """
+    Uploads a file to Telegram straight from disk.
+
+    The open file handle is passed to the bot, so the multipart body is
+    streamed from disk in small chunks instead of being read into memory;
+    memory use stays flat regardless of the file size. Peak RSS during the
+    upload is sampled and logged.
+
+    Args:
+        bot: AsyncTeleBot instance
+        chat_id (int): Destination chat
+        file_path (str): File to upload
+        media_type (str): One of "video", "audio", "photo", "document"
+        **kwargs: Extra arguments for the Bot API method (caption, timeout, ...)
+
+    Returns:
+        Message: The sent message
+    """
+    process = psutil.Process(os.getpid())
+    baseline = process.memory_info().rss
+    peak = [baseline]
+    sampler = asyncio.create_task(_sample_peak_rss(process, peak))
+    started = time.monotonic()
+
+    try:
+        with open(file_path, "rb") as file:
+            message = await getattr(bot, UPLOAD_METHODS[media_type])(chat_id, file, **kwargs)
+    finally:
+        sampler.cancel()
+
+    peak_rss = max(peak[0], process.memory_info().rss)
+    file_size = os.path.getsize(file_path)
+    logger.info(
+        f"📤 Uploaded {os.path.basename(file_path)} ({file_size / (1024 ** 2):.1f} MB) to chat {chat_id} "
+        f"in {time.monotonic() - started:.1f}s, peak RSS {peak_rss / (1024 ** 2):.1f} MB "
+        f"(+{(peak_rss - baseline) / (1024 ** 2):.1f} MB)"
+    )
+    return message
+
+
+def album_batches(items):
+    """
+    Splits [(media, media_type), ...] into the batches ``send_album`` sends:
+    runs of photos/videos of up to MEDIA_GROUP_LIMIT, anything else alone.
+    """
+    batches, album = [], []
+    for item in items:
+        if item[1] not in INPUT_MEDIA:
+            if album:
+                batches.append(album)
+                album = []
+            batches.append([item])
+            continue
+        album.append(item)
+        if len(album) == MEDIA_GROUP_LIMIT:
+            batches.append(album)
+            album = []
+    if album:
+        batches.append(album)
+    return batches
+
+
+async def send_album(bot, chat_id, items, from_disk=True):
+    """
+    Sends several files in as few Bot API calls as possible.
+
+    Photos and videos go out as media groups of up to ten, everything else
+    (and a lone photo/video) with its own send method. Files on disk are
+    streamed from open handles like in ``upload_file``.
+
+    Args:
+        bot: AsyncTeleBot instance
+        chat_id (int): Destination chat
+        items (list): (file path or file_id, media_type) pairs, in order
+        from_disk (bool): Whether the items are file paths rather than file_ids
+
+    Returns:
+        list: The sent messages, one per item
+    """
+    started = time.monotonic()
+    batches = album_batches(items)
+    messages = []
+    for batch in batches:
+        with ExitStack() as files:
+            media = [
+                files.enter_context(open(item, "rb")) if from_disk else item
+                for item, _ in batch
+            ]
+            if len(batch) == 1:
+                media_type = batch[0][1]
+                method = getattr(bot, UPLOAD_METHODS.get(media_type, f"send_{media_type}"))
+                messages.append(await method(chat_id, media[0], **MEDIA_OPTIONS.get(media_type, {})))
+            else:
+                messages.extend(await bot.send_media_group(chat_id, [
+                    INPUT_MEDIA[media_type](item, **MEDIA_OPTIONS.get(media_type, {}))
+                    for item, (_, media_type) in zip(media, batch)
+                ]))
+
+    size = sum(os.path.getsize(item) for item, _ in items) if from_disk else 0
+    logger.info(
+        f"📤 Sent {len(items)} file(s) in {len(batches)} call(s) to chat {chat_id} "
+        f"in {time.monotonic() - started:.1f}s" + (f" ({size / (1024 ** 2):.1f} MB)" if from_disk else "")
+    )
+    return messages
@@ -0,0 +1,135 @@
+import os
+import json
+import threading
+from contextlib import contextmanager
+
+import yt_dlp
+
+from config import YTDLP_POOL_SIZE
+from utils.logger import logger
+
+# Options that belong to a single job and are swapped in on checkout
+PER_JOB_HOOKS = ("progress_hooks", "postprocessor_hooks")
+PER_JOB_PARAMS = ("download_ranges", "force_keyframes_at_cuts")
+PER_JOB_OPTS = PER_JOB_HOOKS + PER_JOB_PARAMS
+
+
+def _options_key(ydl_opts):
+    """Stable key for an option set; objects like loggers are keyed by identity."""
+    shared = {key: value for key, value in ydl_opts.items() if key not in PER_JOB_OPTS}
+    return json.dumps(shared, sort_keys=True, default=lambda obj: f"{type(obj).__name__}@{id(obj)}")
+
+
+def _cookie_signature(ydl_opts):
+    """(mtime, size) of the cookie file, so a refreshed file is noticed."""
+    cookie_file = ydl_opts.get("cookiefile")
+    if not cookie_file:
+        return None
+    try:
+        stat = os.stat(cookie_file)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class YoutubeDLPool:
+    """
+    Keeps built ``YoutubeDL`` instances around between jobs.
+
+    Building an instance parses the cookie file, instantiates the extractor
+    and postprocessor classes and, on first request, a whole HTTP stack.
+    Idle instances are kept per option set and handed out to one job at a
+    time. Per-job state (progress hooks, download counters) is reset on
+    checkout, and an instance is rebuilt when its cookie file changed on
+    disk since it was built.
+    """
+
+    def __init__(self, max_idle=4):
+        self.max_idle = max_idle
+        self._idle = {}  # options key -> [(cookie signature, ydl)]
+        self._lock = threading.Lock()
+
+    def _build(self, ydl_opts):
+        # YoutubeDL fills in defaults on the dict it is given; keep the caller's intact
+        ydl = yt_dlp.YoutubeDL(dict(ydl_opts))
+        ydl.cookiejar  # Parse the cookie file now rather than on the first request
+        return ydl
+
+    @staticmethod
+    def _reset(ydl, ydl_opts):
+        ydl._progress_hooks = list(ydl_opts.get("progress_hooks") or [])
+        ydl._postprocessor_hooks = list(ydl_opts.get("postprocessor_hooks") or [])
+        for key in PER_JOB_PARAMS:
+            # yt-dlp tells "not set" apart from None for some of these
+            if key in ydl_opts:
+                ydl.params[key] = ydl_opts[key]
+            else:
+                ydl.params.pop(key, None)
+        ydl._num_downloads = 0
+        ydl._num_videos = 0
+        ydl._download_retcode = 0
+        ydl._playlist_level = 0
+        ydl._playlist_urls = set()
+        ydl._printed_messages = set()
+
+    @staticmethod
+    def _retire(ydl, keep_cookies=True):
+        if not keep_cookies:
+            # The file on disk is newer than our jar; don't overwrite it
+            ydl.params["cookiefile"] = None
+        try:
+            ydl.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to close yt-dlp instance: {e}")
+
+    @contextmanager
+    def checkout(self, ydl_opts):
+        """Lends an instance built with ``ydl_opts`` for the duration of the block."""
+        key = _options_key(ydl_opts)
+        signature = _cookie_signature(ydl_opts)
+        ydl, stale = None, []
+
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                built_with, candidate = idle.pop()
+                if built_with == signature:
+                    ydl = candidate
+                    break
+                stale.append(candidate)
+
+        for candidate in stale:
+            logger.info("🍪 Cookie file changed, rebuilding yt-dlp instance")
+            self._retire(candidate, keep_cookies=False)
+
+        if ydl is None:
+            ydl = self._build(ydl_opts)
+        self._reset(ydl, ydl_opts)
+
+        try:
+            yield ydl
+        except BaseException:
+            # Don't reuse an instance whose state a failed job may have left behind
+            self._retire(ydl)
+            raise
+
+        self._reset(ydl, {})
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append((signature, ydl))
+                ydl = None
+        if ydl is not None:
+            self._retire(ydl)
+
+    def close(self):
+        """Closes every idle instance."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for instances in idle.values():
+            for _, ydl in instances:
+                self._retire(ydl)
+
+
+# Shared pool for this process (each yt-dlp worker process has its own)
+ydl_pool = YoutubeDLPool(YTDLP_POOL_SIZE)
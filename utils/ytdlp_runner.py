@@ -0,0 +1,180 @@
+import uuid
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import yt_dlp
+
+from config import YTDLP_PROCESS_WORKERS
+from utils.logger import logger
+from utils.ytdlp_pool import ydl_pool
+from utils.probe_cache import probe_cache
+
+# Progress fields that are cheap to send between processes
+PROGRESS_KEYS = (
+    "status", "filename", "tmpfilename", "downloaded_bytes", "total_bytes",
+    "total_bytes_estimate", "elapsed", "eta", "speed", "fragment_index",
+    "fragment_count", "_percent_str", "_speed_str", "_eta_str",
+)
+
+# Exceptions re-raised in the parent with their original type
+REMOTE_ERRORS = {
+    "DownloadError": yt_dlp.utils.DownloadError,
+    "ExtractorError": lambda msg: yt_dlp.utils.ExtractorError(msg, expected=True),
+}
+
+
+def _extract(ydl_opts, url, download, info=None):
+    """
+    Runs yt-dlp on a pooled instance and returns (info_dict, filename).
+
+    When ``info`` is given (a previously extracted info dict), yt-dlp only
+    selects formats from it and downloads, without fetching the page again.
+    """
+    with ydl_pool.checkout(ydl_opts) as ydl:
+        if info is not None:
+            info = ydl.process_ie_result(info, download=download)
+        else:
+            info = ydl.extract_info(url, download=download)
+        if not info:
+            return None, None
+        return info, ydl.prepare_filename(info)
+
+
+# ------------------------------------------------------------------
+# Worker process side
+# ------------------------------------------------------------------
+_progress_queue = None
+
+
+def _init_worker(progress_queue):
+    """Keeps yt-dlp and its extractors imported in each warm worker."""
+    global _progress_queue
+    _progress_queue = progress_queue
+    list(yt_dlp.extractor.gen_extractor_classes())
+
+
+def _extract_in_worker(ydl_opts, url, download, info, token):
+    if token is not None:
+        def forward_progress(d):
+            _progress_queue.put((token, {key: d.get(key) for key in PROGRESS_KEYS}))
+        ydl_opts = dict(ydl_opts, progress_hooks=[forward_progress])
+    ydl_opts.setdefault("logger", logger)
+
+    try:
+        info, filename = _extract(ydl_opts, url, download, info)
+    except Exception as e:
+        # yt-dlp exceptions carry tracebacks and can't be pickled as-is
+        return "error", type(e).__name__, str(e)
+    return "ok", yt_dlp.YoutubeDL.sanitize_info(info), filename
+
+
+# ------------------------------------------------------------------
+# Parent side
+# ------------------------------------------------------------------
+class YtDlpProcessPool:
+    """
+    Pool of warm worker processes running yt-dlp outside the bot's process.
+
+    Extraction, progress hooks and fragment bookkeeping then no longer
+    compete for the GIL with the event loop serving Telegram updates.
+    Progress hook calls are forwarded back over a queue and dispatched to
+    the caller's hooks in this process.
+    """
+
+    def __init__(self, workers):
+        # Workers are forked from a single-threaded fork server that already
+        # imported yt-dlp, so they start warm and never inherit the bot's threads
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        self._progress_queue = context.Queue()
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self._progress_queue,),
+        )
+        self._hooks = {}
+        self._loop = None
+        threading.Thread(target=self._pump_progress, daemon=True).start()
+
+    def _pump_progress(self):
+        while True:
+            token, progress = self._progress_queue.get()
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._dispatch_progress, token, progress)
+
+    def _dispatch_progress(self, token, progress):
+        for hook in self._hooks.get(token, ()):
+            try:
+                hook(progress)
+            except Exception as e:
+                logger.warning(f"⚠️ Progress hook failed: {e}")
+
+    async def extract(self, ydl_opts, url, download, info=None):
+        self._loop = asyncio.get_running_loop()
+        ydl_opts = dict(ydl_opts)
+        ydl_opts.pop("logger", None)  # Replaced by the worker's own logger
+        hooks = ydl_opts.pop("progress_hooks", None)
+
+        token = uuid.uuid4().hex if hooks else None
+        if token:
+            self._hooks[token] = hooks
+        try:
+            status, *result = await self._loop.run_in_executor(
+                self._executor, _extract_in_worker, ydl_opts, url, download, info, token
+            )
+        finally:
+            self._hooks.pop(token, None)
+
+        if status == "error":
+            error_type, message = result
+            raise REMOTE_ERRORS.get(error_type, RuntimeError)(message)
+        return tuple(result)
+
+
+_process_pool = None
+
+
+def get_process_pool():
+    """Returns the shared process pool, or None when running in thread mode."""
+    global _process_pool
+    if YTDLP_PROCESS_WORKERS and _process_pool is None:
+        _process_pool = YtDlpProcessPool(YTDLP_PROCESS_WORKERS)
+        logger.info(f"⚙️ yt-dlp process pool started with {YTDLP_PROCESS_WORKERS} worker(s)")
+    return _process_pool
+
+
+async def _run(ydl_opts, url, download, info=None):
+    pool = get_process_pool()
+    if pool is not None:
+        return await pool.extract(ydl_opts, url, download, info)
+    return await asyncio.to_thread(_extract, ydl_opts, url, download, info)
+
+
+async def run_ytdlp(ydl_opts, url, download=True):
+    """
+    Runs yt-dlp extraction (and the download) off the event loop.
+
+    Uses the warm process pool when ``YTDLP_PROCESS_WORKERS`` is set,
+    otherwise the default thread pool. Metadata-only runs are cached in
+    ``probe_cache``, and a later run for the same media reuses the cached
+    info dict instead of extracting again. If that fails (e.g. the format
+    URLs expired), the media is extracted from scratch.
+
+    Returns:
+        tuple: (info_dict, filename), or (None, None) if yt-dlp returned nothing
+    """
+    cached = probe_cache.get(url)
+    if cached is not None:
+        try:
+            return await _run(ydl_opts, url, download, cached)
+        except Exception as e:
+            logger.warning(f"⚠️ Cached metadata for {url} unusable, extracting again: {e}")
+            probe_cache.invalidate(url)
+
+    info, filename = await _run(ydl_opts, url, download)
+    if not download:
+        probe_cache.put(url, info)
+    return info, filename